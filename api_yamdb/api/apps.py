@@ -1,6 +1,18 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from users.signals import email_attempted
+
+        from .conditional import connect_versions
+        from .instrumentation import install_query_hooks
+        from .metrics import count_email
+
+        connection_created.connect(install_query_hooks)
+        email_attempted.connect(count_email)
+        connect_versions()
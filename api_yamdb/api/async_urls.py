@@ -0,0 +1,26 @@
+from django.urls import path
+
+from . import async_views, urls
+
+app_name = 'api'
+
+# Асинхронные маршруты стоят раньше маршрутов роутера с теми же адресами.
+urlpatterns = [
+    path('v1/titles/', async_views.title_list, name='titles-list'),
+    path(
+        'v1/titles/<int:pk>/',
+        async_views.title_detail,
+        name='titles-detail'
+    ),
+    path(
+        'v1/titles/<int:title_id>/reviews/',
+        async_views.review_list,
+        name='reviews-list'
+    ),
+    path(
+        'v1/titles/<int:title_id>/reviews/<int:review_id>/comments/',
+        async_views.comment_list,
+        name='comments-list'
+    ),
+    *urls.urlpatterns,
+]
@@ -0,0 +1,67 @@
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+from .instrumentation import phase
+from .views import CommentViewSet, ReviewViewSet, TitleViewSet
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def render_in_thread(view, request, *args, **kwargs):
+    """
+    Выполняет view целиком в текущем потоке пула: запросы к БД,
+    сериализацию и рендеринг. Соединения потока живут по правилам
+    CONN_MAX_AGE, как соединения обработчика запросов.
+    """
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            with phase('render'):
+                response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_read_view(viewset, actions):
+    """
+    Асинхронная view для ASGI поверх вьюсета. В Django 3.2 нет
+    асинхронного ORM, а синхронные view ASGIHandler выполняет по одной
+    в общем потоке. Здесь GET и HEAD уходят в пул потоков
+    (thread_sensitive=False), так что чтения идут параллельно, пока
+    SQLite и сериализация отпускают GIL; ответы те же, что у вьюсета.
+    Изменения выполняются как обычные синхронные view.
+    """
+    read = viewset.as_view({'get': actions['get']})
+    write = viewset.as_view(actions)
+    read_in_pool = sync_to_async(render_in_thread, thread_sensitive=False)
+    write_in_thread = sync_to_async(write, thread_sensitive=True)
+
+    async def view(request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            return await read_in_pool(read, request, *args, **kwargs)
+        return await write_in_thread(request, *args, **kwargs)
+
+    # Метки метрик и освобождение от CSRF - как у view вьюсета.
+    view.cls = viewset
+    view.actions = actions
+    view.csrf_exempt = True
+    return view
+
+
+title_list = async_read_view(
+    TitleViewSet, {'get': 'list', 'post': 'create'}
+)
+title_detail = async_read_view(TitleViewSet, {
+    'get': 'retrieve',
+    'put': 'update',
+    'patch': 'partial_update',
+    'delete': 'destroy',
+})
+review_list = async_read_view(
+    ReviewViewSet, {'get': 'list', 'post': 'create'}
+)
+comment_list = async_read_view(
+    CommentViewSet, {'get': 'list', 'post': 'create'}
+)
@@ -0,0 +1,154 @@
+import hashlib
+from datetime import timedelta
+
+from django.db.models.signals import m2m_changed, post_save
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from reviews.cascades import DeleteBatch
+from reviews.models import (Category, Comment, ContentVersion, Genre, Review,
+                            Title)
+from users.models import User
+
+from .versions import list_scope, scope
+
+
+class ConditionalGetMixin:
+    """
+    ETag и Last-Modified для list и retrieve из версий ContentVersion:
+    одним запросом к индексу версий, при совпадении If-None-Match или
+    If-Modified-Since ответ 304 отдаётся до выборки и сериализации.
+    Версии лежат в БД и растут в транзакции изменения, поэтому общие
+    для всех процессов. Области версий для действия задаёт
+    get_version_scopes(); права и лимиты проверяются до этого, как обычно.
+    """
+
+    def get_version_scopes(self):
+        raise NotImplementedError
+
+    def conditional(self, handler, request, *args, **kwargs):
+        versions = ContentVersion.current(self.get_version_scopes())
+        etag = quote_etag(hashlib.md5(repr((
+            sorted((name, version) for name, (version, _) in
+                   versions.items()),
+            request.build_absolute_uri(),
+            request.accepted_media_type,
+        )).encode()).hexdigest())
+        last_modified = max(
+            (modified for _, modified in versions.values() if modified),
+            default=None
+        )
+        if (
+            last_modified is not None
+            and timezone.now() - last_modified < timedelta(seconds=1)
+        ):
+            # Last-Modified точен до секунды: изменение в ту же секунду
+            # не сдвинет его, и If-Modified-Since дал бы ложный 304.
+            last_modified = None
+        if last_modified is not None:
+            last_modified = int(last_modified.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
+
+def invalidate(*scopes):
+    ContentVersion.bump(scopes)
+
+
+def title_changed(sender, instance, created=False, **kwargs):
+    # Новый объект меняет только список: у него ещё нет своих ответов.
+    scopes = [list_scope(Title, instance.pk)]
+    if not created:
+        scopes.append(scope(Title, instance.pk))
+    invalidate(*scopes)
+
+
+def title_genres_changed(sender, instance, action, reverse, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        # Жанр входит в ETag всех произведений через версию модели Genre.
+        invalidate(scope(Genre))
+    else:
+        title_changed(sender, instance)
+
+
+def directory_changed(sender, **kwargs):
+    # Категории и жанры входят в ETag всех произведений.
+    invalidate(scope(sender))
+
+
+def review_changed(sender, instance, created=False, **kwargs):
+    # Отзыв меняет рейтинг и список отзывов произведения.
+    scopes = [
+        list_scope(Title, instance.title_id), scope(Title, instance.title_id)
+    ]
+    if not created:
+        scopes.append(scope(Review, instance.pk))
+    invalidate(*scopes)
+
+
+def comment_changed(sender, instance, **kwargs):
+    invalidate(scope(Review, instance.review_id))
+
+
+def user_changed(sender, instance, created=False, **kwargs):
+    # Имя пользователя выводится автором отзывов и комментариев.
+    if not created:
+        invalidate(scope(User))
+
+
+def versions_on_delete(deleted):
+    """
+    Удаление вместе с каскадом: каждая затронутая область поднимается
+    один раз, а строки версий удалённых объектов удаляются.
+    """
+    titles = {title.pk for title in deleted[Title]}
+    reviews = {review.pk for review in deleted[Review]}
+    changed = {
+        scope(model) for model in (Category, Genre, User) if deleted[model]
+    }
+    changed.update(list_scope(Title, pk) for pk in titles)
+    for review in deleted[Review]:
+        if review.title_id not in titles:
+            changed.update((
+                list_scope(Title, review.title_id),
+                scope(Title, review.title_id),
+            ))
+    changed.update(
+        scope(Review, comment.review_id) for comment in deleted[Comment]
+        if comment.review_id not in reviews
+    )
+    ContentVersion.forget(
+        [scope(Title, pk) for pk in titles]
+        + [scope(Review, pk) for pk in reviews]
+    )
+    invalidate(*changed)
+
+
+def connect_versions():
+    """Сигналы моделей, которые меняют ответы с ETag."""
+    for model, receiver in (
+        (Title, title_changed), (Review, review_changed),
+        (Comment, comment_changed), (User, user_changed),
+        (Category, directory_changed), (Genre, directory_changed),
+    ):
+        post_save.connect(receiver, sender=model)
+    m2m_changed.connect(title_genres_changed, sender=Title.genre.through)
+    DeleteBatch('content_versions', versions_on_delete).connect(
+        Title, Review, Comment, User, Category, Genre
+    )
@@ -0,0 +1,38 @@
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS, ManyRelatedField
+
+
+class BulkManyRelatedField(ManyRelatedField):
+    """Список слагов проверяется одним запросом, а не запросом на слаг."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        child = self.child_relation
+        slugs = [item for item in data if isinstance(item, str)]
+        found = {
+            getattr(obj, child.slug_field): obj
+            for obj in child.get_queryset().filter(
+                **{f'{child.slug_field}__in': slugs}
+            )
+        } if slugs else {}
+        # Ненайденные значения проверяет обычное поле: те же ошибки.
+        return [
+            found[item] if isinstance(item, str) and item in found
+            else child.to_internal_value(item)
+            for item in data
+        ]
+
+
+class BulkSlugRelatedField(serializers.SlugRelatedField):
+    """SlugRelatedField, у которого many=True не даёт N+1 при записи."""
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
@@ -0,0 +1,61 @@
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+
+
+def split_param(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def requested_fields(request, available):
+    """
+    Поля ответа по ?fields=id,name и ?omit=genre в порядке available.
+    None - параметров нет, нужны все поля. Только для чтения: запись
+    всегда принимает и возвращает полный набор полей.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    fields = split_param(request.query_params.get(FIELDS_PARAM, ''))
+    omit = split_param(request.query_params.get(OMIT_PARAM, ''))
+    if not fields and not omit:
+        return None
+    unknown = set(fields).union(omit).difference(available)
+    if unknown:
+        raise serializers.ValidationError({
+            FIELDS_PARAM: [
+                f'Неизвестные поля: {", ".join(sorted(unknown))}. '
+                f'Доступны: {", ".join(available)}.'
+            ]
+        })
+    return tuple(
+        name for name in available
+        if (not fields or name in fields) and name not in omit
+    )
+
+
+class SparseFieldsMixin:
+    """Сериализатор ответа оставляет только поля из ?fields= и ?omit=."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = requested_fields(
+            self.context.get('request'), tuple(self.fields)
+        )
+        if selected is not None:
+            for name in set(self.fields).difference(selected):
+                self.fields.pop(name)
+
+    @classmethod
+    def only_columns(cls, fields):
+        """Столбцы модели для .only() по выбранным полям."""
+        model = cls.Meta.model
+        concrete = {
+            field.name for field in model._meta.concrete_fields
+        }
+        declared = cls().fields
+        return tuple(
+            declared[name].source for name in fields
+            if declared[name].source in concrete
+        )
@@ -1,5 +1,6 @@
 from django_filters.rest_framework import CharFilter, FilterSet
 from reviews.models import Title
+from search.backends import get_backend
 
 
 class FilterTitle(FilterSet):
@@ -15,7 +16,11 @@ class FilterTitle(FilterSet):
         field_name='name',
         lookup_expr='icontains'
     )
+    search = CharFilter(method='filter_search')
 
     class Meta:
         model = Title
-        fields = ('year', 'category', 'genre', 'name')
+        fields = ('year', 'category', 'genre', 'name', 'search')
+
+    def filter_search(self, queryset, name, value):
+        return get_backend().filter_queryset(queryset, value)
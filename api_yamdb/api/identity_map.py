@@ -0,0 +1,23 @@
+class IdentityMap:
+    """
+    Объекты, уже загруженные за время запроса: (модель, pk) -> объект.
+    pk из URL приходит строкой или числом, поэтому ключ - строка.
+    """
+
+    def __init__(self):
+        self.objects = {}
+
+    def get(self, model, pk):
+        return self.objects.get((model, str(pk)))
+
+    def add(self, obj):
+        self.objects[(type(obj), str(obj.pk))] = obj
+        return obj
+
+
+def identity_map(request):
+    """Карта объектов запроса; DRF Request и HttpRequest делят одну карту."""
+    http_request = getattr(request, '_request', request)
+    if not hasattr(http_request, 'identity_map'):
+        http_request.identity_map = IdentityMap()
+    return http_request.identity_map
@@ -0,0 +1,455 @@
+import math
+import re
+import statistics
+from time import perf_counter
+
+from django.apps import apps
+from django.db import connection, models, transaction
+from django.db.migrations import AddIndex, Migration, RunSQL
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.writer import MigrationWriter
+
+from .slow_queries import explain, normalize_sql
+
+COLUMN = r'(?:"(\w+)"|\b([A-Z]\d+))\."(\w+)"'
+TABLE_RE = re.compile(r'\b(?:FROM|JOIN)\s+"(\w+)"(?:\s+([A-Z]\d+)\b)?')
+PREDICATE_RE = re.compile(
+    COLUMN + r'\s*(=|IN\b|IS\b|<=|>=|<|>|BETWEEN\b|LIKE\b)'
+)
+JOIN_RE = re.compile(r'ON \(' + COLUMN + r'\s*=\s*' + COLUMN + r'\)')
+ORDER_RE = re.compile(COLUMN)
+LIMIT_RE = re.compile(r' LIMIT (\d+)(?: OFFSET (\d+))?')
+PLAN_RE = re.compile(
+    r'^(SCAN|SEARCH) (\w+)(?: USING (?:COVERING )?INDEX (\w+)'
+    r'(?: \((.*)\))?| USING (INTEGER PRIMARY KEY))?'
+)
+PLAN_COLUMN_RE = re.compile(r'(\w+)[=<>]')
+EQUALITY = ('=', 'IN', 'IS')
+RANGE = ('<', '>', '<=', '>=', 'BETWEEN')
+# Доля строк, которую оставляет условие-диапазон, когда статистики нет.
+RANGE_SELECTIVITY = 1 / 3
+
+
+class WorkloadQuery:
+    """Шаблон запроса из нагрузки: пример SQL с параметрами и частота."""
+
+    def __init__(self, sql, params, count=1):
+        self.sql = sql
+        self.params = params
+        self.count = count
+        self.normalized = normalize_sql(sql)
+
+
+def load_workload(entries):
+    """
+    Сворачивает записи журнала (sql, params) в шаблоны по
+    нормализованному SQL. Учитываются только чтения; запросы со
+    скрытыми в журнале параметрами повторить нельзя, они пропускаются.
+    """
+    workload = {}
+    for entry in entries:
+        sql = entry['sql']
+        if not sql.lstrip().upper().startswith('SELECT'):
+            continue
+        if entry.get('params') is None and '%s' in sql:
+            continue
+        query = WorkloadQuery(sql, entry.get('params') or [])
+        if query.normalized in workload:
+            workload[query.normalized].count += 1
+        else:
+            workload[query.normalized] = query
+    return list(workload.values())
+
+
+def resolve(match, aliases):
+    table, alias, column = match
+    return aliases.get(table or alias, table or alias), column
+
+
+def split_clauses(sql):
+    """Части FROM/JOIN, WHERE и ORDER BY внешнего запроса Django."""
+    where_at = sql.find(' WHERE ')
+    order_at = sql.rfind(' ORDER BY ')
+    limit = LIMIT_RE.search(sql)
+    end = limit.start() if limit else len(sql)
+    from_end = min(
+        position for position in (where_at, order_at, end) if position >= 0
+    )
+    from_part = sql[sql.find(' FROM '):from_end]
+    where_part = sql[where_at:order_at if order_at > where_at else end] \
+        if where_at >= 0 else ''
+    order_part = sql[order_at:end] if order_at >= 0 else ''
+    return from_part, where_part, order_part, limit
+
+
+class QueryShape:
+    """
+    Какие столбцы каких таблиц запрос использует в равенствах,
+    диапазонах, соединениях и сортировке.
+    """
+
+    def __init__(self, sql):
+        from_part, where_part, order_part, limit = split_clauses(sql)
+        self.aliases = {}
+        self.tables = []
+        for table, alias in TABLE_RE.findall(from_part):
+            self.aliases[alias or table] = table
+            self.tables.append(table)
+        self.columns = {
+            table: {'eq': [], 'range': [], 'join': [], 'like': []}
+            for table in self.tables
+        }
+        for *match, operator in PREDICATE_RE.findall(where_part):
+            table, column = resolve(match, self.aliases)
+            self.add(table, column, self.kind(operator))
+        for match in JOIN_RE.findall(from_part):
+            for side in (match[:3], match[3:]):
+                self.add(*resolve(side, self.aliases), kind=None)
+        self.order = [
+            resolve(match, self.aliases) for match in
+            ORDER_RE.findall(order_part)
+        ]
+        self.limit = (
+            int(limit.group(1)) + int(limit.group(2) or 0) if limit else None
+        )
+
+    @staticmethod
+    def kind(operator):
+        if operator in EQUALITY:
+            return 'eq'
+        if operator in RANGE:
+            return 'range'
+        return 'like'
+
+    def add(self, table, column, kind):
+        columns = self.columns.get(table)
+        if columns is not None and column not in columns[kind or 'join']:
+            columns[kind or 'join'].append(column)
+
+    def order_columns(self, table):
+        """Столбцы ORDER BY, если вся сортировка по одной таблице."""
+        if self.order and all(name == table for name, _ in self.order):
+            return [column for _, column in self.order]
+        return []
+
+    def candidates(self, table):
+        """
+        Составные индексы для таблицы: равенства, затем диапазон или
+        сортировка; для соединений - столбец соединения и равенства.
+        """
+        columns = self.columns[table]
+        eq = columns['eq']
+        tail = columns['range'][:1] or self.order_columns(table)
+        result = []
+        if eq or tail:
+            result.append((eq, unique(eq + tail)))
+        for column in columns['join']:
+            if column != 'id':
+                columns = unique([column] + eq)
+                result.append((columns, columns))
+        return result
+
+
+def unique(columns):
+    return list(dict.fromkeys(columns))
+
+
+class TableStats:
+    """Число строк и различных значений столбцов, с кэшем."""
+
+    def __init__(self):
+        self.row_counts = {}
+        self.distinct_counts = {}
+
+    def rows(self, table):
+        if table not in self.row_counts:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}'
+                )
+                self.row_counts[table] = cursor.fetchone()[0]
+        return self.row_counts[table]
+
+    def distinct(self, table, columns):
+        key = (table, tuple(sorted(columns)))
+        if key not in self.distinct_counts:
+            quote = connection.ops.quote_name
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT COUNT(*) FROM (SELECT DISTINCT {} FROM {}) AS d'
+                    .format(', '.join(map(quote, key[1])), quote(table))
+                )
+                self.distinct_counts[key] = max(cursor.fetchone()[0], 1)
+        return self.distinct_counts[key]
+
+    def matched(self, table, columns):
+        """Оценка числа строк, найденных по равенству на columns."""
+        rows = self.rows(table)
+        return rows / self.distinct(table, columns) if columns else rows
+
+
+def existing_indexes(table):
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    return [
+        constraint['columns'] for constraint in constraints.values()
+        if constraint['columns'] and (
+            constraint['index'] or constraint['unique']
+            or constraint['primary_key']
+        )
+    ]
+
+
+def is_covered(eq, columns, indexes):
+    """
+    Индекс покрывает кандидата, если начинается с тех же столбцов:
+    равенства в любом порядке, дальше - в том же порядке.
+    """
+    size = len(eq)
+    for index in indexes:
+        if (
+            len(index) >= len(columns)
+            and set(index[:size]) == set(columns[:size])
+            and index[size:len(columns)] == columns[size:]
+        ):
+            return True
+    return False
+
+
+def parse_plan(plan):
+    """Строки EXPLAIN QUERY PLAN SQLite по таблицам (или псевдонимам)."""
+    steps = {}
+    for line in plan or ():
+        match = PLAN_RE.match(line)
+        if match:
+            operation, name, index, condition, primary_key = match.groups()
+            steps[name] = {
+                'scan': operation == 'SCAN',
+                'index': index or primary_key,
+                'columns': PLAN_COLUMN_RE.findall(condition or ''),
+                'primary_key': bool(primary_key),
+            }
+    return steps, any('TEMP B-TREE' in line for line in plan or ())
+
+
+class Proposal:
+    def __init__(self, table, eq, columns):
+        self.table = table
+        self.eq = eq
+        self.columns = columns
+        self.gain = 0.0
+        self.rows_before = 0.0
+        self.rows_after = 0.0
+        self.queries = []
+
+    def covers(self, other):
+        return (
+            self.table == other.table
+            and self.columns[:len(other.columns)] == other.columns
+        )
+
+    def merge(self, other):
+        self.gain += other.gain
+        self.rows_before += other.rows_before
+        self.rows_after += other.rows_after
+        self.queries += [
+            query for query in other.queries if query not in self.queries
+        ]
+
+
+class IndexAdvisor:
+    """
+    Разбирает нагрузку, оценивает по статистике таблиц и текущим планам,
+    сколько строк читает каждый шаблон запроса сейчас и сколько читал бы
+    с предложенным индексом, и ранжирует индексы по выигрышу.
+    """
+
+    def __init__(self, workload):
+        self.workload = workload
+        self.stats = TableStats()
+        self.indexes = {}
+        self.notes = []
+
+    def table_indexes(self, table):
+        if table not in self.indexes:
+            self.indexes[table] = existing_indexes(table)
+        return self.indexes[table]
+
+    def rows_before(self, shape, table, steps, temp_sort):
+        step = steps.get(table) or next(
+            (steps[alias] for alias, name in shape.aliases.items()
+             if name == table and alias in steps), None
+        )
+        rows = self.stats.rows(table)
+        if step is None:
+            return rows
+        if step['primary_key']:
+            return 1
+        if step['scan'] and step['index'] and shape.limit and not temp_sort:
+            # Обход индекса в порядке сортировки до limit подходящих строк:
+            # чем реже подходит строка, тем больше строк прочитано.
+            filtered = self.stats.matched(table, shape.columns[table]['eq'])
+            return min(rows, shape.limit * rows / max(filtered, 1))
+        return self.stats.matched(table, step['columns'])
+
+    def rows_after(self, shape, table, eq, columns):
+        matched = self.stats.matched(table, eq)
+        tail = columns[len(eq):]
+        if tail and tail[0] in shape.columns[table]['range']:
+            matched *= RANGE_SELECTIVITY
+        order = shape.order_columns(table)
+        if shape.limit and order and tail[:len(order)] == order:
+            return min(matched, shape.limit)
+        return matched
+
+    def analyze_query(self, query):
+        shape = QueryShape(query.sql)
+        steps, temp_sort = parse_plan(
+            explain(connection, query.sql, query.params)
+        )
+        proposals = []
+        for table in shape.tables:
+            for column in shape.columns[table]['like']:
+                self.notes.append(
+                    f'{table}.{column}: LIKE (iexact/icontains) не '
+                    f'использует обычный индекс'
+                )
+            for eq, columns in shape.candidates(table):
+                if is_covered(eq, columns, self.table_indexes(table)):
+                    continue
+                before = self.rows_before(shape, table, steps, temp_sort)
+                after = self.rows_after(shape, table, eq, columns)
+                if before <= after:
+                    continue
+                proposal = Proposal(table, eq, columns)
+                proposal.gain = (before - after) * query.count
+                proposal.rows_before = before * query.count
+                proposal.rows_after = after * query.count
+                proposal.queries.append(query)
+                proposals.append(proposal)
+        return proposals
+
+    def propose(self, min_gain=0):
+        proposals = []
+        for query in self.workload:
+            proposals.extend(self.analyze_query(query))
+        self.notes = unique(self.notes)
+        return merge_proposals(proposals, min_gain)
+
+
+def merge_proposals(proposals, min_gain):
+    """Кандидат, являющийся префиксом более длинного, сливается с ним."""
+    merged = []
+    for proposal in sorted(
+        proposals, key=lambda item: len(item.columns), reverse=True
+    ):
+        target = next(
+            (item for item in merged if item.covers(proposal)), None
+        )
+        if target is None:
+            merged.append(proposal)
+        else:
+            target.merge(proposal)
+    return sorted(
+        (item for item in merged if item.gain > min_gain),
+        key=lambda item: item.gain, reverse=True
+    )
+
+
+def model_for_table(table):
+    for model in apps.get_models(include_auto_created=True):
+        if model._meta.db_table == table:
+            return model
+    return None
+
+
+def build_index(proposal):
+    model = model_for_table(proposal.table)
+    names = {field.column: field.name for field in model._meta.fields}
+    index = models.Index(
+        fields=[names.get(column, column) for column in proposal.columns]
+    )
+    index.set_name_with_model(model)
+    return model, index
+
+
+def time_query(query, repeat):
+    durations = []
+    with connection.cursor() as cursor:
+        for _ in range(repeat):
+            started = perf_counter()
+            cursor.execute(query.sql, query.params)
+            cursor.fetchall()
+            durations.append(perf_counter() - started)
+    return statistics.median(durations)
+
+
+def workload_cost(queries, repeat):
+    """Время нагрузки с учётом частоты шаблонов, в секундах."""
+    return sum(time_query(query, repeat) * query.count for query in queries)
+
+
+def benchmark(proposal, repeat):
+    """
+    Время затронутых запросов до и после создания индекса. Индекс
+    создаётся в транзакции и откатывается, база не меняется.
+    """
+    _, index = build_index(proposal)
+    quote = connection.ops.quote_name
+    before = workload_cost(proposal.queries, repeat)
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE INDEX {} ON {} ({})'.format(
+                quote(index.name), quote(proposal.table),
+                ', '.join(map(quote, proposal.columns))
+            ))
+        after = workload_cost(proposal.queries, repeat)
+        plans = [
+            explain(connection, query.sql, query.params)
+            for query in proposal.queries
+        ]
+        transaction.set_rollback(True)
+    return before, after, plans
+
+
+def build_migration(proposals, name='advised_indexes'):
+    """
+    Миграции с предложенными индексами, по одной на приложение.
+    Для промежуточных таблиц ManyToMany - RunSQL, у них нет Meta.
+    """
+    loader = MigrationLoader(None, ignore_no_migrations=True)
+    operations = {}
+    for proposal in proposals:
+        model, index = build_index(proposal)
+        app_label = model._meta.app_label
+        if model._meta.auto_created:
+            quote = connection.ops.quote_name
+            operation = RunSQL(
+                'CREATE INDEX {} ON {} ({});'.format(
+                    quote(index.name), quote(proposal.table),
+                    ', '.join(map(quote, proposal.columns))
+                ),
+                reverse_sql=f'DROP INDEX {quote(index.name)};'
+            )
+        else:
+            operation = AddIndex(
+                model_name=model._meta.model_name, index=index
+            )
+        operations.setdefault(app_label, []).append(operation)
+    writers = []
+    for app_label, app_operations in operations.items():
+        leaves = loader.graph.leaf_nodes(app_label)
+        number = max(
+            (int(leaf[1].split('_')[0]) for leaf in leaves), default=0
+        ) + 1
+        migration = Migration(f'{number:04d}_{name}', app_label)
+        migration.dependencies = leaves
+        migration.operations = app_operations
+        writers.append(MigrationWriter(migration))
+    return writers
+
+
+def estimated_speedup(proposal):
+    if not proposal.rows_after:
+        return math.inf
+    return proposal.rows_before / proposal.rows_after
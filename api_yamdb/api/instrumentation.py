@@ -0,0 +1,255 @@
+import asyncio
+import json
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.conf import settings
+from users.authentication import RoleClaimsJWTAuthentication
+
+from . import metrics
+
+logger = logging.getLogger('api.performance')
+
+_current_timings = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """
+    Замеры одного запроса: длительность фаз, число SQL-запросов
+    и строк, прочитанных или изменённых ими. Строки считаются только
+    для Server-Timing (track_rows): для этого подменяются методы
+    fetch курсора.
+    """
+
+    def __init__(self, track_rows=True):
+        self.track_rows = track_rows
+        self.started = perf_counter()
+        self.phases = {}
+        self.active = set()
+        self.queries = 0
+        self.rows = 0
+        self.sql_time = 0.0
+        self.query_durations = []
+
+    def add(self, name, duration):
+        self.phases[name] = self.phases.get(name, 0.0) + duration
+
+    def count_rows(self, fetch, single=False):
+        def counted(*args):
+            result = fetch(*args)
+            if single:
+                self.rows += result is not None
+            else:
+                self.rows += len(result)
+            return result
+        return counted
+
+    def __call__(self, execute, sql, params, many, context):
+        """
+        Обёртка connection.execute_wrapper: время и число запросов,
+        затронутые строки для изменений и прочитанные строки для SELECT.
+        """
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = perf_counter() - started
+            self.sql_time += duration
+            self.query_durations.append(duration)
+            self.queries += 1
+            if self.track_rows:
+                self.count_query_rows(context['cursor'])
+
+    def count_query_rows(self, cursor):
+        raw_cursor = cursor.cursor
+        if raw_cursor.description is None:
+            self.rows += max(raw_cursor.rowcount, 0)
+        else:
+            cursor.fetchone = self.count_rows(
+                raw_cursor.fetchone, single=True
+            )
+            cursor.fetchmany = self.count_rows(raw_cursor.fetchmany)
+            cursor.fetchall = self.count_rows(raw_cursor.fetchall)
+
+    def total(self):
+        return perf_counter() - self.started
+
+    def server_timing(self, total):
+        entries = [
+            f'sql;dur={self.sql_time * 1000:.2f};'
+            f'desc="queries={self.queries} rows={self.rows}"'
+        ]
+        entries += [
+            f'{name};dur={duration * 1000:.2f}'
+            for name, duration in self.phases.items()
+        ]
+        entries.append(f'total;dur={total * 1000:.2f}')
+        return ', '.join(entries)
+
+    def as_log_record(self, request, response, total):
+        return {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            'sql_ms': round(self.sql_time * 1000, 2),
+            'queries': self.queries,
+            'rows': self.rows,
+            **{
+                f'{name}_ms': round(duration * 1000, 2)
+                for name, duration in self.phases.items()
+            },
+        }
+
+
+@contextmanager
+def phase(name):
+    """
+    Засекает фазу запроса. Без включённых замеров ничего не делает,
+    вложенные замеры одной и той же фазы не суммируются дважды.
+    """
+    timings = _current_timings.get()
+    if timings is None or name in timings.active:
+        yield
+        return
+    timings.active.add(name)
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, perf_counter() - started)
+        timings.active.discard(name)
+
+
+def timed_execute(execute, sql, params, many, context):
+    """
+    Постоянная обёртка execute_wrapper каждого соединения: считает
+    запрос в замеры текущего запроса, если они включены. Замеры берутся
+    из контекста, поэтому работают и в потоках, куда ASGI уводит ORM.
+    """
+    timings = _current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    return timings(execute, sql, params, many, context)
+
+
+def install_query_hooks(sender, connection, **kwargs):
+    """
+    Приёмник connection_created: ставит обёртки замеров, журнала
+    медленных запросов и бюджета запросов на новое соединение (в любом
+    потоке).
+    """
+    from .query_budget import counted_execute
+    from .slow_queries import recorded_execute
+
+    for hook in (timed_execute, recorded_execute, counted_execute):
+        if hook not in connection.execute_wrappers:
+            connection.execute_wrappers.append(hook)
+
+
+class HybridMiddleware:
+    """
+    Основа промежуточных слоёв, работающих и под WSGI, и под ASGI без
+    перехода в поток: start() перед view, stop() сразу после,
+    finish() для готового ответа.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Так же, как MiddlewareMixin: Django увидит корутину.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            self.stop(state)
+        return self.finish(request, response, state)
+
+    async def __acall__(self, request):
+        state = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.stop(state)
+        return self.finish(request, response, state)
+
+    def start(self, request):
+        return None
+
+    def stop(self, state):
+        pass
+
+    def finish(self, request, response, state):
+        return response
+
+
+class ServerTimingMiddleware(HybridMiddleware):
+    """
+    Замеры фаз запроса в заголовке Server-Timing и в строке лога
+    api.performance (настройка PERF_INSTRUMENTATION) и в метриках
+    /metrics (настройка METRICS_ENABLED).
+    """
+
+    def start(self, request):
+        server_timing = getattr(settings, 'PERF_INSTRUMENTATION', False)
+        collect_metrics = getattr(settings, 'METRICS_ENABLED', False)
+        if not (server_timing or collect_metrics):
+            return None
+        timings = RequestTimings(track_rows=server_timing)
+        return timings, _current_timings.set(timings)
+
+    def stop(self, state):
+        if state is not None:
+            _current_timings.reset(state[1])
+
+    def finish(self, request, response, state):
+        if state is None:
+            return response
+        timings = state[0]
+        total = timings.total()
+        if getattr(settings, 'METRICS_ENABLED', False):
+            metrics.observe_request(request, response, timings, total)
+        if getattr(settings, 'PERF_INSTRUMENTATION', False):
+            response['Server-Timing'] = timings.server_timing(total)
+            logger.info(
+                json.dumps(timings.as_log_record(request, response, total))
+            )
+        return response
+
+    def process_template_response(self, request, response):
+        # Ответы DRF рендерятся после выхода из view: засекаем рендеринг
+        # от этой точки до колбэка после render().
+        timings = _current_timings.get()
+        if timings is not None:
+            started = perf_counter()
+
+            def rendered(response):
+                timings.add('render', perf_counter() - started)
+
+            response.add_post_render_callback(rendered)
+        return response
+
+
+class TimedJWTAuthentication(RoleClaimsJWTAuthentication):
+    """JWT-аутентификация с замером фазы auth."""
+
+    def authenticate(self, request):
+        with phase('auth'):
+            return super().authenticate(request)
+
+
+class TimedRepresentationMixin:
+    """Замер фазы serialize для сериализаторов ответа."""
+
+    def to_representation(self, instance):
+        with phase('serialize'):
+            return super().to_representation(instance)
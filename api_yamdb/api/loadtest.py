@@ -0,0 +1,69 @@
+import io
+import sys
+
+
+def call_wsgi(handler, path, query='', method='GET', body=b'', environ=None):
+    """
+    Запрос к WSGI-приложению, как от многопоточного WSGI-сервера.
+    environ дополняет окружение, например HTTP_AUTHORIZATION.
+    """
+    status = []
+    request_environ = {
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1',
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+        **(environ or {}),
+    }
+    response = handler(
+        request_environ, lambda line, headers: status.append(line)
+    )
+    try:
+        b''.join(response)
+    finally:
+        response.close()
+    return int(status[0].split()[0])
+
+
+async def call_asgi(application, path, query=''):
+    """GET-запрос к ASGI-приложению, как от ASGI-сервера."""
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await application({
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'query_string': query.encode(),
+        'headers': [(b'host', b'localhost')],
+        'client': ('127.0.0.1', 0),
+        'server': ('localhost', 80),
+    }, receive, send)
+    return messages[0]['status']
+
+
+def percentile(values, share):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * share), len(ordered) - 1)]
@@ -0,0 +1,145 @@
+from pathlib import Path
+
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+
+from api.index_advisor import (IndexAdvisor, benchmark, build_index,
+                               build_migration, estimated_speedup,
+                               load_workload)
+from api.slow_queries import log_path, read_entries
+
+
+def replay(paths, repeat):
+    """
+    Выполняет GET-запросы к API и собирает выполненный ими SQL
+    с параметрами, как это делает журнал медленных запросов.
+    """
+    entries = []
+
+    def capture(execute, sql, params, many, context):
+        if not many:
+            entries.append({'sql': sql, 'params': list(params or ())})
+        return execute(sql, params, many, context)
+
+    client = Client()
+    with connection.execute_wrapper(capture):
+        for _ in range(repeat):
+            for path in paths:
+                client.get(path)
+    return entries
+
+
+class Command(BaseCommand):
+    """
+    Советник по индексам по реальной нагрузке:
+    python manage.py advise_indexes                  # журнал SLOW_QUERY_LOG
+    python manage.py advise_indexes --replay /api/v1/titles/?year=2000
+    python manage.py advise_indexes --benchmark --emit-migration
+    Для полного журнала нагрузки запустите сервер с SLOW_QUERY_THRESHOLD = 0.
+    """
+    help = 'Предлагает составные индексы по нагрузке из журнала запросов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--log',
+            type=Path,
+            help='Журнал запросов; по умолчанию settings.SLOW_QUERY_LOG.'
+        )
+        parser.add_argument(
+            '--replay',
+            nargs='+',
+            metavar='PATH',
+            help='Вместо журнала выполнить эти GET-запросы к API.'
+        )
+        parser.add_argument('--replay-count', type=int, default=1)
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument(
+            '--min-gain',
+            type=float,
+            default=0,
+            help='Минимальный выигрыш в оценённых прочитанных строках.'
+        )
+        parser.add_argument(
+            '--benchmark',
+            action='store_true',
+            help='Замерить запросы до и после индекса (индекс откатывается).'
+        )
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument(
+            '--emit-migration',
+            action='store_true',
+            help='Записать предложенные индексы в миграцию.'
+        )
+        parser.add_argument(
+            '--output',
+            type=Path,
+            help='Каталог для миграции вместо каталога миграций приложения.'
+        )
+
+    def workload(self, options):
+        if options['replay']:
+            return load_workload(
+                replay(options['replay'], options['replay_count'])
+            )
+        path = options['log'] or log_path()
+        if path is None or not Path(path).exists():
+            raise CommandError(f'Журнал запросов не найден: {path}')
+        return load_workload(read_entries(path))
+
+    def handle(self, *args, **options):
+        workload = self.workload(options)
+        if not workload:
+            raise CommandError('В нагрузке нет запросов на чтение')
+        advisor = IndexAdvisor(workload)
+        proposals = advisor.propose(options['min_gain'])[:options['limit']]
+        for note in advisor.notes:
+            self.stdout.write(self.style.NOTICE(f'Замечание: {note}'))
+        if not proposals:
+            self.stdout.write(self.style.SUCCESS(
+                f'Новых индексов не требуется ({len(workload)} шаблонов)'
+            ))
+            return
+        for proposal in proposals:
+            self.write_proposal(proposal)
+            if options['benchmark']:
+                self.write_benchmark(proposal, options['repeat'])
+        if options['emit_migration']:
+            self.write_migrations(proposals, options['output'])
+
+    def write_proposal(self, proposal):
+        model, index = build_index(proposal)
+        self.stdout.write(self.style.WARNING(
+            f'{proposal.table} ({", ".join(proposal.columns)}): '
+            f'строк читается {proposal.rows_before:.0f} -> '
+            f'{proposal.rows_after:.0f}, '
+            f'оценка ускорения x{estimated_speedup(proposal):.1f}'
+        ))
+        if not model._meta.auto_created:
+            self.stdout.write(
+                f'  {model.__name__}.Meta.indexes: models.Index('
+                f'fields={index.fields!r}, name={index.name!r})'
+            )
+        for query in proposal.queries[:3]:
+            self.stdout.write(f'  x{query.count} {query.normalized[:150]}')
+
+    def write_benchmark(self, proposal, repeat):
+        before, after, plans = benchmark(proposal, repeat)
+        self.stdout.write(
+            f'  замер: {before * 1000:.2f} мс -> {after * 1000:.2f} мс'
+        )
+        for line in (plans[0] or ())[:5]:
+            self.stdout.write(f'    {line}')
+
+    def write_migrations(self, proposals, output):
+        for writer in build_migration(proposals):
+            path = (
+                Path(output) / Path(writer.path).name if output
+                else Path(writer.path)
+            )
+            path.write_text(writer.as_string())
+            self.stdout.write(self.style.SUCCESS(f'Миграция: {path}'))
+        self.stdout.write(
+            'Добавьте индексы моделей в Meta.indexes, иначе makemigrations '
+            'предложит их удалить.'
+        )
@@ -0,0 +1,145 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import BaseCommand, CommandError
+from django.test import override_settings
+from reviews.models import Comment
+
+from api.loadtest import call_asgi, call_wsgi, percentile
+from api_yamdb.asgi import YamdbASGIHandler
+
+MODES = ('wsgi', 'asgi', 'asgi-sync')
+
+
+class Command(BaseCommand):
+    """
+    Сколько одновременных читателей выдерживает один процесс:
+    python manage.py asgi_benchmark --readers 1 8 32 128
+    Каждый читатель по кругу запрашивает список и карточку произведения,
+    отзывы и комментарии через обработчик, как его вызывает сервер:
+    wsgi - многопоточный WSGI-сервер с --threads потоками,
+    asgi - api_yamdb.asgi (async view, чтение в пуле из --threads потоков),
+    asgi-sync - ASGI с синхронными view Django, для сравнения.
+    Нужна заполненная база (generate_data); ограничение частоты
+    и лог api.performance на время замера отключаются.
+    """
+    help = 'Бенчмарк одновременных чтений: WSGI против ASGI.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--readers', type=int, nargs='+', default=[1, 8, 32, 128]
+        )
+        parser.add_argument('--modes', nargs='+', choices=MODES,
+                            default=list(MODES))
+        parser.add_argument('--duration', type=float, default=5.0)
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument(
+            '--target-ms',
+            type=float,
+            default=200.0,
+            help='Допустимая p95 задержка ответа.'
+        )
+
+    def read_paths(self):
+        comment = Comment.objects.select_related('review').first()
+        if comment is None:
+            raise CommandError(
+                'В базе нет комментариев: заполните её командой '
+                'generate_data.'
+            )
+        title_id, review_id = comment.review.title_id, comment.review_id
+        return [
+            ('/api/v1/titles/', ''),
+            ('/api/v1/titles/', 'year=2000'),
+            (f'/api/v1/titles/{title_id}/', ''),
+            (f'/api/v1/titles/{title_id}/reviews/', ''),
+            (f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/', ''),
+        ]
+
+    def make_call(self, mode, pool):
+        if mode == 'wsgi':
+            handler = WSGIHandler()
+            loop = asyncio.get_running_loop()
+
+            async def call(path, query):
+                return await loop.run_in_executor(
+                    pool, call_wsgi, handler, path, query
+                )
+            return call
+        application = YamdbASGIHandler() if mode == 'asgi' else ASGIHandler()
+
+        async def call(path, query):
+            return await call_asgi(application, path, query)
+        return call
+
+    async def run(self, mode, readers, duration, threads, paths):
+        pool = ThreadPoolExecutor(threads)
+        # async view читают в пуле по умолчанию (thread_sensitive=False).
+        asyncio.get_running_loop().set_default_executor(pool)
+        call = self.make_call(mode, pool)
+        latencies = []
+        errors = 0
+        deadline = time.perf_counter() + duration
+
+        async def reader(offset):
+            nonlocal errors
+            position = offset
+            while time.perf_counter() < deadline:
+                path, query = paths[position % len(paths)]
+                position += 1
+                started = time.perf_counter()
+                status = await call(path, query)
+                latencies.append(time.perf_counter() - started)
+                errors += status != 200
+
+        started = time.perf_counter()
+        await asyncio.gather(*(reader(index) for index in range(readers)))
+        elapsed = time.perf_counter() - started
+        pool.shutdown()
+        return latencies, errors, elapsed
+
+    def report(self, mode, readers, latencies, errors, elapsed):
+        p50, p95, p99 = (
+            percentile(latencies, share) * 1000 for share in (0.5, 0.95, 0.99)
+        )
+        self.stdout.write(
+            f'{mode:>9} {readers:>7} {len(latencies) / elapsed:>8.1f} '
+            f'{p50:>8.1f} {p95:>8.1f} {p99:>8.1f} '
+            f'{statistics.mean(latencies) * 1000:>8.1f} {errors:>6}'
+        )
+        return p95
+
+    def handle(self, *args, **options):
+        paths = self.read_paths()
+        capacity = {}
+        self.stdout.write(
+            f'{"режим":>9} {"читатели":>7} {"rps":>8} {"p50 мс":>8} '
+            f'{"p95 мс":>8} {"p99 мс":>8} {"ср. мс":>8} {"ошибки":>6}'
+        )
+        with override_settings(
+            PERF_INSTRUMENTATION=False,
+            REST_FRAMEWORK={
+                **settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}
+            },
+        ):
+            for mode in options['modes']:
+                for readers in sorted(options['readers']):
+                    latencies, errors, elapsed = asyncio.run(self.run(
+                        mode, readers, options['duration'],
+                        options['threads'], paths
+                    ))
+                    p95 = self.report(
+                        mode, readers, latencies, errors, elapsed
+                    )
+                    if not errors and p95 <= options['target_ms']:
+                        capacity[mode] = readers
+        for mode in options['modes']:
+            self.stdout.write(
+                f'{mode}: p95 <= {options["target_ms"]:.0f} мс '
+                f'до {capacity.get(mode, 0)} одновременных читателей'
+            )
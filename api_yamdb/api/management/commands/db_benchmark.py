@@ -0,0 +1,171 @@
+import json
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import override_settings
+from reviews.models import Title
+from users.models import User
+from users.tokens import RoleRefreshToken
+
+from api.loadtest import call_wsgi, percentile
+from api_yamdb.databases import PROFILES, sqlite_database
+
+WRITER_PREFIX = 'bench_writer_'
+
+
+class Command(BaseCommand):
+    """
+    Смешанная нагрузка на один процесс в разных профилях базы:
+    python manage.py db_benchmark --readers 8 --writers 4
+    Читатели запрашивают список и карточки произведений, писатели
+    публикуют отзывы от своих пользователей, каждый в своём потоке,
+    как в многопоточном WSGI-сервере. Выводятся пропускная способность,
+    p95, число ответов 5xx (database is locked) и открытых соединений.
+    Профили сравниваются на текущей базе SQLite; созданные пользователи
+    и отзывы удаляются.
+    """
+    help = 'Бенчмарк читателей и писателей в профилях базы данных.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profiles', nargs='+', choices=PROFILES, default=list(PROFILES)
+        )
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=5.0)
+
+    def use_profile(self, profile):
+        """Переключает соединения default на профиль profile."""
+        current = connections.settings['default']
+        connections['default'].close()
+        del connections['default']
+        connections.settings['default'] = {
+            **sqlite_database(current['NAME'], profile),
+            'NAME': current['NAME'],
+        }
+        if profile == 'development':
+            # Режим WAL сохраняется в файле базы: возвращаем журнал отката.
+            with connections['default'].cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode=DELETE')
+            connections['default'].close()
+
+    def writers(self, count):
+        users = []
+        for index in range(count):
+            user, _ = User.objects.get_or_create(
+                username=f'{WRITER_PREFIX}{index}',
+                defaults={'email': f'{WRITER_PREFIX}{index}@yamdb.fake'},
+            )
+            token = RoleRefreshToken.for_user(user).access_token
+            users.append({'HTTP_AUTHORIZATION': f'Bearer {token}'})
+        return users
+
+    def run(self, readers, writers, title_ids, duration):
+        handler = WSGIHandler()
+        results = {'read': [], 'write': []}
+        statuses = Counter()
+        lock = threading.Lock()
+        deadline = time.perf_counter() + duration
+
+        def client(kind, offset, environ=None):
+            position = offset
+            while time.perf_counter() < deadline:
+                title_id = title_ids[position % len(title_ids)]
+                position += 1
+                started = time.perf_counter()
+                if kind == 'read':
+                    path = ('/api/v1/titles/' if position % 2
+                            else f'/api/v1/titles/{title_id}/')
+                    status = call_wsgi(handler, path)
+                else:
+                    status = call_wsgi(
+                        handler, f'/api/v1/titles/{title_id}/reviews/',
+                        method='POST', environ=environ,
+                        body=json.dumps({'text': 'Отзыв', 'score': 5})
+                        .encode(),
+                    )
+                with lock:
+                    results[kind].append(time.perf_counter() - started)
+                    statuses[status] += 1
+            connections.close_all()
+
+        threads = [
+            threading.Thread(target=client, args=('read', index))
+            for index in range(readers)
+        ] + [
+            threading.Thread(target=client, args=('write', 0, environ))
+            for environ in writers
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, statuses, time.perf_counter() - started
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('Профили сравниваются только для SQLite.')
+        title_ids = list(Title.objects.values_list('id', flat=True)[:10_000])
+        if not title_ids:
+            raise CommandError(
+                'В базе нет произведений: заполните её командой '
+                'generate_data.'
+            )
+        opened = Counter()
+
+        def count_connection(sender, connection, **kwargs):
+            opened[connection.alias] += 1
+
+        connection_created.connect(count_connection)
+        self.stdout.write(
+            f'{"профиль":>12} {"чтений/с":>9} {"p95 мс":>8} '
+            f'{"записей/с":>10} {"p95 мс":>8} {"5xx":>5} {"соединений":>10}'
+        )
+        original = connections.settings['default']
+        logging.disable(logging.CRITICAL)
+        try:
+            with override_settings(
+                PERF_INSTRUMENTATION=False,
+                SLOW_QUERY_THRESHOLD=None,
+                REST_FRAMEWORK={
+                    **settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}
+                },
+            ):
+                for profile in options['profiles']:
+                    self.use_profile(profile)
+                    writers = self.writers(options['writers'])
+                    opened.clear()
+                    results, statuses, elapsed = self.run(
+                        options['readers'], writers, title_ids,
+                        options['duration']
+                    )
+                    self.report(profile, results, statuses, elapsed, opened)
+                    User.objects.filter(
+                        username__startswith=WRITER_PREFIX
+                    ).delete()
+        finally:
+            logging.disable(logging.NOTSET)
+            connection_created.disconnect(count_connection)
+            connections['default'].close()
+            del connections['default']
+            connections.settings['default'] = original
+
+    def report(self, profile, results, statuses, elapsed, opened):
+        errors = sum(
+            count for status, count in statuses.items() if status >= 500
+        )
+        self.stdout.write(
+            f'{profile:>12} {len(results["read"]) / elapsed:>9.1f} '
+            f'{percentile(results["read"], 0.95) * 1000:>8.1f} '
+            f'{len(results["write"]) / elapsed:>10.1f} '
+            f'{percentile(results["write"], 0.95) * 1000:>8.1f} '
+            f'{errors:>5} {opened["default"]:>10}'
+        )
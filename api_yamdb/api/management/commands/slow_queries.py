@@ -0,0 +1,95 @@
+from pathlib import Path
+
+from django.core.management import BaseCommand, CommandError
+
+from api.slow_queries import log_path, read_entries
+
+SORT_KEYS = {
+    'total': lambda group: group['total_ms'],
+    'max': lambda group: group['slowest']['duration_ms'],
+    'mean': lambda group: group['total_ms'] / group['count'],
+    'count': lambda group: group['count'],
+}
+
+
+def group_entries(entries):
+    """
+    Группирует записи журнала по нормализованному SQL: число, суммарное
+    время, view и самый медленный экземпляр с параметрами и планом.
+    """
+    groups = {}
+    for entry in entries:
+        group = groups.setdefault(entry['normalized'], {
+            'normalized': entry['normalized'],
+            'count': 0,
+            'total_ms': 0.0,
+            'views': set(),
+            'slowest': entry,
+        })
+        group['count'] += 1
+        group['total_ms'] += entry['duration_ms']
+        group['views'].add(f'{entry["view"]}.{entry["action"]}')
+        if entry['duration_ms'] > group['slowest']['duration_ms']:
+            group['slowest'] = entry
+    return list(groups.values())
+
+
+class Command(BaseCommand):
+    """
+    Самые тяжёлые запросы из журнала медленных запросов:
+    python manage.py slow_queries [--limit 10] [--sort total|max|mean|count]
+    """
+    help = 'Показывает медленные запросы, сгруппированные по шаблону SQL.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument(
+            '--sort',
+            choices=sorted(SORT_KEYS),
+            default='total',
+            help='Порядок групп: по суммарному, максимальному, среднему '
+                 'времени или по числу запросов.'
+        )
+        parser.add_argument(
+            '--log',
+            type=Path,
+            help='Файл журнала; по умолчанию settings.SLOW_QUERY_LOG.'
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Очистить журнал после вывода.'
+        )
+
+    def handle(self, *args, **options):
+        path = options['log'] or log_path()
+        if path is None or not Path(path).exists():
+            raise CommandError(f'Журнал медленных запросов не найден: {path}')
+        groups = sorted(
+            group_entries(read_entries(path)),
+            key=SORT_KEYS[options['sort']],
+            reverse=True
+        )
+        if not groups:
+            self.stdout.write(self.style.SUCCESS('Медленных запросов нет'))
+        for group in groups[:options['limit']]:
+            self.write_group(group)
+        if options['clear']:
+            Path(path).write_text('')
+
+    def write_group(self, group):
+        slowest = group['slowest']
+        self.stdout.write(self.style.WARNING(
+            f'{group["count"]} запр., всего {group["total_ms"]:.1f} мс, '
+            f'в среднем {group["total_ms"] / group["count"]:.1f} мс, '
+            f'максимум {slowest["duration_ms"]:.1f} мс'
+        ))
+        self.stdout.write(f'  view: {", ".join(sorted(group["views"]))}')
+        self.stdout.write(f'  sql: {group["normalized"]}')
+        self.stdout.write(
+            f'  самый медленный: {slowest["method"]} {slowest["path"]}, '
+            f'параметры {slowest["params"] or "скрыты"}'
+        )
+        for line in slowest['plan'] or ():
+            self.stdout.write(f'    {line}')
+        self.stdout.write('')
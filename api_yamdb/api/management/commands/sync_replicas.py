@@ -0,0 +1,46 @@
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.db import connections
+
+from api.replicas import sync_replica
+
+
+class Command(BaseCommand):
+    """
+    Замена репликации для локальных реплик SQLite:
+    python manage.py sync_replicas                  # скопировать один раз
+    python manage.py sync_replicas --loop --interval 2
+    С --loop реплики отстают от основной базы не больше чем на
+    --interval секунд, как при асинхронной репликации.
+    """
+    help = 'Копирует основную базу SQLite в реплики DATABASE_REPLICAS.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не выходить, а копировать каждые --interval секунд.'
+        )
+        parser.add_argument('--interval', type=float, default=2.0)
+
+    def handle(self, *args, **options):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas:
+            raise CommandError(
+                'Реплики не заданы: перечислите файлы в переменной '
+                'окружения DATABASE_REPLICAS.'
+            )
+        while True:
+            for alias in replicas:
+                try:
+                    sync_replica(alias)
+                except ValueError as error:
+                    raise CommandError(error)
+                # Не держим файл реплики открытым между копиями.
+                connections[alias].close()
+            self.stdout.write(f'Реплики обновлены: {", ".join(replicas)}')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
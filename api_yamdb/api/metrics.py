@@ -0,0 +1,365 @@
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: без fork, один процесс на каталог
+    fcntl = None
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+QUERY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = registry.lock
+        registry.register(self)
+
+    def label_key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def describe(self):
+        return {
+            'kind': self.kind,
+            'documentation': self.documentation,
+            'labelnames': self.labelnames,
+        }
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self.label_key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Histogram(Metric):
+    """
+    Значение по меткам - список: счётчики по корзинам, сумма и количество.
+    """
+    kind = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(),
+                 buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        super().__init__(registry, name, documentation, labelnames)
+
+    def observe(self, value, **labels):
+        key = self.label_key(labels)
+        position = bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = [0] * (len(self.buckets) + 2)
+            if position < len(self.buckets):
+                state[position] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def describe(self):
+        return {**super().describe(), 'buckets': self.buckets}
+
+
+ARCHIVE_NAME = 'archive.json'
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def snapshot_pid(path):
+    """pid процесса из имени файла снимка или None для чужих файлов."""
+    pid, _, rest = path.name.partition('-')
+    return int(pid) if pid.isdigit() and rest else None
+
+
+def merge_snapshots(snapshots):
+    """Складывает снимки по метрикам и меткам."""
+    merged = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.setdefault(name, {**metric, 'values': {}})
+            for key, value in metric['values']:
+                key = tuple(key)
+                if metric['kind'] == 'counter':
+                    target['values'][key] = (
+                        target['values'].get(key, 0) + value
+                    )
+                else:
+                    current = target['values'].get(key, [0] * len(value))
+                    target['values'][key] = [
+                        left + right for left, right in zip(current, value)
+                    ]
+    for metric in merged.values():
+        metric['values'] = [
+            [list(key), value] for key, value in metric['values'].items()
+        ]
+    return merged
+
+
+def read_snapshot(path):
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def write_snapshot(path, snapshot):
+    temporary = path.with_name(f'.{path.name}.tmp')
+    temporary.write_text(json.dumps(snapshot))
+    os.replace(temporary, path)
+
+
+@contextmanager
+def directory_lock(directory):
+    """Исключительная блокировка каталога снимков между процессами."""
+    if fcntl is None:
+        yield
+        return
+    with open(directory / '.lock', 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class Registry:
+    """
+    Реестр метрик процесса. При заданном METRICS_DIR каждый процесс
+    периодически сохраняет снимок в свой файл, а /metrics суммирует
+    снимки всех процессов, так что работают и несколько воркеров WSGI.
+    Имя файла содержит pid; после fork (gunicorn --preload) дочерний
+    процесс начинает с пустых значений и своего файла (reset).
+    Снимки завершившихся процессов /metrics переносит в archive.json,
+    чтобы счётчики не уменьшались, а каталог не рос.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self.reset()
+
+    def reset(self):
+        self.lock = threading.Lock()
+        for metric in self.metrics.values():
+            metric.lock = self.lock
+            metric.values = {}
+        self.last_flush = 0.0
+        self.file_name = f'{os.getpid()}-{time.time_ns()}.json'
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                name: {
+                    **metric.describe(),
+                    'values': [
+                        [list(key), value if metric.kind == 'counter'
+                         else list(value)]
+                        for key, value in metric.values.items()
+                    ],
+                }
+                for name, metric in self.metrics.items()
+            }
+
+    def directory(self):
+        directory = getattr(settings, 'METRICS_DIR', None)
+        return Path(directory) if directory else None
+
+    def flush(self, force=False):
+        directory = self.directory()
+        now = time.monotonic()
+        interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 1.0)
+        if directory is None or (not force and now - self.last_flush
+                                 < interval):
+            return
+        self.last_flush = now
+        directory.mkdir(parents=True, exist_ok=True)
+        write_snapshot(directory / self.file_name, self.snapshot())
+
+    def archive_dead(self, directory):
+        """Переносит снимки завершившихся процессов в archive.json."""
+        if fcntl is None:
+            return
+        dead = [
+            path for path in directory.glob('*.json')
+            if snapshot_pid(path) not in (None, os.getpid())
+            and not process_alive(snapshot_pid(path))
+        ]
+        if not dead:
+            return
+        archive = directory / ARCHIVE_NAME
+        snapshots = [read_snapshot(path) for path in [archive, *dead]]
+        write_snapshot(archive, merge_snapshots(filter(None, snapshots)))
+        for path in dead:
+            path.unlink()
+
+    def collect(self):
+        """Снимки всех процессов, сложенные по метрикам и меткам."""
+        directory = self.directory()
+        if directory is None:
+            return self.snapshot()
+        self.flush(force=True)
+        with directory_lock(directory):
+            self.archive_dead(directory)
+            snapshots = [
+                read_snapshot(path) for path in directory.glob('*.json')
+            ]
+        merged = merge_snapshots(filter(None, snapshots))
+        for metric in merged.values():
+            metric['values'] = [
+                (tuple(key), value) for key, value in metric['values']
+            ]
+        return merged
+
+
+def format_labels(labelnames, key, extra=()):
+    pairs = list(zip(labelnames, key)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', r'\\').replace('"', r'\"')
+         .replace('\n', r'\n'))
+        for name, value in pairs
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def render_text(collected):
+    """Текстовый формат экспозиции Prometheus 0.0.4."""
+    lines = []
+    for name in sorted(collected):
+        metric = collected[name]
+        labelnames = metric['labelnames']
+        lines.append(f'# HELP {name} {metric["documentation"]}')
+        lines.append(f'# TYPE {name} {metric["kind"]}')
+        for key, value in sorted(metric['values']):
+            if metric['kind'] == 'counter':
+                lines.append(f'{name}{format_labels(labelnames, key)} {value}')
+                continue
+            cumulative = 0
+            for bound, count in zip(metric['buckets'], value):
+                cumulative += count
+                labels = format_labels(labelnames, key, [('le', bound)])
+                lines.append(f'{name}_bucket{labels} {cumulative}')
+            labels = format_labels(labelnames, key, [('le', '+Inf')])
+            lines.append(f'{name}_bucket{labels} {value[-1]}')
+            labels = format_labels(labelnames, key)
+            lines.append(f'{name}_sum{labels} {value[-2]}')
+            lines.append(f'{name}_count{labels} {value[-1]}')
+    return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+atexit.register(registry.flush, force=True)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=registry.reset)
+
+REQUESTS = Counter(
+    registry, 'yamdb_http_requests_total',
+    'Число запросов по view, action, методу и статусу.',
+    ('view', 'action', 'method', 'status'),
+)
+REQUEST_DURATION = Histogram(
+    registry, 'yamdb_http_request_duration_seconds',
+    'Длительность обработки запроса.',
+    ('view', 'action'),
+)
+DB_QUERIES = Counter(
+    registry, 'yamdb_db_queries_total',
+    'Число SQL-запросов по view и action.',
+    ('view', 'action'),
+)
+DB_QUERY_DURATION = Histogram(
+    registry, 'yamdb_db_query_duration_seconds',
+    'Длительность отдельных SQL-запросов.',
+    ('view', 'action'),
+    buckets=QUERY_BUCKETS,
+)
+SERIALIZER_DURATION = Histogram(
+    registry, 'yamdb_serializer_duration_seconds',
+    'Время сериализации ответа.',
+    ('view', 'action'),
+)
+EMAILS_SENT = Counter(
+    registry, 'yamdb_emails_sent_total',
+    'Попытки отправки писем из очереди: sent, retry, failed.',
+    ('result',),
+)
+CACHE_REQUESTS = Counter(
+    registry, 'yamdb_cache_requests_total',
+    'Обращения к кэшам по результату (hit/miss).',
+    ('cache', 'result'),
+)
+
+
+def view_labels(request):
+    """Имя класса view и действие DRF (list, create, ...)."""
+    match = getattr(request, 'resolver_match', None)
+    view = getattr(match, 'func', None) if match else None
+    view_class = getattr(view, 'cls', getattr(view, 'view_class', None))
+    if view_class is None:
+        return {'view': 'unknown', 'action': request.method.lower()}
+    actions = getattr(view, 'actions', None) or {}
+    return {
+        'view': view_class.__name__,
+        'action': actions.get(request.method.lower(), request.method.lower()),
+    }
+
+
+def count_email(sender, result, **kwargs):
+    """Приёмник users.signals.email_attempted."""
+    EMAILS_SENT.inc(result=result)
+
+
+def observe_request(request, response, timings, total):
+    labels = view_labels(request)
+    REQUESTS.inc(
+        method=request.method, status=response.status_code, **labels
+    )
+    REQUEST_DURATION.observe(total, **labels)
+    DB_QUERIES.inc(timings.queries, **labels)
+    for duration in timings.query_durations:
+        DB_QUERY_DURATION.observe(duration, **labels)
+    if 'serialize' in timings.phases:
+        SERIALIZER_DURATION.observe(timings.phases['serialize'], **labels)
+    registry.flush()
+
+
+def metrics_view(request):
+    """Метрики в текстовом формате; доступны только с METRICS_ALLOWED_IPS."""
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+    return HttpResponse(
+        render_text(registry.collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
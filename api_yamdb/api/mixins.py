@@ -1,4 +1,9 @@
+from django.shortcuts import get_object_or_404
 from rest_framework import mixins, viewsets
+from reviews.models import Review, Title
+
+from .fieldsets import requested_fields
+from .identity_map import identity_map
 
 
 class ListCreateDeleteViewSet(
@@ -13,3 +18,92 @@ class ListCreateDeleteViewSet(
     Создать объект (для обработки запросов POST);
     Удалить объект (для обработки запросов DELETE).
     """
+
+
+class ValuesReadMixin:
+    """
+    Быстрое чтение: list и retrieve выбирают строки через .values()
+    и отдают их values_serializer_class, минуя экземпляры моделей.
+    Фильтры и пагинация работают с той же выборкой, что и раньше;
+    ?fields= и ?omit= убирают из неё столбцы и соединения лишних полей.
+    """
+    values_serializer_class = None
+    values_actions = ('list', 'retrieve')
+
+    def use_values(self):
+        return (
+            self.values_serializer_class is not None
+            and self.action in self.values_actions
+        )
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.use_values():
+            # id и ключ курсора нужны пагинации при любом наборе полей.
+            extra = ('id',) + tuple(
+                term.lstrip('-')
+                for term in getattr(self, 'cursor_ordering', ())
+            )
+            return self.values_serializer_class.values(
+                queryset,
+                self.values_serializer_class.selected_fields(self.request),
+                extra,
+            )
+        return queryset
+
+    def get_serializer_class(self):
+        if self.use_values():
+            return self.values_serializer_class
+        return super().get_serializer_class()
+
+
+class SparseFieldsQuerysetMixin:
+    """
+    При ?fields= и ?omit= list и retrieve читают через .only() только
+    столбцы выбранных полей сериализатора (SparseFieldsMixin).
+    """
+    sparse_actions = ('list', 'retrieve')
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action not in self.sparse_actions:
+            return queryset
+        serializer_class = self.get_serializer_class()
+        fields = requested_fields(
+            self.request, tuple(serializer_class().fields)
+        )
+        if fields is None:
+            return queryset
+        return queryset.only('pk', *serializer_class.only_columns(fields))
+
+
+class NestedParentsMixin:
+    """
+    Родители вложенных маршрутов из title_id и review_id загружаются один
+    раз за запрос и берутся из карты объектов запроса (identity_map) во
+    view, сериализаторах и permissions. Отзыв ищется сразу с условием
+    на title_id и вместе с произведением: отзыв чужого произведения - 404.
+    """
+
+    def get_title(self):
+        objects = identity_map(self.request)
+        title = objects.get(Title, self.kwargs['title_id'])
+        if title is not None:
+            return title
+        if 'review_id' in self.kwargs:
+            return self.get_review().title
+        return objects.add(
+            get_object_or_404(Title, pk=self.kwargs['title_id'])
+        )
+
+    def get_review(self):
+        objects = identity_map(self.request)
+        review = objects.get(Review, self.kwargs['review_id'])
+        if review is None:
+            review = objects.add(get_object_or_404(
+                Review.objects.select_related('title'),
+                pk=self.kwargs['review_id'],
+                title_id=self.kwargs['title_id'],
+            ))
+            objects.add(review.title)
+        return review
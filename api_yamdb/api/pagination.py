@@ -0,0 +1,173 @@
+import json
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetCursorPagination:
+    """
+    Курсорная (keyset) пагинация по составному ключу сортировки.
+    Следующая страница выбирается условием WHERE по значениям ключа
+    последней записи, поэтому время выборки не зависит от глубины страницы.
+    Ключ берётся из атрибута вьюсета cursor_ordering, например
+    ('-pub_date', '-id'); последнее поле должно быть уникальным.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def __init__(self, ordering, page_size):
+        self.ordering = tuple(ordering)
+        self.page_size = page_size
+
+    @staticmethod
+    def _split(term):
+        return (term[1:], True) if term.startswith('-') else (term, False)
+
+    def _order_by(self, reverse):
+        terms = []
+        for term in self.ordering:
+            field, descending = self._split(term)
+            terms.append(f'-{field}' if descending != reverse else field)
+        return terms
+
+    def _after(self, position, reverse):
+        """
+        Условие «строго после позиции» для составного ключа:
+        (a > x) OR (a = x AND b > y) OR ...
+        """
+        condition = Q()
+        equal = {}
+        for term, value in zip(self.ordering, position):
+            field, descending = self._split(term)
+            lookup = 'lt' if descending != reverse else 'gt'
+            condition |= Q(**equal, **{f'{field}__{lookup}': value})
+            equal[field] = value
+        return condition
+
+    def _position(self, obj):
+        position = []
+        for term in self.ordering:
+            field = self._split(term)[0]
+            # Строки .values() - словари, а не экземпляры моделей.
+            if isinstance(obj, dict):
+                value = obj[field]
+            else:
+                value = getattr(obj, field)
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            position.append(value)
+        return position
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(b64decode(encoded.encode('ascii')))
+            position, reverse = cursor['p'], bool(cursor['r'])
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or (
+            len(position) != len(self.ordering)
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def clean_position(self, model, position):
+        """
+        Приводит значения курсора к типам полей ключа, чтобы подделанный
+        курсор давал 404, а не ошибку в условии WHERE.
+        """
+        values = []
+        for term, value in zip(self.ordering, position):
+            if isinstance(value, bool) or not isinstance(
+                value, (str, int, float)
+            ):
+                raise NotFound(self.invalid_cursor_message)
+            field = model._meta.get_field(self._split(term)[0])
+            try:
+                values.append(field.to_python(value))
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def encode_cursor(self, position, reverse):
+        cursor = json.dumps({'p': position, 'r': int(reverse)})
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            b64encode(cursor.encode('utf-8')).decode('ascii')
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = remove_query_param(
+            request.build_absolute_uri(),
+            PageNumberPagination.page_query_param
+        )
+        cursor = self.decode_cursor(request)
+        position, reverse = cursor if cursor else (None, False)
+
+        queryset = queryset.order_by(*self._order_by(reverse))
+        if position is not None:
+            position = self.clean_position(queryset.model, position)
+            queryset = queryset.filter(self._after(position, reverse))
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.page = results
+        return results
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self._position(self.page[-1]), False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self._position(self.page[0]), True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+
+class PageNumberOrCursorPagination(PageNumberPagination):
+    """
+    Постраничная пагинация по умолчанию и курсорная по запросу:
+    ?cursor= (пустое значение - первая страница) включает keyset-режим
+    без COUNT(*) и OFFSET. Старые клиенты с ?page= работают как раньше.
+    """
+    cursor_query_param = KeysetCursorPagination.cursor_query_param
+
+    def paginate_queryset(self, queryset, request, view=None):
+        ordering = getattr(view, 'cursor_ordering', None)
+        if ordering and self.cursor_query_param in request.query_params:
+            self.cursor_paginator = KeysetCursorPagination(
+                ordering, self.get_page_size(request)
+            )
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        self.cursor_paginator = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,30 @@
+import io
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+from .renderers import FastJSONRenderer, orjson
+
+UTF8 = ('utf-8', 'utf8')
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSONParser на orjson для тел в UTF-8. Некорректный JSON, NaN и целые
+    длиннее 64 бит разбирает стандартный json: он же формирует
+    привычное сообщение ParseError.
+    """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower() not in UTF8:
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(
+                io.BytesIO(body), media_type, parser_context
+            )
@@ -33,5 +33,5 @@ class AuthenticatedOrReadOnly(BasePermission):
             and request.user.is_superuser
             or request.user.is_admin
             or request.user.is_moderator
-            or request.user.username == obj.author.username
+            or request.user.id == obj.author_id
         )
@@ -0,0 +1,70 @@
+import logging
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+logger = logging.getLogger('api.performance')
+
+_current_counter = ContextVar('query_budget_counter', default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Вьюсет выполнил больше SQL-запросов, чем разрешает бюджет."""
+
+
+class QueryCounter:
+    def __init__(self):
+        self.queries = 0
+
+
+def counted_execute(execute, sql, params, many, context):
+    """Постоянная обёртка соединений: счётчик бюджета текущего запроса."""
+    counter = _current_counter.get()
+    if counter is not None:
+        counter.queries += 1
+    return execute(sql, params, many, context)
+
+
+def check_budget(view, action, queries):
+    budget = view.query_budgets.get(action)
+    if budget is None or queries <= budget:
+        return
+    message = (
+        f'{type(view).__name__}.{action}: {queries} SQL-запросов '
+        f'при бюджете {budget}'
+    )
+    if getattr(settings, 'QUERY_BUDGET', 'log') == 'raise':
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+def query_budget(**budgets):
+    """
+    Декоратор класса view: не больше budgets[action] SQL-запросов на
+    действие (list=3, retrieve=2, post=2 для APIView) независимо от
+    размера страницы, поэтому N+1 сразу выходит за бюджет. Настройка
+    QUERY_BUDGET: 'raise' (тесты) - исключение QueryBudgetExceeded,
+    'log' - предупреждение в api.performance, None - без проверки.
+    """
+    def decorate(view_class):
+        dispatch = view_class.dispatch
+
+        @wraps(dispatch)
+        def budgeted_dispatch(self, request, *args, **kwargs):
+            if getattr(settings, 'QUERY_BUDGET', 'log') is None:
+                return dispatch(self, request, *args, **kwargs)
+            counter = QueryCounter()
+            token = _current_counter.set(counter)
+            try:
+                response = dispatch(self, request, *args, **kwargs)
+            finally:
+                _current_counter.reset(token)
+            action = getattr(self, 'action', None) or request.method.lower()
+            check_budget(self, action, counter.queries)
+            return response
+
+        view_class.dispatch = budgeted_dispatch
+        view_class.query_budgets = budgets
+        return view_class
+    return decorate
@@ -0,0 +1,128 @@
+from operator import itemgetter
+
+from rest_framework import serializers
+from reviews.models import Title
+
+from .fieldsets import requested_fields
+from .instrumentation import phase
+
+# Даты в том же формате и часовом поясе, что у DateTimeField модели.
+DATETIME_FIELD = serializers.DateTimeField()
+
+
+class ValuesListSerializer(serializers.ListSerializer):
+    """Список строк .values(): связанные данные загружаются разом."""
+
+    def to_representation(self, data):
+        with phase('serialize'):
+            rows = list(data)
+            self.child.prepare(rows)
+            return [self.child.represent(row) for row in rows]
+
+
+class ValuesSerializer(serializers.BaseSerializer):
+    """
+    Сериализатор только для чтения: строит ответ из словарей .values()
+    без экземпляров моделей и обхода полей. field_columns - поля ответа
+    и столбцы выборки для них; поле берётся из первого столбца, если
+    нет метода get_<поле>. ?fields= и ?omit= сужают и ответ, и выборку.
+    """
+    field_columns = {}
+
+    class Meta:
+        list_serializer_class = ValuesListSerializer
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.selected = self.selected_fields(self.context.get('request'))
+        self.getters = [
+            (name, getattr(
+                self, f'get_{name}', itemgetter(*self.field_columns[name])
+            ))
+            for name in self.selected
+        ]
+
+    @classmethod
+    def selected_fields(cls, request):
+        available = tuple(cls.field_columns)
+        return requested_fields(request, available) or available
+
+    @classmethod
+    def values(cls, queryset, fields=None, extra=()):
+        """Выборка столбцов полей fields и служебных столбцов extra."""
+        columns = dict.fromkeys(extra)
+        for name in fields or cls.field_columns:
+            columns.update(dict.fromkeys(cls.field_columns[name]))
+        # Связанные объекты из prefetch_related строкам .values() не нужны.
+        return queryset.prefetch_related(None).values(*columns)
+
+    def prepare(self, rows):
+        """Загрузка связанных данных для всех строк страницы."""
+
+    def represent(self, row):
+        return {name: getter(row) for name, getter in self.getters}
+
+    def to_representation(self, row):
+        with phase('serialize'):
+            self.prepare([row])
+            return self.represent(row)
+
+
+class TitleValuesSerializer(ValuesSerializer):
+    """Тот же ответ, что у TitleSerializer; жанры - одним запросом."""
+    field_columns = {
+        'id': ('id',),
+        'name': ('name',),
+        'year': ('year',),
+        'description': ('description',),
+        'rating': ('rating',),
+        'category': ('category__name', 'category__slug'),
+        'genre': ('id',),
+    }
+
+    def prepare(self, rows):
+        if 'genre' not in self.selected:
+            return
+        self.genres = {row['id']: [] for row in rows}
+        links = Title.genre.through.objects.filter(
+            title_id__in=self.genres
+        ).order_by('genre__slug').values_list(
+            'title_id', 'genre__name', 'genre__slug'
+        )
+        for title_id, name, slug in links:
+            self.genres[title_id].append({'name': name, 'slug': slug})
+
+    def get_category(self, row):
+        if row['category__slug'] is None:
+            return None
+        return {'name': row['category__name'], 'slug': row['category__slug']}
+
+    def get_genre(self, row):
+        return self.genres[row['id']]
+
+
+class ReviewValuesSerializer(ValuesSerializer):
+    """Тот же ответ, что у ReviewSerializer."""
+    field_columns = {
+        'id': ('id',),
+        'text': ('text',),
+        'author': ('author__username',),
+        'score': ('score',),
+        'pub_date': ('pub_date',),
+    }
+
+    def get_pub_date(self, row):
+        return DATETIME_FIELD.to_representation(row['pub_date'])
+
+
+class CommentValuesSerializer(ValuesSerializer):
+    """Тот же ответ, что у CommentSerializer."""
+    field_columns = {
+        'id': ('id',),
+        'text': ('text',),
+        'author': ('author__username',),
+        'pub_date': ('pub_date',),
+    }
+
+    def get_pub_date(self, row):
+        return DATETIME_FIELD.to_representation(row['pub_date'])
@@ -0,0 +1,51 @@
+from django.utils.datastructures import MultiValueDict
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+if orjson is not None:
+    # Ключи-числа превращаются в строки, как в json.dumps; даты отдаются
+    # в default, чтобы формат совпадал с JSONEncoder DRF (UTC как Z).
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer на orjson: тот же компактный UTF-8 вывод, что у
+    JSONRenderer при настройках по умолчанию, в несколько раз быстрее.
+    Типы, которых orjson не знает, переводит JSONEncoder DRF. Отступы,
+    ensure_ascii, ошибка сериализации или отсутствие orjson - вывод
+    через стандартный json. Отличия: NaN и бесконечность orjson пишет
+    как null, а у чисел с порядком нет знака + (1e16, а не 1e+16).
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+            is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        if isinstance(data, MultiValueDict):
+            # json.dumps берёт items() - последние значения, а orjson
+            # читает сам словарь со списками значений.
+            data = dict(data.items())
+        try:
+            rendered = orjson.dumps(
+                data, default=self.encoder_class().default,
+                option=ORJSON_OPTIONS
+            )
+        except TypeError:
+            # Например, целые длиннее 64 бит; ошибку, если она есть,
+            # выдаст стандартный json.
+            return super().render(data, accepted_media_type, renderer_context)
+        # Как JSONRenderer: U+2028 и U+2029 недопустимы в JavaScript.
+        return rendered.replace(
+            b'\xe2\x80\xa8', b'\\u2028'
+        ).replace(b'\xe2\x80\xa9', b'\\u2029')
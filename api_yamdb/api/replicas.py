@@ -0,0 +1,119 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+_replica_alias = ContextVar('replica_alias', default=None)
+
+
+def replica_aliases():
+    return getattr(settings, 'DATABASE_REPLICAS', ())
+
+
+def pin_cache():
+    return caches[getattr(settings, 'REPLICA_PIN_CACHE', 'default')]
+
+
+def pin_key(user):
+    return f'replica-pin:{user.pk}'
+
+
+def pin_to_primary(user):
+    """
+    После изменения пользователь REPLICA_PIN_SECONDS секунд читает
+    с основной базы, пока реплики догоняют её.
+    """
+    pin_cache().set(pin_key(user), 1, timeout=settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user):
+    if not (user and user.is_authenticated):
+        return False
+    return pin_cache().get(pin_key(user)) is not None
+
+
+@contextmanager
+def primary_reads():
+    """Чтение внутри блока идёт с основной базы и в ReplicaReadMixin."""
+    token = _replica_alias.set(None)
+    try:
+        yield
+    finally:
+        _replica_alias.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Чтение в запросах, отмеченных ReplicaReadMixin, идёт на выбранную
+    для запроса реплику, всё остальное - на основную базу.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _replica_alias.get()
+
+    def db_for_write(self, model, **hints):
+        # Явно: иначе Django запишет объект туда, откуда его прочитал.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Схема попадает на реплики вместе с данными.
+        if db in replica_aliases():
+            return False
+        return None
+
+
+class ReplicaReadMixin:
+    """
+    Безопасные запросы к вьюсету читают с одной случайной реплики из
+    DATABASE_REPLICAS: версии для ETag и сами данные берутся из одного
+    снимка, даже если реплики отстают по-разному. Аутентификация,
+    права и ограничения частоты проверяются ещё по основной базе;
+    после успешного изменения пользователь закрепляется за ней.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        with primary_reads():
+            response = super().dispatch(request, *args, **kwargs)
+        if (
+            replica_aliases()
+            and self.request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and self.request.user.is_authenticated
+        ):
+            pin_to_primary(self.request.user)
+        return response
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            replica_aliases()
+            and request.method in SAFE_METHODS
+            and not is_pinned(request.user)
+        ):
+            _replica_alias.set(random.choice(replica_aliases()))
+
+
+def sync_replica(alias, source=DEFAULT_DB_ALIAS):
+    """
+    Замена репликации для SQLite: целиком копирует основную базу
+    в файл реплики через backup API. Копия атомарна для читателей.
+    """
+    primary, replica = connections[source], connections[alias]
+    if primary.vendor != 'sqlite' or replica.vendor != 'sqlite':
+        raise ValueError(
+            'Копирование поддерживается только для SQLite, для серверных '
+            'баз используйте их штатную репликацию.'
+        )
+    primary.ensure_connection()
+    replica.ensure_connection()
+    primary.connection.backup(replica.connection)
@@ -0,0 +1,64 @@
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+from reviews.models import ContentVersion
+
+from . import metrics
+from .replicas import primary_reads
+from .versions import scope
+
+CACHE_LABEL = 'responses'
+
+
+def responses_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE', 'default')]
+
+
+def responses_timeout():
+    return getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+
+
+def response_key(model, request):
+    """
+    Ключ ответа. Ссылки next/previous в ответе абсолютные и строятся
+    из заголовка Host, поэтому схема и хост входят в ключ: запрос с
+    чужим Host не подменит ссылки для остальных клиентов.
+    """
+    params = urlencode(sorted(request.query_params.lists()), doseq=True)
+    url = f'{request.scheme}://{request.get_host()}{request.path}?{params}'
+    digest = hashlib.md5(url.encode()).hexdigest()
+    name = scope(model)
+    # Дата изменения отличает версии одного номера в разных базах,
+    # например после пересоздания базы при общем файловом кэше.
+    version = hashlib.md5(repr(sorted(
+        ContentVersion.current([name]).items()
+    )).encode()).hexdigest()
+    return f'response:{name}:{version}:{digest}'
+
+
+class ResponseCacheMixin:
+    """
+    Кэш ответов list для справочников (категории, жанры): ключ - модель,
+    её версия в ContentVersion, путь и параметры запроса (page, search,
+    ...). Изменение любого объекта модели увеличивает версию в той же
+    транзакции (api.conditional), и старые ответы больше не читает ни
+    один процесс; версия стоит один запрос к БД. Права и лимиты
+    проверяются как обычно. Промах читается с основной базы:
+    отстающая реплика записала бы в кэш старые данные под новой версией.
+    """
+
+    def list(self, request, *args, **kwargs):
+        cache = responses_cache()
+        key = response_key(self.get_queryset().model, request)
+        data = cache.get(key)
+        if data is not None:
+            metrics.CACHE_REQUESTS.inc(cache=CACHE_LABEL, result='hit')
+            return Response(data)
+        metrics.CACHE_REQUESTS.inc(cache=CACHE_LABEL, result='miss')
+        with primary_reads():
+            response = super().list(request, *args, **kwargs)
+        cache.set(key, response.data, timeout=responses_timeout())
+        return response
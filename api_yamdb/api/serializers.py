@@ -1,14 +1,20 @@
-from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator, EmailValidator
+from django.db import IntegrityError
 from django.shortcuts import get_object_or_404
 from rest_framework import serializers
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework.settings import api_settings
 
 from reviews.models import Category, Comment, Genre, Review, Title
 from users.models import User
+from users.tokens import RoleRefreshToken
 
+from .fields import BulkSlugRelatedField
+from .fieldsets import SparseFieldsMixin
+from .instrumentation import TimedRepresentationMixin
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(SparseFieldsMixin, TimedRepresentationMixin,
+                     serializers.ModelSerializer):
     """
     Сериализатор для пользователя.
     """
@@ -80,10 +86,11 @@ class TokenCreateSerializer(serializers.Serializer):
         user = get_object_or_404(User, username=data['username'])
         if user.confirmation_code != data['confirmation_code']:
             raise serializers.ValidationError('Неверный код подтверждения')
-        return RefreshToken.for_user(user).access_token
+        return RoleRefreshToken.for_user(user).access_token
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedRepresentationMixin,
+                         serializers.ModelSerializer):
     """
     Сериализатор для категорий.
     """
@@ -94,7 +101,8 @@ class CategorySerializer(serializers.ModelSerializer):
         lookup_field = 'slug'
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(TimedRepresentationMixin,
+                      serializers.ModelSerializer):
     """
     Сериализатор для жанров.
     """
@@ -105,13 +113,13 @@ class GenreSerializer(serializers.ModelSerializer):
         lookup_field = 'slug'
 
 
-class TitleSerializer(serializers.ModelSerializer):
+class TitleSerializer(SparseFieldsMixin, TimedRepresentationMixin,
+                      serializers.ModelSerializer):
     """
     Сериализатор для GET запросов произведений.
     """
     category = CategorySerializer(read_only=True)
     genre = GenreSerializer(many=True, read_only=True)
-    rating = serializers.FloatField()
 
     class Meta:
         model = Title
@@ -119,26 +127,29 @@ class TitleSerializer(serializers.ModelSerializer):
                   'category', 'genre')
 
 
-class TitlePostSerializer(serializers.ModelSerializer):
+class TitlePostSerializer(TimedRepresentationMixin,
+                          serializers.ModelSerializer):
     """
     Сериализатор для POST запросов произведений.
     """
     category = serializers.SlugRelatedField(
         slug_field='slug', queryset=Category.objects.all()
     )
-    genre = serializers.SlugRelatedField(
+    genre = BulkSlugRelatedField(
         slug_field='slug', queryset=Genre.objects.all(),
         many=True
     )
 
     class Meta:
-        fields = '__all__'
+        exclude = Title.RATING_FIELDS
         model = Title
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsMixin, TimedRepresentationMixin,
+                       serializers.ModelSerializer):
     """
-    Сериализатор для отзывов. Валидирует оценку и уникальность.
+    Сериализатор для отзывов. Валидирует оценку; повторный отзыв
+    отклоняет ограничение unique_review.
     """
     author = serializers.SlugRelatedField(
         slug_field='username',
@@ -152,26 +163,32 @@ class ReviewSerializer(serializers.ModelSerializer):
             )
         return value
 
-    def validate(self, data):
-        request = self.context['request']
-        author = request.user
-        title_id = self.context.get('view').kwargs.get('title_id')
-        title = get_object_or_404(Title, pk=title_id)
-        if (
-            request.method == 'POST'
-            and Review.objects.filter(title=title, author=author).exists()
-        ):
-            raise ValidationError(
-                'Только один отзыв на произведение от одного юзера!'
-            )
-        return data
+    def create(self, validated_data):
+        # Уникальность проверяет ограничение unique_review при вставке:
+        # без лишнего запроса и без гонки между проверкой и записью.
+        # Review.save() атомарен, поэтому неудачная вставка откатывается
+        # до своей точки сохранения и не ломает внешнюю транзакцию.
+        try:
+            return super().create(validated_data)
+        except IntegrityError:
+            if not Review.objects.filter(
+                title=validated_data['title'],
+                author=validated_data['author'],
+            ).exists():
+                raise
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Только один отзыв на произведение от одного юзера!'
+                ]
+            })
 
     class Meta:
         model = Review
         fields = ['id', 'text', 'author', 'score', 'pub_date']
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsMixin, TimedRepresentationMixin,
+                        serializers.ModelSerializer):
     """
     Сериалайзер для комментов.
     """
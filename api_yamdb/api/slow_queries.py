@@ -0,0 +1,164 @@
+import json
+import re
+import threading
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from time import perf_counter
+
+from django.conf import settings
+from django.db import DatabaseError
+
+from .instrumentation import HybridMiddleware
+from .metrics import view_labels
+
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+PLACEHOLDER_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+SPACE_RE = re.compile(r'\s+')
+READ_PREFIXES = ('SELECT', 'WITH')
+DEFAULT_SENSITIVE_COLUMNS = ('password', 'confirmation_code', 'email')
+
+_write_lock = threading.Lock()
+_current_recorder = ContextVar('slow_query_recorder', default=None)
+
+
+def normalize_sql(sql):
+    """
+    Приводит запрос к общему виду для группировки: литералы и параметры
+    заменяются на ?, списки IN (...) любой длины схлопываются.
+    """
+    sql = STRING_RE.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = NUMBER_RE.sub('?', sql)
+    sql = PLACEHOLDER_LIST_RE.sub('(...)', sql)
+    return SPACE_RE.sub(' ', sql).strip()
+
+
+def explain(connection, sql, params):
+    """
+    План запроса (EXPLAIN QUERY PLAN на SQLite). Выполняется отдельным
+    курсором в обход execute_wrapper, чтобы не сбить выборку исходного
+    запроса и не попасть в журнал самому.
+    """
+    if not sql.lstrip().upper().startswith(READ_PREFIXES):
+        return None
+    try:
+        cursor = connection.create_cursor()
+        try:
+            cursor.execute(
+                f'{connection.ops.explain_query_prefix()} {sql}', params
+            )
+            # Последний столбец - текст узла плана и в SQLite, и в PostgreSQL.
+            return [str(row[-1]) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+    except DatabaseError as error:
+        return [f'EXPLAIN не выполнен: {error}']
+
+
+def loggable_params(sql, params, many):
+    """
+    Параметры запроса для журнала или None, если они скрыты. Без
+    SLOW_QUERY_LOG_PARAMS = True пишутся только параметры чтений, не
+    касающихся столбцов из SLOW_QUERY_SENSITIVE_COLUMNS: изменения
+    users_user несут код подтверждения и хэш пароля.
+    """
+    # У executemany наборы параметров могут быть итератором, который
+    # уже прочитан: их не сохраняем.
+    if many:
+        return None
+    if not getattr(settings, 'SLOW_QUERY_LOG_PARAMS', False):
+        if not sql.lstrip().upper().startswith(READ_PREFIXES):
+            return None
+        columns = getattr(
+            settings, 'SLOW_QUERY_SENSITIVE_COLUMNS',
+            DEFAULT_SENSITIVE_COLUMNS
+        )
+        if any(re.search(rf'\b{column}\b', sql) for column in columns):
+            return None
+    return list(params or ())
+
+
+def log_path():
+    path = getattr(settings, 'SLOW_QUERY_LOG', None)
+    return str(path) if path else None
+
+
+def write_entry(entry):
+    path = log_path()
+    if path is None:
+        return
+    line = json.dumps(entry, ensure_ascii=False, default=str)
+    with _write_lock, open(path, 'a', encoding='utf-8') as log_file:
+        log_file.write(line + '\n')
+
+
+def read_entries(path):
+    """Записи журнала; повреждённые строки пропускаются."""
+    with open(path, encoding='utf-8') as log_file:
+        for line in log_file:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+class SlowQueryRecorder:
+    """
+    Обёртка connection.execute_wrapper: запросы дольше порога пишутся
+    в журнал вместе с view, параметрами (см. loggable_params) и планом
+    выполнения.
+    """
+
+    def __init__(self, request, threshold):
+        self.request = request
+        self.threshold = threshold
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = perf_counter() - started
+            if duration >= self.threshold:
+                self.record(sql, params, many, context, duration)
+
+    def record(self, sql, params, many, context, duration):
+        connection = context['connection']
+        write_entry({
+            'time': datetime.now(timezone.utc).isoformat(),
+            'duration_ms': round(duration * 1000, 3),
+            'database': connection.alias,
+            'method': self.request.method,
+            'path': self.request.path,
+            **view_labels(self.request),
+            'sql': sql,
+            'normalized': normalize_sql(sql),
+            'params': loggable_params(sql, params, many),
+            'plan': None if many else explain(connection, sql, params),
+        })
+
+
+def recorded_execute(execute, sql, params, many, context):
+    """Постоянная обёртка соединений: журнал текущего запроса, если есть."""
+    recorder = _current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+class SlowQueryLogMiddleware(HybridMiddleware):
+    """
+    Журнал медленных запросов: порог в секундах задаёт настройка
+    SLOW_QUERY_THRESHOLD (None отключает), файл - SLOW_QUERY_LOG.
+    """
+
+    def start(self, request):
+        threshold = getattr(settings, 'SLOW_QUERY_THRESHOLD', None)
+        if threshold is None or log_path() is None:
+            return None
+        return _current_recorder.set(SlowQueryRecorder(request, threshold))
+
+    def stop(self, token):
+        if token is not None:
+            _current_recorder.reset(token)
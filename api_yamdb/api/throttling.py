@@ -0,0 +1,222 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class SlidingWindowStore:
+    """
+    Счётчик скользящего окна: число запросов в текущем окне плюс
+    доля предыдущего окна, ещё попадающая в последние duration секунд.
+    Памяти - два числа на ключ, вместо списка отметок времени,
+    как у SimpleRateThrottle.
+    """
+
+    def counts(self, key, window):
+        """Счётчики (предыдущее окно, текущее окно)."""
+        raise NotImplementedError
+
+    def increment(self, key, window, duration):
+        raise NotImplementedError
+
+    def hit(self, key, limit, duration, now=None):
+        """
+        Учитывает запрос, если он укладывается в лимит.
+        Возвращает (разрешён ли запрос, сколько секунд ждать).
+        """
+        now = time.time() if now is None else now
+        window, elapsed = divmod(now, duration)
+        window = int(window)
+        previous, current = self.counts(key, window)
+        weight = 1 - elapsed / duration
+        if previous * weight + current + 1 > limit:
+            return False, self.wait(previous, current, limit, elapsed,
+                                    duration)
+        self.increment(key, window, duration)
+        return True, 0.0
+
+    @staticmethod
+    def wait(previous, current, limit, elapsed, duration):
+        if current + 1 > limit or not previous:
+            return duration - elapsed
+        # Когда вес предыдущего окна упадёт настолько, что запрос влезет.
+        allowed_weight = (limit - current - 1) / previous
+        return max(duration * (1 - allowed_weight) - elapsed, 0.0)
+
+
+class LocalSlidingWindowStore(SlidingWindowStore):
+    """
+    Счётчики в памяти процесса: без сетевых обращений, но лимит
+    считается отдельно в каждом процессе.
+    """
+    sweep_every = 10_000
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.windows = {}
+        self.hits = 0
+
+    def counts(self, key, window):
+        with self.lock:
+            state = self.windows.get(key)
+        if state is None:
+            return 0, 0
+        start, previous, current = state
+        if start == window:
+            return previous, current
+        if start == window - 1:
+            return current, 0
+        return 0, 0
+
+    def increment(self, key, window, duration):
+        with self.lock:
+            start, previous, current = self.windows.get(key, (window, 0, 0))
+            if start == window:
+                current += 1
+            else:
+                previous = current if start == window - 1 else 0
+                current = 1
+            self.windows[key] = (window, previous, current)
+            self.hits += 1
+            if self.hits % self.sweep_every == 0:
+                self.sweep(window)
+
+    def sweep(self, window):
+        """Забывает ключи, не обращавшиеся дольше двух окон."""
+        self.windows = {
+            key: state for key, state in self.windows.items()
+            if state[0] >= window - 1
+        }
+
+    def clear(self):
+        with self.lock:
+            self.windows.clear()
+
+
+class CacheSlidingWindowStore(SlidingWindowStore):
+    """
+    Счётчики в общем кэше Django (THROTTLE_CACHE), чтобы лимиты
+    действовали сразу на все процессы. cache.incr атомарен в Redis
+    и Memcached; с file/locmem-кэшем возможен небольшой перебор.
+    """
+
+    def __init__(self):
+        self.cache = caches[getattr(settings, 'THROTTLE_CACHE', 'default')]
+
+    @staticmethod
+    def window_key(key, window):
+        return f'{key}:{window}'
+
+    def counts(self, key, window):
+        values = self.cache.get_many([
+            self.window_key(key, window - 1), self.window_key(key, window)
+        ])
+        return (
+            values.get(self.window_key(key, window - 1), 0),
+            values.get(self.window_key(key, window), 0),
+        )
+
+    def increment(self, key, window, duration):
+        window_key = self.window_key(key, window)
+        # Окно нужно ещё duration секунд после конца как предыдущее.
+        if not self.cache.add(window_key, 1, timeout=duration * 2):
+            try:
+                self.cache.incr(window_key)
+            except ValueError:
+                self.cache.set(window_key, 1, timeout=duration * 2)
+
+    def clear(self):
+        self.cache.clear()
+
+
+_store = None
+
+
+def get_store():
+    """Экземпляр хранилища из settings.THROTTLE_STORE."""
+    global _store
+    if _store is None:
+        _store = import_string(settings.THROTTLE_STORE)()
+    return _store
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """
+    Ограничение частоты на хранилище скользящего окна. Ставки берутся
+    из REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] при каждом запросе.
+    Ключ строится только по IP или id из токена, без запросов к БД.
+    """
+
+    def __init__(self):
+        pass
+
+    @property
+    def THROTTLE_RATES(self):
+        return api_settings.DEFAULT_THROTTLE_RATES
+
+    def get_scope(self, view):
+        return self.scope
+
+    def allow_request(self, request, view):
+        self.scope = self.get_scope(view)
+        if not self.scope or self.THROTTLE_RATES.get(self.scope) is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.get_rate())
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+        allowed, self.wait_time = get_store().hit(
+            key, self.num_requests, self.duration
+        )
+        return allowed
+
+    def wait(self):
+        return self.wait_time
+
+    def ident(self, request):
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return f'ip:{self.get_ident(request)}'
+
+
+class AnonThrottle(SlidingWindowThrottle):
+    """Лимит анонимных запросов на IP (ставка anon)."""
+    scope = 'anon'
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return None
+        return self.cache_format % {
+            'scope': self.scope, 'ident': self.get_ident(request)
+        }
+
+
+class UserThrottle(SlidingWindowThrottle):
+    """Лимит запросов пользователя по id из токена (ставка user)."""
+    scope = 'user'
+
+    def get_cache_key(self, request, view):
+        if not (request.user and request.user.is_authenticated):
+            return None
+        return self.cache_format % {
+            'scope': self.scope, 'ident': request.user.pk
+        }
+
+
+class ScopedThrottle(SlidingWindowThrottle):
+    """
+    Отдельный бюджет для view с атрибутом throttle_scope, например
+    регистрации и выдачи токена; считается по пользователю или IP.
+    """
+
+    def get_scope(self, view):
+        return getattr(view, 'throttle_scope', None)
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope, 'ident': self.ident(request)
+        }
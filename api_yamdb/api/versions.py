@@ -0,0 +1,21 @@
+LIST_SHARDS = 16
+
+
+def scope(model, pk=None):
+    """Область версии: вся модель или один её объект."""
+    label = model._meta.label_lower
+    return label if pk is None else f'{label}:{pk}'
+
+
+def list_scope(model, pk):
+    """
+    Часть версии списка модели, к которой относится объект. Рейтинг
+    в списке произведений меняет каждый отзыв: версия списка разбита на
+    LIST_SHARDS строк, чтобы записи не ждали блокировку одной строки.
+    """
+    return f'{model._meta.label_lower}#{pk % LIST_SHARDS}'
+
+
+def list_scopes(model):
+    label = model._meta.label_lower
+    return [f'{label}#{shard}' for shard in range(LIST_SHARDS)]
@@ -1,7 +1,5 @@
 from http import HTTPStatus
 
-from django.core.mail import send_mail
-from django.db.models import Avg
 from django.shortcuts import get_object_or_404
 from django.utils.crypto import get_random_string
 from django_filters.rest_framework import DjangoFilterBackend
@@ -20,14 +18,30 @@ from rest_framework.permissions import (
 from rest_framework.response import Response
 from reviews.models import Category, Comment, Genre, Review, Title
 from users.models import User
+from users.outbox import enqueue
 
+from .conditional import ConditionalGetMixin
 from .filters import FilterTitle
-from .mixins import ListCreateDeleteViewSet
+from .mixins import (
+    ListCreateDeleteViewSet,
+    NestedParentsMixin,
+    SparseFieldsQuerysetMixin,
+    ValuesReadMixin,
+)
+from .pagination import PageNumberOrCursorPagination
 from .permissions import (
     AdminOrReadOnly,
     AdminOrSuperUserOnly,
     AuthenticatedOrReadOnly
 )
+from .query_budget import query_budget
+from .read_serializers import (
+    CommentValuesSerializer,
+    ReviewValuesSerializer,
+    TitleValuesSerializer,
+)
+from .replicas import ReplicaReadMixin
+from .response_cache import ResponseCacheMixin
 from .serializers import (
     CategorySerializer,
     CommentSerializer,
@@ -39,9 +53,15 @@ from .serializers import (
     UserSerializer,
     UserSignUpSerializer,
 )
+from .versions import list_scopes, scope
 
 
-class UserViewSet(viewsets.ModelViewSet):
+# Удаление пользователя каскадно удаляет его отзывы и комментарии
+# с пересчётом рейтингов: число запросов зависит от данных.
+@query_budget(
+    list=3, retrieve=2, me=6, create=4, partial_update=9, destroy=21
+)
+class UserViewSet(SparseFieldsQuerysetMixin, viewsets.ModelViewSet):
     """
     Работа с пользователями.
     """
@@ -62,9 +82,13 @@ class UserViewSet(viewsets.ModelViewSet):
         permission_classes=(IsAuthenticated, )
     )
     def me(self, request):
-        user = self.request.user
+        # request.user собран из утверждений токена, остальные поля
+        # профиля читаем из БД одним запросом.
+        user = get_object_or_404(User, pk=request.user.pk)
         if request.method == 'GET':
-            serializer = UserSerializer(request.user)
+            serializer = UserSerializer(
+                user, context=self.get_serializer_context()
+            )
             return Response(serializer.data)
         serializer = UserSerializer(user, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
@@ -74,11 +98,13 @@ class UserViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
+@query_budget(post=7)
 class UserSignUpViewSet(views.APIView):
     """
     Регистрация нового пользователя. Получение кода подтверждения.
     """
     permission_classes = (AllowAny, )
+    throttle_scope = 'signup'
 
     def post(self, request):
         if User.objects.filter(username=request.data.get('username'),
@@ -88,7 +114,7 @@ class UserSignUpViewSet(views.APIView):
         serializer.is_valid(raise_exception=True)
         confirmation_code = get_random_string(length=256)
         serializer.save(confirmation_code=confirmation_code)
-        send_mail(
+        enqueue(
             'Confirmation code for Yamdb',
             f'Your confirmation code {confirmation_code}',
             'admin@yamdb.com',
@@ -100,11 +126,13 @@ class UserSignUpViewSet(views.APIView):
         )
 
 
+@query_budget(post=2)
 class TokenCreateViewSet(views.APIView):
     """
     Выдача токена авторизации.
     """
     permission_classes = (AllowAny, )
+    throttle_scope = 'token'
 
     def post(self, request):
         serializer = TokenCreateSerializer(data=request.data)
@@ -115,7 +143,9 @@ class TokenCreateViewSet(views.APIView):
         )
 
 
-class CategoryViewSet(ListCreateDeleteViewSet):
+@query_budget(list=4, create=7, destroy=7)
+class CategoryViewSet(ReplicaReadMixin, ResponseCacheMixin,
+                      ListCreateDeleteViewSet):
     """
     Получить список всех категорий. Права доступа: Доступно без токена.
     Добавление новой категории. Права доступа: Администратор.
@@ -130,7 +160,9 @@ class CategoryViewSet(ListCreateDeleteViewSet):
     permission_classes = (AdminOrReadOnly, )
 
 
-class GenreViewSet(ListCreateDeleteViewSet):
+@query_budget(list=4, create=7, destroy=7)
+class GenreViewSet(ReplicaReadMixin, ResponseCacheMixin,
+                   ListCreateDeleteViewSet):
     """
     Получить список всех жанров. Права доступа: Доступно без токена.
     Добавить жанр. Права доступа: Администратор.
@@ -145,7 +177,11 @@ class GenreViewSet(ListCreateDeleteViewSet):
     lookup_field = 'slug'
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+@query_budget(
+    list=5, retrieve=4, create=16, partial_update=12, destroy=12
+)
+class TitleViewSet(ConditionalGetMixin, ReplicaReadMixin, ValuesReadMixin,
+                   viewsets.ModelViewSet):
     """
     Получить список всех объектов. Права доступа: Доступно без токена.
     Добавление произведения. ПД: Администратор.
@@ -154,52 +190,83 @@ class TitleViewSet(viewsets.ModelViewSet):
     Удаление произведения. Права доступа: Администратор.
     """
     serializer_class = TitleSerializer
+    values_serializer_class = TitleValuesSerializer
     filter_backends = (DjangoFilterBackend,)
     filterset_class = FilterTitle
     search_fields = ('name', 'year', 'genre__slug', 'category__slug')
     permission_classes = (AdminOrReadOnly, )
-    pagination_class = PageNumberPagination
+    pagination_class = PageNumberOrCursorPagination
+    cursor_ordering = ('name', 'id')
 
     def get_serializer_class(self):
         if self.action in ('list', 'retrieve'):
-            return TitleSerializer
+            return super().get_serializer_class()
         return TitlePostSerializer
 
+    def get_version_scopes(self):
+        if self.action == 'retrieve':
+            titles = [scope(Title, self.kwargs['pk'])]
+        else:
+            titles = list_scopes(Title)
+        return *titles, scope(Category), scope(Genre)
+
     def get_queryset(self):
-        return Title.objects.annotate(
-            rating=Avg('reviews__score')).order_by('name')
+        queryset = Title.objects.select_related('category').order_by('name')
+        if self.action in ('list', 'retrieve'):
+            # Жанры нужны только ответу; при изменении DRF их сбрасывает.
+            return queryset.prefetch_related('genre')
+        return queryset
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+@query_budget(
+    list=5, retrieve=4, create=10, partial_update=11, destroy=11
+)
+class ReviewViewSet(ConditionalGetMixin, ReplicaReadMixin, ValuesReadMixin,
+                    NestedParentsMixin, viewsets.ModelViewSet):
     """
     Вьюсет для отзывов.
     """
-    pagination_class = PageNumberPagination
+    pagination_class = PageNumberOrCursorPagination
+    cursor_ordering = ('-pub_date', '-id')
     serializer_class = ReviewSerializer
+    values_serializer_class = ReviewValuesSerializer
     permission_classes = (IsAuthenticatedOrReadOnly, AuthenticatedOrReadOnly, )
 
-    def get_title(self):
-        return get_object_or_404(Title, id=self.kwargs.get('title_id'))
+    def get_version_scopes(self):
+        if self.action == 'retrieve':
+            return scope(Review, self.kwargs['pk']), scope(User)
+        return scope(Title, self.kwargs['title_id']), scope(User)
 
     def get_queryset(self):
-        return Review.objects.filter(title=self.get_title().id)
+        return Review.objects.filter(
+            title=self.get_title().id
+        ).select_related('author')
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user, title=self.get_title())
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+@query_budget(
+    list=5, retrieve=4, create=6, partial_update=6, destroy=7
+)
+class CommentViewSet(ConditionalGetMixin, ReplicaReadMixin, ValuesReadMixin,
+                     NestedParentsMixin, viewsets.ModelViewSet):
     """
     Вьюсет для комментариев.
     """
     serializer_class = CommentSerializer
+    values_serializer_class = CommentValuesSerializer
     permission_classes = (AuthenticatedOrReadOnly, )
+    pagination_class = PageNumberOrCursorPagination
+    cursor_ordering = ('-pub_date', '-id')
 
-    def get_review(self):
-        return get_object_or_404(Review, id=self.kwargs.get('review_id'))
+    def get_version_scopes(self):
+        return scope(Review, self.kwargs['review_id']), scope(User)
 
     def get_queryset(self):
-        return Comment.objects.filter(review=self.get_review().id)
+        return Comment.objects.filter(
+            review=self.get_review().id
+        ).select_related('author')
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user, review=self.get_review())
@@ -1,7 +1,19 @@
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
 
-application = get_asgi_application()
+
+class YamdbASGIHandler(ASGIHandler):
+    """Обработчик ASGI с маршрутами из settings.ASGI_URLCONF."""
+
+    async def get_response_async(self, request):
+        request.urlconf = settings.ASGI_URLCONF
+        return await super().get_response_async(request)
+
+
+django.setup(set_prefix=False)
+application = YamdbASGIHandler()
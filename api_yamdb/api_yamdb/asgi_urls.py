@@ -0,0 +1,15 @@
+"""
+URL для ASGI: те же маршруты, что в api_yamdb.urls, но чтение
+произведений, отзывов и комментариев идёт через асинхронные view.
+"""
+from django.urls import include, path
+
+from . import urls
+
+urlpatterns = [
+    path('api/', include('api.async_urls')),
+    *(
+        pattern for pattern in urls.urlpatterns
+        if getattr(pattern, 'app_name', None) != 'api'
+    ),
+]
@@ -0,0 +1,80 @@
+"""
+Профили настроек базы данных (переменная окружения DB_PROFILE).
+
+development - SQLite с настройками Django по умолчанию: новое соединение
+на каждый запрос, журнал отката, блокировка на время записи.
+
+production - для SQLite: WAL (чтения не ждут записи), synchronous=NORMAL,
+ожидание блокировки вместо ошибки database is locked, mmap и кэш
+страниц, BEGIN IMMEDIATE и постоянные соединения с проверкой.
+Для PostgreSQL (DB_ENGINE=postgresql) - постоянные соединения через
+пулер транзакций вроде PgBouncer (DB_HOST/DB_PORT указывают на пулер):
+Django 3.2 держит одно соединение на поток, пулер делит реальные
+соединения с сервером между процессами.
+"""
+PROFILES = ('development', 'production')
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20000,
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение - размер в КиБ, а не в страницах.
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+def sqlite_database(name, profile, conn_max_age=600):
+    database = {
+        'ENGINE': 'api_yamdb.db_backends.sqlite3',
+        'NAME': name,
+    }
+    if profile == 'production':
+        database.update({
+            'CONN_MAX_AGE': conn_max_age,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'timeout': SQLITE_PRAGMAS['busy_timeout'] / 1000,
+                'transaction_mode': 'IMMEDIATE',
+                'init_command': ';'.join(
+                    f'PRAGMA {pragma}={value}'
+                    for pragma, value in SQLITE_PRAGMAS.items()
+                ),
+            },
+        })
+    return database
+
+
+def postgresql_database(environ, profile, conn_max_age=600):
+    database = {
+        'ENGINE': 'api_yamdb.db_backends.postgresql',
+        'NAME': environ.get('DB_NAME', 'yamdb'),
+        'USER': environ.get('DB_USER', 'postgres'),
+        'PASSWORD': environ.get('DB_PASSWORD', ''),
+        'HOST': environ.get('DB_HOST', 'localhost'),
+        'PORT': environ.get('DB_PORT', '5432'),
+    }
+    if profile == 'production':
+        database.update({
+            'CONN_MAX_AGE': conn_max_age,
+            'CONN_HEALTH_CHECKS': True,
+            # Серверные курсоры не переживают смену соединения в пулере
+            # транзакций.
+            'DISABLE_SERVER_SIDE_CURSORS': True,
+            'OPTIONS': {'connect_timeout': 5},
+        })
+    return database
+
+
+def database_settings(environ, default_sqlite_name):
+    """Словарь DATABASES['default'] по DB_PROFILE и DB_ENGINE."""
+    profile = environ.get('DB_PROFILE', 'development')
+    if profile not in PROFILES:
+        raise ValueError(f'DB_PROFILE: ожидается одно из {PROFILES}')
+    conn_max_age = int(environ.get('DB_CONN_MAX_AGE', 600))
+    if environ.get('DB_ENGINE', 'sqlite3') == 'postgresql':
+        return postgresql_database(environ, profile, conn_max_age)
+    return sqlite_database(
+        environ.get('DB_NAME', default_sqlite_name), profile, conn_max_age
+    )
@@ -0,0 +1,23 @@
+class HealthCheckMixin:
+    """
+    Настройка CONN_HEALTH_CHECKS из Django 4.1: постоянное соединение
+    перед первым использованием в запросе проверяется is_usable() и
+    при обрыве открывается заново, а не роняет запрос.
+    """
+    health_check_done = False
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def ensure_connection(self):
+        if (
+            self.connection is not None
+            and self.settings_dict.get('CONN_HEALTH_CHECKS')
+            and not self.health_check_done
+            and not self.in_atomic_block
+        ):
+            self.health_check_done = True
+            if not self.is_usable():
+                self.close()
+        super().ensure_connection()
@@ -0,0 +1,7 @@
+from django.db.backends.postgresql import base
+
+from ..mixins import HealthCheckMixin
+
+
+class DatabaseWrapper(HealthCheckMixin, base.DatabaseWrapper):
+    """PostgreSQL с проверкой постоянных соединений (CONN_HEALTH_CHECKS)."""
@@ -0,0 +1,40 @@
+from django.db.backends.sqlite3 import base
+
+from ..mixins import HealthCheckMixin
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(HealthCheckMixin, base.DatabaseWrapper):
+    """
+    SQLite с параметрами OPTIONS из Django 5.1: init_command - PRAGMA
+    через точку с запятой для каждого нового соединения,
+    transaction_mode - режим BEGIN. С IMMEDIATE транзакция сразу берёт
+    блокировку записи и ждёт её в пределах timeout, вместо ошибки
+    database is locked при повышении блокировки посреди транзакции.
+    """
+    init_command = None
+    transaction_mode = None
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.init_command = params.pop('init_command', None)
+        self.transaction_mode = params.pop('transaction_mode', None)
+        if self.transaction_mode not in (None, *TRANSACTION_MODES):
+            raise ValueError(
+                f'transaction_mode: ожидается одно из {TRANSACTION_MODES}'
+            )
+        return params
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        if self.init_command:
+            for statement in self.init_command.split(';'):
+                if statement.strip():
+                    connection.execute(statement)
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode is None:
+            return super()._start_transaction_under_autocommit()
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
@@ -1,6 +1,9 @@
+import os
 from datetime import timedelta
 from pathlib import Path
 
+from .databases import database_settings, sqlite_database
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 # SECURITY WARNING: keep the secret key used in production secret!
@@ -25,9 +28,12 @@ INSTALLED_APPS = [
     'reviews.apps.ReviewsConfig',
     'api.apps.ApiConfig',
     'users.apps.UsersConfig',
+    'search.apps.SearchConfig',
 ]
 
 MIDDLEWARE = [
+    'api.instrumentation.ServerTimingMiddleware',
+    'api.slow_queries.SlowQueryLogMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -58,15 +64,60 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
+# Под ASGI (uvicorn api_yamdb.asgi:application) маршруты берутся отсюда:
+# чтение произведений, отзывов и комментариев идёт через async view.
+ASGI_APPLICATION = 'api_yamdb.asgi.application'
+ASGI_URLCONF = 'api_yamdb.asgi_urls'
+
 
 # Database
 
+# Профиль базы выбирается переменными окружения DB_PROFILE
+# (development/production) и DB_ENGINE (sqlite3/postgresql),
+# см. api_yamdb/databases.py.
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+    'default': database_settings(os.environ, BASE_DIR / 'db.sqlite3'),
+}
+
+# Реплики только для чтения: файлы SQLite через запятую в переменной
+# окружения DATABASE_REPLICAS (копирует manage.py sync_replicas).
+# В тестах реплики - зеркала основной базы.
+DATABASE_REPLICAS = []
+for index, name in enumerate(
+    filter(None, os.environ.get('DATABASE_REPLICAS', '').split(','))
+):
+    DATABASES[f'replica_{index + 1}'] = {
+        **sqlite_database(
+            name, os.environ.get('DB_PROFILE', 'development')
+        ),
+        'TEST': {'MIRROR': 'default'},
     }
+    DATABASE_REPLICAS.append(f'replica_{index + 1}')
+
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+# Сколько секунд после изменения пользователь читает с основной базы,
+# чтобы увидеть свою запись. Для нескольких процессов нужен общий кэш.
+REPLICA_PIN_SECONDS = 5
+REPLICA_PIN_CACHE = 'default'
+
+# Кэш ответов справочников (api.response_cache). Для нескольких
+# процессов на одной машине задайте каталог файлового кэша
+# RESPONSE_CACHE_DIR, иначе каждый процесс кэширует ответы отдельно.
+# Версии ответов лежат в БД (ContentVersion) и общие для процессов.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ['RESPONSE_CACHE_DIR'],
+    } if os.environ.get('RESPONSE_CACHE_DIR') else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'responses',
+    },
 }
+RESPONSE_CACHE = 'responses'
+RESPONSE_CACHE_TIMEOUT = 300
 
 
 # Password validation
@@ -109,18 +160,125 @@ STATICFILES_DIRS = ((BASE_DIR / 'static/'),)
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.instrumentation.TimedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
+    # JSON через orjson (без него - стандартный json), формат прежний.
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 5
+    'PAGE_SIZE': 5,
+    'DEFAULT_THROTTLE_CLASSES': (
+        'api.throttling.AnonThrottle',
+        'api.throttling.UserThrottle',
+        'api.throttling.ScopedThrottle',
+    ),
+    # anon - на IP, user - на пользователя, остальные - бюджеты view
+    # с атрибутом throttle_scope.
+    'DEFAULT_THROTTLE_RATES': {
+        'anon': '600/minute',
+        'user': '1200/minute',
+        'signup': '30/minute',
+        'token': '30/minute',
+    },
+    # Число доверенных прокси перед приложением. При 0 лимиты на IP
+    # считаются по REMOTE_ADDR, а X-Forwarded-For, который клиент может
+    # подделать, не учитывается; за nginx - NUM_PROXIES=1.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
 }
 
+# Хранилище счётчиков ограничения частоты: LocalSlidingWindowStore - в
+# памяти процесса, CacheSlidingWindowStore - общее для всех процессов
+# через кэш THROTTLE_CACHE (Redis или Memcached в боевой среде).
+THROTTLE_STORE = os.environ.get(
+    'THROTTLE_STORE', 'api.throttling.LocalSlidingWindowStore'
+)
+THROTTLE_CACHE = 'default'
+
+# Очередь писем users.OutboxEmail, её отправляет manage.py send_emails.
+# Для быстрых локальных бэкендов письмо уходит сразу из запроса.
+# По умолчанию SMTP; для разработки - EMAIL_BACKEND=
+# django.core.mail.backends.filebased.EmailBackend (файлы в sent_emails).
+EMAIL_BACKEND = os.environ.get(
+    'EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend'
+)
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+EMAIL_OUTBOX_INLINE_BACKENDS = (
+    'django.core.mail.backends.locmem.EmailBackend',
+)
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+# Пауза перед первым повтором в секундах, дальше удваивается.
+EMAIL_OUTBOX_BACKOFF = 30
+# На сколько секунд воркер забирает пачку писем себе.
+EMAIL_OUTBOX_LEASE = 600
+
+# Как часто процесс перечитывает версии токенов (users.TokenVersion):
+# смена роли вступает в силу в других процессах не позже чем через TTL.
+TOKEN_VERSION_CACHE_TTL = 5
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
 AUTH_USER_MODEL = 'users.User'
+
+# FTS5 есть только в SQLite; для других СУБД - поиск через icontains.
+SEARCH_BACKEND = os.environ.get(
+    'SEARCH_BACKEND',
+    'search.backends.SqliteFTS5Backend'
+    if DATABASES['default']['ENGINE'].endswith('sqlite3')
+    else 'search.backends.IcontainsSearchBackend'
+)
+
+# Замеры фаз запроса: заголовок Server-Timing и лог api.performance.
+# Включаются переменной окружения PERF_INSTRUMENTATION=1.
+PERF_INSTRUMENTATION = os.environ.get('PERF_INSTRUMENTATION') == '1'
+
+# Метрики Prometheus на /metrics. Для нескольких процессов WSGI задайте
+# общий каталог METRICS_DIR: процессы пишут туда снимки, /metrics их суммирует.
+METRICS_ENABLED = True
+METRICS_DIR = os.environ.get('METRICS_DIR')
+METRICS_ALLOWED_IPS = ('127.0.0.1', '::1')
+
+# Журнал медленных запросов: порог в секундах (None - выключен) и файл
+# в формате JSON Lines; смотреть командой manage.py slow_queries.
+SLOW_QUERY_THRESHOLD = 0.1
+SLOW_QUERY_LOG = os.environ.get(
+    'SLOW_QUERY_LOG', os.path.join(BASE_DIR, 'slow_queries.log')
+)
+# Параметры пишутся только у чтений без этих столбцов; все параметры,
+# включая коды подтверждения и хэши паролей, - с
+# SLOW_QUERY_LOG_PARAMS=1.
+SLOW_QUERY_LOG_PARAMS = os.environ.get('SLOW_QUERY_LOG_PARAMS') == '1'
+SLOW_QUERY_SENSITIVE_COLUMNS = ('password', 'confirmation_code', 'email')
+
+# Бюджет SQL-запросов view (api.query_budget): 'log' - предупреждение
+# в api.performance, 'raise' - исключение (в тестах), None - выключен.
+QUERY_BUDGET = 'log'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'api.performance': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
@@ -0,0 +1,53 @@
+from collections import defaultdict
+from contextvars import ContextVar
+
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, pre_delete
+
+
+class DeleteBatch:
+    """
+    Объекты, удалённые одним вызовом delete() вместе с каскадом.
+    Collector сначала отправляет pre_delete всем объектам, затем удаляет
+    их и отправляет post_delete; на последнем post_delete батч
+    закрывается и flush(deleted) получает {модель: [объекты]} одним
+    вызовом, а не по сигналу на каждый удалённый объект.
+    """
+
+    def __init__(self, name, flush):
+        self.flush = flush
+        self.state = ContextVar(name, default=None)
+
+    def connect(self, *models):
+        for model in models:
+            pre_delete.connect(self.start, sender=model, weak=False)
+            post_delete.connect(self.collect, sender=model, weak=False)
+
+    def start(self, sender, instance, using, **kwargs):
+        state = self.state.get()
+        if state is None or not self.in_transaction(state, using):
+            state = {
+                'pending': 0,
+                'deleted': defaultdict(list),
+                # Collector удаляет в транзакции: если её уже нет,
+                # батч остался от удаления, прерванного ошибкой.
+                'marker': lambda: None,
+            }
+            transaction.on_commit(state['marker'], using=using)
+            self.state.set(state)
+        state['pending'] += 1
+
+    @staticmethod
+    def in_transaction(state, using):
+        return any(
+            hook[1] is state['marker']
+            for hook in connections[using].run_on_commit
+        )
+
+    def collect(self, sender, instance, **kwargs):
+        state = self.state.get()
+        state['deleted'][sender].append(instance)
+        state['pending'] -= 1
+        if not state['pending']:
+            self.state.set(None)
+            self.flush(state['deleted'])
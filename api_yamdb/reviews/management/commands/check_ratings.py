@@ -0,0 +1,77 @@
+from django.core.management import BaseCommand, CommandError
+from django.db.models import Avg, Count, Sum
+from reviews.models import ContentVersion, Title
+
+RATING_TOLERANCE = 1e-9
+
+
+def find_rating_mismatches(queryset=None):
+    """
+    Сравнивает сохранённые агрегаты произведений с посчитанными заново
+    по таблице отзывов. Возвращает список расхождений.
+    """
+    titles = Title.objects.all() if queryset is None else queryset
+    fresh = titles.annotate(
+        fresh_sum=Sum('reviews__score'),
+        fresh_count=Count('reviews'),
+        fresh_rating=Avg('reviews__score'),
+    ).values_list(
+        'pk', 'score_sum', 'review_count', 'rating',
+        'fresh_sum', 'fresh_count', 'fresh_rating',
+    )
+    mismatches = []
+    for (pk, score_sum, review_count, rating,
+         fresh_sum, fresh_count, fresh_rating) in fresh.iterator():
+        rating_differs = (
+            (rating is None) != (fresh_rating is None)
+            or (rating is not None
+                and abs(rating - fresh_rating) > RATING_TOLERANCE)
+        )
+        if (
+            score_sum != (fresh_sum or 0)
+            or review_count != fresh_count
+            or rating_differs
+        ):
+            mismatches.append({
+                'id': pk,
+                'stored': (score_sum, review_count, rating),
+                'fresh': (fresh_sum or 0, fresh_count, fresh_rating),
+            })
+    return mismatches
+
+
+class Command(BaseCommand):
+    """
+    Проверка сохранённого рейтинга произведений:
+    python manage.py check_ratings [--fix]
+    """
+    help = 'Сверяет сохранённый рейтинг произведений со свежим Avg.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Пересчитать агрегаты у произведений с расхождениями.'
+        )
+
+    def handle(self, *args, **options):
+        mismatches = find_rating_mismatches()
+        for mismatch in mismatches:
+            self.stdout.write(
+                f'Произведение {mismatch["id"]}: '
+                f'сохранено {mismatch["stored"]}, '
+                f'по отзывам {mismatch["fresh"]}'
+            )
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS('Рейтинг согласован'))
+            return
+        if options['fix']:
+            Title.recalculate_ratings(
+                Title.objects.filter(pk__in=[m['id'] for m in mismatches])
+            )
+            ContentVersion.bump_all()
+            self.stdout.write(
+                self.style.SUCCESS(f'Исправлено: {len(mismatches)}')
+            )
+            return
+        raise CommandError(f'Расхождений: {len(mismatches)}')
@@ -1,54 +1,367 @@
 import csv
+import hashlib
+import time
+import zlib
+from array import array
+from itertools import accumulate, islice
+from pathlib import Path
 
 from django.conf import settings
-from django.core.management import BaseCommand
-from reviews.models import Category, Comment, Genre, Review, Title
+from django.core.management import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from reviews.models import (Category, Comment, ContentVersion, Genre,
+                            ImportedFile, Review, Title)
+from search.backends import get_backend
 from users.models import User
+from users.tokens import revoke_tokens
 
-TABLES = {
-    User: 'users.csv',
-    Category: 'category.csv',
-    Genre: 'genre.csv',
-    Title: 'titles.csv',
-    Review: 'review.csv',
-    Comment: 'comments.csv',
-}
+# Порядок важен: таблицы загружаются после тех, на которые ссылаются.
+# Третий элемент - переименование столбцов CSV в поля модели (сырые id FK).
+TABLES = (
+    ('users.csv', User, {}),
+    ('category.csv', Category, {}),
+    ('genre.csv', Genre, {}),
+    ('titles.csv', Title, {'category': 'category_id'}),
+    ('genre_title.csv', Title.genre.through, {}),
+    ('review.csv', Review, {'author': 'author_id'}),
+    ('comments.csv', Comment, {'author': 'author_id'}),
+)
+
+
+def read_chunks(csv_path, columns, batch_size):
+    """
+    Потоково читает CSV и отдаёт списки словарей по batch_size строк.
+    """
+    with open(csv_path, newline='', encoding='utf-8') as csv_file:
+        reader = csv.DictReader(csv_file, delimiter=',')
+        while True:
+            chunk = [
+                {columns.get(key, key): value for key, value in row.items()}
+                for row in islice(reader, batch_size)
+            ]
+            if not chunk:
+                return
+            yield chunk
+
+
+def file_checksum(csv_path):
+    digest = hashlib.sha256()
+    with open(csv_path, 'rb') as csv_file:
+        for block in iter(lambda: csv_file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IdRanges:
+    """
+    Множество целых id в виде отсортированных непересекающихся
+    диапазонов [start, end]. id из CSV обычно идут подряд, поэтому
+    миллионы строк занимают несколько диапазонов, а не множество
+    в памяти, и килобайты в ImportedFile.ids.
+    """
+
+    def __init__(self, ranges=()):
+        self.ranges = [list(bounds) for bounds in ranges]
+
+    def __len__(self):
+        return sum(end - start + 1 for start, end in self.ranges)
+
+    def __iter__(self):
+        return iter(self.ranges)
+
+    def update(self, ids):
+        """Добавляет пачку id: на пачку одна сортировка диапазонов."""
+        new = []
+        for pk in sorted(ids):
+            if new and pk <= new[-1][1] + 1:
+                new[-1][1] = max(new[-1][1], pk)
+            else:
+                new.append([pk, pk])
+        merged = []
+        for start, end in sorted(self.ranges + new):
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self.ranges = merged
+
+    def difference(self, other):
+        """Диапазоны id из self, которых нет в other."""
+        result = []
+        others = iter(other.ranges)
+        current = next(others, None)
+        for start, end in self.ranges:
+            while current is not None and current[1] < start:
+                current = next(others, None)
+            while current is not None and current[0] <= end:
+                if current[0] > start:
+                    result.append([start, current[0] - 1])
+                start = current[1] + 1
+                if current[1] > end:
+                    break
+                current = next(others, None)
+            if start <= end:
+                result.append([start, end])
+        return IdRanges(result)
+
+    def pack(self):
+        """Границы диапазонов -> сжатые разности соседних значений."""
+        deltas = array('q')
+        previous = 0
+        for start, end in self.ranges:
+            deltas.extend((start - previous, end - start))
+            previous = end
+        return zlib.compress(deltas.tobytes())
+
+    @classmethod
+    def unpack(cls, data):
+        deltas = array('q')
+        deltas.frombytes(zlib.decompress(bytes(data)))
+        bounds = list(accumulate(deltas))
+        return cls(zip(bounds[::2], bounds[1::2]))
+
+
+def reset_sequences(model):
+    """
+    INSERT с явными id не двигает счётчики последовательностей.
+    """
+    sequence_sql = connection.ops.sequence_reset_sql(no_style(), [model])
+    with connection.cursor() as cursor:
+        for sql in sequence_sql:
+            cursor.execute(sql)
+
+
+def insert_objects(model, objs, batch_size):
+    """
+    INSERT пачками, как при loaddata (raw): значения берутся из объектов
+    без pre_save, поэтому auto_now_add не затирает даты из CSV, а поля
+    модели остаются нетронутыми.
+    """
+    fields = model._meta.concrete_fields
+    batch_size = min(
+        batch_size, connection.ops.bulk_batch_size(fields, objs) or batch_size
+    )
+    for start in range(0, len(objs), batch_size):
+        model._base_manager._insert(
+            objs[start:start + batch_size], fields=fields, raw=True
+        )
 
 
 class Command(BaseCommand):
     """
     Запуск произвести командой python manage.py csv_import
-    Заполнить базу можно только один раз, при повторном заполнении
-    появится ошибка.
-    Для удаления БД можно просто удалить файл db.sqlite3
-    """
-    def handle(self, *args, **kwargs):
-        for model, csv_f in TABLES.items():
-            with open(
-                f'{settings.BASE_DIR}/static/data/{csv_f}',
-                newline='',
-                encoding='utf-8'
-            ) as csv_file:
-                reader = csv.DictReader(csv_file, delimiter=',')
-                if csv_f == 'titles.csv':
-                    for data in reader:
-                        category = Category.objects.get(
-                            pk=data.pop('category')
-                        )
-                        obj = model(
-                            category=category,
-                            **data
-                        )
-                        obj.save()
-                elif csv_f in ['review.csv', 'comments.csv']:
-                    for data in reader:
-                        user = User.objects.get(pk=data.pop('author'))
-                        obj = model(
-                            author=user,
-                            **data
-                        )
-                        obj.save()
+    Каждая таблица загружается пачками INSERT в своей транзакции.
+    Загруженные файлы отмечаются в ImportedFile, поэтому после сбоя
+    повторный запуск продолжит с первой незагруженной таблицы.
+    С флагом --upsert неизменённые файлы (по контрольной сумме)
+    пропускаются, а в изменённых применяются только добавленные,
+    изменённые и удалённые по первичному ключу строки.
+    Для полной перезагрузки можно просто удалить файл db.sqlite3
+    """
+    help = 'Загружает данные из CSV-файлов в базу.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=Path(settings.BASE_DIR) / 'static' / 'data',
+            type=Path,
+            help='Каталог с CSV-файлами.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10_000,
+            help='Количество строк в одной пачке INSERT.'
+        )
+        parser.add_argument(
+            '--upsert',
+            action='store_true',
+            help='Обновить базу по изменённым файлам, применив только разницу.'
+        )
+
+    def report(self, csv_path, loaded, started):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{csv_path.name}: {loaded} строк, '
+            f'{loaded / max(elapsed, 1e-9):.0f} строк/с'
+        )
+
+    def load_table(self, csv_path, model, columns, batch_size):
+        started = time.perf_counter()
+        loaded = 0
+        loaded_ids = IdRanges()
+        for chunk in read_chunks(csv_path, columns, batch_size):
+            objs = [model(**row) for row in chunk]
+            insert_objects(model, objs, batch_size)
+            loaded_ids.update(model._meta.pk.to_python(obj.pk) for obj in objs)
+            loaded += len(chunk)
+            self.report(csv_path, loaded, started)
+        reset_sequences(model)
+        if model is Title:
+            get_backend().rebuild()
+        if model is Review:
+            Title.recalculate_ratings()
+        return loaded, loaded_ids
+
+    def upsert_table(self, csv_path, model, columns, batch_size,
+                     previous_ids):
+        """
+        Сравнивает файл с таблицей по первичному ключу пачками
+        и применяет только разницу: INSERT, bulk_update и delete.
+        Удаляются только строки прошлой загрузки этого файла
+        (previous_ids), которых в нём больше нет; строки, созданные
+        через API, не трогаются.
+        """
+        started = time.perf_counter()
+        fields = {}
+        seen_ids = IdRanges()
+        touched_titles = set()
+        inserted = updated = loaded = 0
+        for chunk in read_chunks(csv_path, columns, batch_size):
+            if not fields:
+                fields = {
+                    name: model._meta.get_field(name) for name in chunk[0]
+                }
+            rows = {
+                row['id']: row for row in (
+                    {
+                        name: fields[name].to_python(value)
+                        for name, value in row.items()
+                    }
+                    for row in chunk
+                )
+            }
+            new_objs, changed_objs, changed_titles = self.diff_chunk(
+                model, fields, rows
+            )
+            touched_titles.update(changed_titles)
+            insert_objects(model, new_objs, batch_size)
+            model.objects.bulk_update(
+                changed_objs,
+                [name for name in fields if name != 'id'],
+                batch_size=batch_size
+            )
+            if model is Title:
+                get_backend().index_titles(Title.objects.filter(
+                    pk__in=[obj.pk for obj in new_objs + changed_objs]
+                ))
+            if model is Review:
+                touched_titles.update(
+                    obj.title_id for obj in new_objs + changed_objs
+                )
+            if model is User and changed_objs:
+                # bulk_update не вызывает post_save: токены изменённых
+                # пользователей отзываются явно, иначе смена роли в
+                # файле не лишит прав до истечения токена.
+                revoke_tokens(obj.pk for obj in changed_objs)
+            seen_ids.update(rows)
+            inserted += len(new_objs)
+            updated += len(changed_objs)
+            loaded += len(chunk)
+            self.report(csv_path, loaded, started)
+
+        deleted = self.delete_stale(
+            model, previous_ids.difference(seen_ids), batch_size
+        )
+        reset_sequences(model)
+        if touched_titles:
+            Title.recalculate_ratings(
+                Title.objects.filter(pk__in=touched_titles)
+            )
+        self.stdout.write(
+            f'{csv_path.name}: добавлено {inserted}, изменено {updated}, '
+            f'удалено {deleted}'
+        )
+        return loaded, seen_ids
+
+    @staticmethod
+    def diff_chunk(model, fields, rows):
+        """
+        Делит пачку строк файла на новые и изменённые относительно БД.
+        Для отзывов возвращает и прежние произведения изменённых строк.
+        """
+        existing = {
+            row['id']: row
+            for row in model.objects.filter(pk__in=rows).values(*fields)
+        }
+        new_objs, changed_objs, changed_titles = [], [], set()
+        for pk, row in rows.items():
+            if pk not in existing:
+                new_objs.append(model(**row))
+            elif existing[pk] != row:
+                changed_objs.append(model(**row))
+                if model is Review:
+                    changed_titles.add(existing[pk]['title_id'])
+        return new_objs, changed_objs, changed_titles
+
+    @staticmethod
+    def delete_stale(model, stale_ids, batch_size):
+        """
+        Удаляет строки, пропавшие из файла, пачками по диапазонам id.
+        Удаление идёт через ORM: каскады и сигналы (рейтинг, поисковый
+        индекс) отрабатывают как при удалении через API.
+        """
+        for start, end in stale_ids:
+            for low in range(start, end + 1, batch_size):
+                model.objects.filter(
+                    pk__range=(low, min(low + batch_size - 1, end))
+                ).delete()
+        return len(stale_ids)
+
+    def previous_ids(self, previous):
+        """
+        id строк прошлой загрузки файла. Если их нет (файл не загружался
+        или загружен до появления ImportedFile.ids), ничего не удаляем.
+        """
+        if previous is None or previous.ids is None:
+            if previous is not None:
+                self.stdout.write(
+                    f'{previous.file_name}: нет списка загруженных строк, '
+                    f'удаление пропущено'
+                )
+            return IdRanges()
+        return IdRanges.unpack(previous.ids)
+
+    def handle(self, *args, **options):
+        data_path = options['path']
+        upsert = options['upsert']
+        imported = {
+            imported_file.file_name: imported_file
+            for imported_file in ImportedFile.objects.all()
+        }
+        for csv_name, model, columns in TABLES:
+            csv_path = data_path / csv_name
+            if not csv_path.exists():
+                raise CommandError(f'Не найден файл {csv_path}')
+            checksum = file_checksum(csv_path)
+            previous = imported.get(csv_name)
+            if previous and (not upsert or previous.checksum == checksum):
+                self.stdout.write(f'{csv_name}: уже загружен, пропускаем')
+                continue
+            started = time.perf_counter()
+            with transaction.atomic():
+                if upsert and (previous or model.objects.exists()):
+                    loaded, loaded_ids = self.upsert_table(
+                        csv_path, model, columns, options['batch_size'],
+                        self.previous_ids(previous)
+                    )
                 else:
-                    model.objects.bulk_create(
-                        [model(**data) for data in reader])
+                    loaded, loaded_ids = self.load_table(
+                        csv_path, model, columns, options['batch_size']
+                    )
+                ImportedFile.objects.update_or_create(
+                    file_name=csv_name,
+                    defaults={
+                        'checksum': checksum,
+                        'rows': loaded,
+                        'ids': loaded_ids.pack(),
+                    }
+                )
+                # Загрузка обходит сигналы: сбрасываем все ETag.
+                ContentVersion.bump_all()
+            self.stdout.write(self.style.SUCCESS(
+                f'{csv_name}: обработано {loaded} строк '
+                f'за {time.perf_counter() - started:.1f} с'
+            ))
         self.stdout.write(self.style.SUCCESS('Данные загружены'))
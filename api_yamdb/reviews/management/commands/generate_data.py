@@ -0,0 +1,350 @@
+import csv
+import random
+import time
+from bisect import bisect
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate, islice
+from pathlib import Path
+
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+from reviews.models import ContentVersion, Title
+from search.backends import get_backend
+
+from .csv_import import TABLES, reset_sequences
+
+# Заголовки совпадают с файлами static/data, чтобы csv_import их читал.
+HEADERS = {
+    'users.csv': ('id', 'username', 'email', 'role', 'bio',
+                  'first_name', 'last_name'),
+    'category.csv': ('id', 'name', 'slug'),
+    'genre.csv': ('id', 'name', 'slug'),
+    'titles.csv': ('id', 'name', 'year', 'category'),
+    'genre_title.csv': ('id', 'title_id', 'genre_id'),
+    'review.csv': ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+    'comments.csv': ('id', 'review_id', 'text', 'author', 'pub_date'),
+}
+SYLLABLES = (
+    'ба', 'ве', 'го', 'да', 'же', 'зи', 'ко', 'ла', 'ми', 'но', 'пу', 'ры',
+    'са', 'ти', 'фу', 'ха', 'це', 'чи', 'ша', 'юн', 'яр', 'ост', 'ран', 'вел',
+)
+# Оценки смещены к высоким, как в настоящих отзывах.
+SCORE_WEIGHTS = (1, 1, 2, 3, 5, 7, 10, 12, 9, 6)
+START_DATE = datetime(2015, 1, 1, tzinfo=timezone.utc)
+DATE_RANGE_SECONDS = 8 * 365 * 24 * 3600
+
+
+def skewed_index(rnd, size, skew):
+    """
+    Индекс из [0, size) со степенным смещением к началу:
+    чем больше skew, тем популярнее первые элементы.
+    """
+    return min(int(size * rnd.random() ** skew), size - 1)
+
+
+def zipf_counts(total, size, exponent, cap):
+    """
+    Раскладывает total по size элементам по закону Ципфа,
+    не больше cap на элемент; излишек уходит менее популярным.
+    """
+    weights = [1 / (rank + 1) ** exponent for rank in range(size)]
+    counts = [0] * size
+    remaining = min(total, size * cap)
+    active = list(range(size))
+    while remaining and active:
+        scale = remaining / sum(weights[index] for index in active)
+        added = 0
+        for index in active:
+            add = min(cap - counts[index], int(weights[index] * scale))
+            counts[index] += add
+            added += add
+        if not added:
+            for index in active[:remaining]:
+                counts[index] += 1
+                added += 1
+        remaining -= added
+        active = [index for index in active if counts[index] < cap]
+    return counts
+
+
+class DataGenerator:
+    """
+    Генератор строк для всех таблиц; строки - кортежи в порядке HEADERS.
+    """
+
+    def __init__(self, options):
+        self.options = options
+        self.rnd = random.Random(options['seed'])
+        self.words = sorted({
+            ''.join(self.rnd.choices(SYLLABLES, k=self.rnd.randint(2, 4)))
+            for _ in range(5000)
+        })
+        # Готовый набор текстов: склеивать слова на каждую из миллионов
+        # строк заметно дороже самой вставки.
+        self.texts = [
+            ' '.join(
+                self.rnd.choices(self.words, k=self.rnd.randint(2, 20))
+            ).capitalize()
+            for _ in range(10_000)
+        ]
+        self.score_cum_weights = list(accumulate(SCORE_WEIGHTS))
+        self.review_count = 0
+
+    def text(self):
+        return self.texts[int(self.rnd.random() * len(self.texts))]
+
+    def score(self):
+        return bisect(
+            self.score_cum_weights,
+            self.rnd.random() * self.score_cum_weights[-1]
+        ) + 1
+
+    def date(self):
+        return START_DATE + timedelta(
+            seconds=int(self.rnd.random() * DATE_RANGE_SECONDS)
+        )
+
+    def users(self):
+        for pk in range(1, self.options['users'] + 1):
+            role = self.rnd.choices(
+                ('user', 'moderator', 'admin'), (97, 2, 1)
+            )[0]
+            yield (pk, f'user{pk}', f'user{pk}@yamdb.fake', role, '', '', '')
+
+    def categories(self):
+        for pk in range(1, self.options['categories'] + 1):
+            yield (pk, f'Категория {pk}', f'category-{pk}')
+
+    def genres(self):
+        for pk in range(1, self.options['genres'] + 1):
+            yield (pk, f'Жанр {pk}', f'genre-{pk}')
+
+    def titles(self):
+        categories = self.options['categories']
+        for pk in range(1, self.options['titles'] + 1):
+            name = self.rnd.choices(self.words, k=self.rnd.randint(1, 4))
+            yield (
+                pk,
+                ' '.join(name).capitalize(),
+                self.rnd.randint(1900, 2022),
+                skewed_index(self.rnd, categories, 2) + 1,
+            )
+
+    def genre_links(self):
+        genres = self.options['genres']
+        pk = 0
+        for title_id in range(1, self.options['titles'] + 1):
+            links = {
+                skewed_index(self.rnd, genres, 2) + 1
+                for _ in range(self.rnd.randint(1, 3))
+            }
+            for genre_id in sorted(links):
+                pk += 1
+                yield (pk, title_id, genre_id)
+
+    def pick_authors(self, count):
+        """
+        Разные авторы для одного произведения (ограничение unique_review),
+        активные пользователи встречаются чаще.
+        """
+        users = self.options['users']
+        if count * 2 >= users:
+            return self.rnd.sample(range(1, users + 1), count)
+        authors = set()
+        while len(authors) < count:
+            authors.add(skewed_index(self.rnd, users, 2) + 1)
+        return authors
+
+    def reviews(self):
+        counts = zipf_counts(
+            self.options['reviews'], self.options['titles'],
+            self.options['skew'], self.options['users']
+        )
+        # Популярность не должна совпадать с порядком id произведений.
+        self.rnd.shuffle(counts)
+        pk = 0
+        for title_id, count in enumerate(counts, 1):
+            for author in self.pick_authors(count):
+                pk += 1
+                yield (
+                    pk, title_id, self.text(), author, self.score(),
+                    self.date(),
+                )
+        self.review_count = pk
+
+    def comments(self):
+        reviews = self.review_count
+        users = self.options['users']
+        if not reviews:
+            return
+        for pk in range(1, self.options['comments'] + 1):
+            yield (
+                pk,
+                skewed_index(self.rnd, reviews, self.options['skew']) + 1,
+                self.text(),
+                skewed_index(self.rnd, users, 2) + 1,
+                self.date(),
+            )
+
+    def tables(self):
+        return (
+            ('users.csv', self.users),
+            ('category.csv', self.categories),
+            ('genre.csv', self.genres),
+            ('titles.csv', self.titles),
+            ('genre_title.csv', self.genre_links),
+            ('review.csv', self.reviews),
+            ('comments.csv', self.comments),
+        )
+
+
+class CsvWriter:
+    """Пишет таблицы в CSV-файлы в формате static/data."""
+
+    def __init__(self, path):
+        self.path = path
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def write(self, csv_name, rows, batch_size):
+        with open(self.path / csv_name, 'w', newline='',
+                  encoding='utf-8') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(HEADERS[csv_name])
+            rows = iter(rows)
+            while True:
+                batch = [
+                    [
+                        value.isoformat() if isinstance(value, datetime)
+                        else value for value in row
+                    ]
+                    for row in islice(rows, batch_size)
+                ]
+                if not batch:
+                    break
+                writer.writerows(batch)
+                yield len(batch)
+
+    def finish(self):
+        pass
+
+
+class DatabaseWriter:
+    """
+    Пишет таблицы прямо в БД пачками executemany без создания моделей.
+    Столбцы, которых нет в CSV, заполняются значениями по умолчанию.
+    """
+
+    def __init__(self):
+        self.models = {csv_name: (model, columns)
+                       for csv_name, model, columns in TABLES}
+        if connection.vendor == 'sqlite':
+            # Индексы больших таблиц обновляются вразброс; с кэшем страниц
+            # в 256 МБ вставка не упирается в чтение с диска.
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA cache_size = -262144')
+
+    def write(self, csv_name, rows, batch_size):
+        model, columns = self.models[csv_name]
+        given = [
+            model._meta.get_field(columns.get(name, name))
+            for name in HEADERS[csv_name]
+        ]
+        given_names = {field.attname for field in given}
+        defaults = [
+            (field, field.get_default())
+            for field in model._meta.concrete_fields
+            if field.attname not in given_names
+        ]
+        fields = given + [field for field, _ in defaults]
+        default_values = tuple(
+            field.get_db_prep_save(value, connection)
+            for field, value in defaults
+        )
+        datetime_positions = [
+            position for position, field in enumerate(given)
+            if field.get_internal_type() == 'DateTimeField'
+        ]
+        adapt_datetime = connection.ops.adapt_datetimefield_value
+        if connection.vendor == 'sqlite':
+            # Даты генерируются в UTC, а SQLite хранит наивное время UTC:
+            # полный адаптер Django здесь дороже самой вставки строки.
+            def adapt_datetime(value):
+                return str(value.replace(tzinfo=None))
+        quote = connection.ops.quote_name
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            quote(model._meta.db_table),
+            ', '.join(quote(field.column) for field in fields),
+            ', '.join(['%s'] * len(fields)),
+        )
+        with transaction.atomic(), connection.cursor() as cursor:
+            rows = iter(rows)
+            while True:
+                batch = [list(row) for row in islice(rows, batch_size)]
+                if not batch:
+                    break
+                for row in batch:
+                    for position in datetime_positions:
+                        row[position] = adapt_datetime(row[position])
+                cursor.executemany(
+                    sql, [tuple(row) + default_values for row in batch]
+                )
+                yield len(batch)
+        reset_sequences(model)
+
+    def finish(self):
+        Title.recalculate_ratings()
+        get_backend().rebuild()
+        ContentVersion.bump_all()
+
+
+class Command(BaseCommand):
+    """
+    Генерация синтетических данных для нагрузочного тестирования:
+    python manage.py generate_data --reviews 10000000
+    python manage.py generate_data --output /tmp/yamdb && \\
+        python manage.py csv_import --path /tmp/yamdb
+    Популярность произведений распределена по Ципфу, данные
+    воспроизводимы при одинаковом --seed. Рассчитан на пустую базу.
+    """
+    help = 'Генерирует синтетические данные в БД или в CSV для csv_import.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10_000)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=50)
+        parser.add_argument('--titles', type=int, default=100_000)
+        parser.add_argument('--reviews', type=int, default=1_000_000)
+        parser.add_argument('--comments', type=int, default=1_000_000)
+        parser.add_argument(
+            '--skew',
+            type=float,
+            default=1.1,
+            help='Показатель Ципфа для популярности произведений.'
+        )
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument(
+            '--output',
+            type=Path,
+            help='Каталог для CSV; без него данные пишутся в БД.'
+        )
+
+    def handle(self, *args, **options):
+        generator = DataGenerator(options)
+        writer = (
+            CsvWriter(options['output']) if options['output']
+            else DatabaseWriter()
+        )
+        for csv_name, rows in generator.tables():
+            started = time.perf_counter()
+            written = 0
+            for count in writer.write(
+                csv_name, rows(), options['batch_size']
+            ):
+                written += count
+            elapsed = max(time.perf_counter() - started, 1e-9)
+            self.stdout.write(
+                f'{csv_name}: {written} строк, {written / elapsed:.0f} строк/с'
+            )
+        writer.finish()
+        self.stdout.write(self.style.SUCCESS('Данные сгенерированы'))
@@ -0,0 +1,27 @@
+# Generated by Django 3.2 on 2026-10-18 21:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_cursor_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportedFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField(max_length=255, unique=True, verbose_name='имя файла')),
+                ('rows', models.PositiveBigIntegerField(verbose_name='загружено строк')),
+                ('imported_at', models.DateTimeField(auto_now=True, verbose_name='дата загрузки')),
+            ],
+            options={
+                'verbose_name': 'Загруженный файл',
+                'verbose_name_plural': 'Загруженные файлы',
+                'ordering': ['file_name'],
+            },
+        ),
+    ]
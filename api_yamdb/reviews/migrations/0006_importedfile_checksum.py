@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-18 21:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_importedfile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importedfile',
+            name='checksum',
+            field=models.CharField(blank=True, max_length=64, verbose_name='контрольная сумма'),
+        ),
+    ]
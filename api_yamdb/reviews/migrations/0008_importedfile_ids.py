@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-18 22:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_title_year_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importedfile',
+            name='ids',
+            field=models.BinaryField(null=True, verbose_name='id загруженных строк'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 3.2 on 2026-10-18 22:34
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_importedfile_ids'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=100, unique=True, verbose_name='область')),
+                ('version', models.PositiveBigIntegerField(default=0, verbose_name='версия')),
+                ('modified', models.DateTimeField(default=django.utils.timezone.now, verbose_name='дата изменения')),
+            ],
+            options={
+                'verbose_name': 'Версия данных',
+                'verbose_name_plural': 'Версии данных',
+            },
+        ),
+    ]
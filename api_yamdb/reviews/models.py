@@ -1,6 +1,9 @@
 from django.contrib.auth import get_user_model
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, FloatField, OuterRef, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
 
 from .validators import validate_year
 
@@ -48,6 +51,13 @@ class Genre(models.Model):
 
 
 class Title(models.Model):
+    """
+    Модель Title - произведение.
+    Поля score_sum, review_count и rating хранят агрегаты по отзывам
+    и обновляются при каждом изменении отзыва (см. reviews/signals.py).
+    """
+    RATING_FIELDS = ('score_sum', 'review_count', 'rating')
+
     name = models.CharField(
         'название',
         max_length=256
@@ -75,15 +85,91 @@ class Title(models.Model):
         null=True,
         blank=True
     )
+    score_sum = models.PositiveIntegerField(
+        'сумма оценок',
+        default=0,
+        editable=False
+    )
+    review_count = models.PositiveIntegerField(
+        'количество отзывов',
+        default=0,
+        editable=False
+    )
+    rating = models.FloatField(
+        'рейтинг',
+        null=True,
+        blank=True,
+        editable=False
+    )
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
         ordering = ['category', 'name']
+        indexes = [
+            models.Index(fields=('name', 'id'), name='title_name_id_idx'),
+            models.Index(
+                fields=('year', 'name', 'id'), name='title_year_name_id_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Агрегаты рейтинга меняются только через apply_review_delta,
+        # иначе сохранение устаревшего экземпляра затрёт свежие значения.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.RATING_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def apply_review_delta(cls, title_id, score_delta, count_delta=0):
+        """
+        Изменяет сумму оценок и число отзывов произведения и пересчитывает
+        рейтинг на стороне БД одним UPDATE: выражения в SET читают
+        значения строки до изменения.
+        """
+        cls.objects.filter(pk=title_id).update(
+            score_sum=F('score_sum') + score_delta,
+            review_count=F('review_count') + count_delta,
+            rating=cls._rating_expression(
+                F('score_sum') + score_delta,
+                F('review_count') + count_delta,
+            ),
+        )
+
+    @classmethod
+    def recalculate_ratings(cls, queryset=None):
+        """
+        Полностью пересчитывает агрегаты по таблице отзывов.
+        Нужен после массовой загрузки, которая обходит сигналы.
+        """
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        titles = cls.objects.all() if queryset is None else queryset
+        score_sum = Coalesce(
+            Subquery(reviews.annotate(total=Sum('score')).values('total')), 0
+        )
+        review_count = Coalesce(
+            Subquery(reviews.annotate(total=Count('pk')).values('total')), 0
+        )
+        titles.update(
+            score_sum=score_sum,
+            review_count=review_count,
+            rating=cls._rating_expression(score_sum, review_count),
+        )
+
+    @staticmethod
+    def _rating_expression(score_sum=F('score_sum'),
+                           review_count=F('review_count')):
+        return Cast(score_sum, FloatField()) / NullIf(review_count, 0)
+
 
 class Review(models.Model):
     """
@@ -119,6 +205,12 @@ class Review(models.Model):
         ordering = ['-pub_date']
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
+        indexes = [
+            models.Index(
+                fields=('title', 'pub_date', 'id'),
+                name='review_title_pub_date_idx'
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=('title', 'author', ),
@@ -128,6 +220,19 @@ class Review(models.Model):
     def __str__(self):
         return self.text
 
+    def save(self, *args, **kwargs):
+        # Отзыв и агрегаты произведения (post_save) пишутся одной транзакцией.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем исходную оценку, чтобы при редактировании
+        # изменить рейтинг произведения на разницу, а не пересчитывать его.
+        instance._loaded_score = instance.__dict__.get('score')
+        return instance
+
 
 class Comment(models.Model):
     """
@@ -156,6 +261,128 @@ class Comment(models.Model):
         ordering = ['-pub_date']
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=('review', 'pub_date', 'id'),
+                name='comment_review_pub_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text
+
+
+class ImportedFile(models.Model):
+    """
+    Модель ImportedFile - отметка о загруженном командой csv_import файле.
+    Пишется в той же транзакции, что и данные таблицы, поэтому повторный
+    запуск после сбоя пропускает уже загруженные файлы, а по контрольной
+    сумме режим --upsert узнаёт, что файл не изменился. В ids хранятся
+    первичные ключи загруженных из файла строк: --upsert удаляет только
+    те из них, что пропали из файла, а не строки, созданные через API.
+    """
+    file_name = models.CharField(
+        'имя файла',
+        max_length=255,
+        unique=True
+    )
+    checksum = models.CharField(
+        'контрольная сумма',
+        max_length=64,
+        blank=True
+    )
+    rows = models.PositiveBigIntegerField('загружено строк')
+    ids = models.BinaryField(
+        'id загруженных строк',
+        null=True,
+        editable=False
+    )
+    imported_at = models.DateTimeField(
+        'дата загрузки',
+        auto_now=True
+    )
+
+    class Meta:
+        ordering = ['file_name']
+        verbose_name = 'Загруженный файл'
+        verbose_name_plural = 'Загруженные файлы'
+
+    def __str__(self):
+        return self.file_name
+
+
+class ContentVersion(models.Model):
+    """
+    Модель ContentVersion - версия области данных для ETag и
+    Last-Modified (api.conditional). Область - модель целиком
+    ('reviews.title') или один объект ('reviews.title:5'). Версии
+    хранятся в БД, поэтому общие для всех процессов, и растут в той же
+    транзакции, что и данные. Строка объекта появляется при первом его
+    изменении и удаляется вместе с объектом: первичные ключи заново не
+    выдаются, а csv_import, который сбрасывает счётчики, поднимает ALL.
+    Область ALL входит во все ETag: её поднимают команды, которые пишут
+    в обход сигналов.
+    """
+    ALL = '*'
+    BATCH_SIZE = 500
+
+    scope = models.CharField(
+        'область',
+        max_length=100,
+        unique=True
+    )
+    version = models.PositiveBigIntegerField('версия', default=0)
+    modified = models.DateTimeField('дата изменения', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Версия данных'
+        verbose_name_plural = 'Версии данных'
+
+    def __str__(self):
+        return f'{self.scope}: {self.version}'
+
+    @classmethod
+    def current(cls, scopes):
+        """
+        Версии и даты изменения областей (вместе с ALL) одним запросом.
+        Область, которая ещё не менялась, имеет версию 0 и не имеет даты.
+        """
+        scopes = (cls.ALL, *scopes)
+        found = {
+            scope: (version, modified)
+            for scope, version, modified in cls.objects.filter(
+                scope__in=scopes
+            ).values_list('scope', 'version', 'modified')
+        }
+        return {scope: found.get(scope, (0, None)) for scope in scopes}
+
+    @classmethod
+    def batches(cls, scopes):
+        scopes = list(dict.fromkeys(scopes))
+        for start in range(0, len(scopes), cls.BATCH_SIZE):
+            yield scopes[start:start + cls.BATCH_SIZE]
+
+    @classmethod
+    def bump(cls, scopes):
+        now = timezone.now()
+        for batch in cls.batches(scopes):
+            updated = cls.objects.filter(scope__in=batch).update(
+                version=F('version') + 1, modified=now
+            )
+            if updated < len(batch):
+                # Уже существующие области пропускаются как конфликты.
+                cls.objects.bulk_create(
+                    [cls(scope=scope, version=1, modified=now)
+                     for scope in batch],
+                    ignore_conflicts=True
+                )
+
+    @classmethod
+    def forget(cls, scopes):
+        """Удаляет области удалённых объектов."""
+        for batch in cls.batches(scopes):
+            cls.objects.filter(scope__in=batch).delete()
+
+    @classmethod
+    def bump_all(cls):
+        cls.bump([cls.ALL])
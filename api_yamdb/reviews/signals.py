@@ -0,0 +1,59 @@
+from collections import defaultdict
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .cascades import DeleteBatch
+from .models import Review, Title, User
+
+RECALCULATE_BATCH_SIZE = 500
+
+
+@receiver(post_save, sender=Review)
+def update_title_rating_on_save(sender, instance, created, **kwargs):
+    """
+    Учитывает новый отзыв или изменение оценки в рейтинге произведения.
+    """
+    if created:
+        score_delta, count_delta = instance.score, 1
+    else:
+        loaded_score = getattr(instance, '_loaded_score', None)
+        if loaded_score is None:
+            Title.recalculate_ratings(
+                Title.objects.filter(pk=instance.title_id)
+            )
+            return
+        if loaded_score == instance.score:
+            return
+        score_delta, count_delta = instance.score - loaded_score, 0
+    Title.apply_review_delta(instance.title_id, score_delta, count_delta)
+    instance._loaded_score = instance.score
+
+
+def update_title_ratings_on_delete(deleted):
+    """
+    Убирает оценки удалённых отзывов из рейтинга произведений.
+    Каскадное удаление пользователя или произведения обрабатывается
+    целиком: удаляемые произведения не пересчитываются, остальные
+    пересчитываются пачкой, а не по запросу на каждый отзыв.
+    """
+    removed = {title.pk for title in deleted[Title]}
+    deltas = defaultdict(lambda: [0, 0])
+    for review in deleted[Review]:
+        if review.title_id not in removed:
+            deltas[review.title_id][0] -= review.score
+            deltas[review.title_id][1] -= 1
+    if len(deltas) == 1:
+        (title_id, (score_delta, count_delta)), = deltas.items()
+        Title.apply_review_delta(title_id, score_delta, count_delta)
+        return
+    title_ids = sorted(deltas)
+    for start in range(0, len(title_ids), RECALCULATE_BATCH_SIZE):
+        Title.recalculate_ratings(Title.objects.filter(
+            pk__in=title_ids[start:start + RECALCULATE_BATCH_SIZE]
+        ))
+
+
+DeleteBatch('title_ratings', update_title_ratings_on_delete).connect(
+    Title, User, Review
+)
@@ -0,0 +1,163 @@
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from reviews.models import Title
+
+WORD_RE = re.compile(r'\w+')
+
+
+class BaseSearchBackend:
+    """
+    Интерфейс поискового индекса произведений.
+    Бэкенд индексирует name и description и умеет отфильтровать
+    queryset произведений по запросу, упорядочив его по релевантности.
+    """
+
+    def setup(self):
+        """Создать структуры индекса, если их ещё нет."""
+
+    def index_titles(self, titles):
+        """Добавить или обновить произведения в индексе."""
+        raise NotImplementedError
+
+    def remove_titles(self, title_ids):
+        """Удалить произведения из индекса."""
+        raise NotImplementedError
+
+    def rebuild(self):
+        """Перестроить индекс по всей таблице произведений."""
+        raise NotImplementedError
+
+    def filter_queryset(self, queryset, query):
+        """Отфильтровать произведения по запросу и упорядочить по рангу."""
+        raise NotImplementedError
+
+
+class IcontainsSearchBackend(BaseSearchBackend):
+    """
+    Запасной бэкенд без собственного индекса для СУБД без FTS5:
+    поиск подстрок через icontains, имена выше описаний.
+    """
+
+    def index_titles(self, titles):
+        pass
+
+    def remove_titles(self, title_ids):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def filter_queryset(self, queryset, query):
+        words = WORD_RE.findall(query)
+        if not words:
+            return queryset.none()
+        condition = Q()
+        for word in words:
+            condition &= (
+                Q(name__icontains=word) | Q(description__icontains=word)
+            )
+        return queryset.filter(condition)
+
+
+class SqliteFTS5Backend(BaseSearchBackend):
+    """
+    Инвертированный индекс на виртуальной таблице SQLite FTS5.
+    rowid строки индекса совпадает с id произведения; ранжирование bm25
+    с большим весом для названия.
+    """
+    table = 'search_title_fts'
+    tokenizer = 'unicode61 remove_diacritics 2'
+    name_weight = 10.0
+    description_weight = 1.0
+
+    def setup(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} '
+                f'USING fts5(name, description, tokenize="{self.tokenizer}")'
+            )
+
+    def index_titles(self, titles):
+        rows = [
+            (title.pk, title.name, title.description or '')
+            for title in titles
+        ]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {self.table} WHERE rowid = %s',
+                [(row[0],) for row in rows]
+            )
+            cursor.executemany(
+                f'INSERT INTO {self.table}(rowid, name, description) '
+                f'VALUES (%s, %s, %s)',
+                rows
+            )
+
+    def remove_titles(self, title_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {self.table} WHERE rowid = %s',
+                [(title_id,) for title_id in title_ids]
+            )
+
+    def rebuild(self):
+        self.setup()
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            cursor.execute(
+                f'INSERT INTO {self.table}(rowid, name, description) '
+                f'SELECT id, name, COALESCE(description, \'\') '
+                f'FROM {Title._meta.db_table}'
+            )
+            cursor.execute(
+                f'INSERT INTO {self.table}({self.table}) VALUES (\'optimize\')'
+            )
+
+    @staticmethod
+    def build_match(query):
+        """
+        Превращает пользовательский ввод в безопасный запрос FTS5:
+        каждое слово ищется как префикс, все слова обязательны.
+        """
+        return ' '.join(f'"{word}"*' for word in WORD_RE.findall(query))
+
+    def filter_queryset(self, queryset, query):
+        match = self.build_match(query)
+        if not match:
+            return queryset.none()
+        title_table = Title._meta.db_table
+        # Соединение с виртуальной таблицей, а не коррелированный подзапрос:
+        # MATCH выполняется один раз на весь запрос.
+        return queryset.extra(
+            tables=[self.table],
+            where=[
+                f'{self.table}.rowid = "{title_table}"."id"',
+                f'{self.table} MATCH %s',
+            ],
+            params=[match],
+            select={
+                'search_rank': f'bm25({self.table}, %s, %s)',
+            },
+            select_params=(self.name_weight, self.description_weight),
+        ).order_by('search_rank', 'name', 'id')
+
+
+@lru_cache(maxsize=None)
+def load_backend(path):
+    return import_string(path)()
+
+
+def get_backend():
+    """
+    Экземпляр бэкенда из settings.SEARCH_BACKEND. Настройка читается
+    при каждом вызове, поэтому override_settings меняет бэкенд.
+    """
+    return load_backend(settings.SEARCH_BACKEND)
@@ -0,0 +1,15 @@
+from django.core.management import BaseCommand
+from search.backends import get_backend
+
+
+class Command(BaseCommand):
+    """
+    Перестроение поискового индекса произведений:
+    python manage.py rebuild_search_index
+    Нужно после массовой загрузки данных, которая обходит сигналы.
+    """
+    help = 'Перестраивает поисковый индекс произведений.'
+
+    def handle(self, *args, **options):
+        get_backend().rebuild()
+        self.stdout.write(self.style.SUCCESS('Поисковый индекс перестроен'))
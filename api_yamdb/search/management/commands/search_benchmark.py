@@ -0,0 +1,101 @@
+import random
+import statistics
+import time
+
+from django.core.management import BaseCommand
+from django.db import transaction
+from reviews.models import Title
+from search.backends import get_backend
+
+from api.filters import FilterTitle
+
+SYLLABLES = (
+    'ба', 'ве', 'го', 'да', 'же', 'зи', 'ко', 'ла', 'ми', 'но', 'пу', 'ры',
+    'са', 'ти', 'фу', 'ха', 'це', 'чи', 'ша', 'юн', 'яр', 'ост', 'ран', 'вел',
+)
+
+
+def make_vocabulary(rnd, size):
+    """Словарь псевдослов, чтобы слова встречались с разной частотой."""
+    return sorted({
+        ''.join(rnd.choices(SYLLABLES, k=rnd.randint(2, 4)))
+        for _ in range(size)
+    })
+
+
+class Command(BaseCommand):
+    """
+    Сравнение поиска по индексу с фильтром name (icontains):
+    python manage.py search_benchmark --titles 1000000
+    Недостающие произведения генерируются внутри транзакции, которая
+    по умолчанию откатывается, так что база остаётся прежней.
+    """
+    help = 'Бенчмарк ?search= против ?name= (icontains).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=1_000_000)
+        parser.add_argument('--queries', type=int, default=20)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--vocabulary', type=int, default=20_000)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Не откатывать сгенерированные произведения.'
+        )
+
+    def generate_titles(self, count, batch_size, rnd, words):
+        for start in range(0, count, batch_size):
+            Title.objects.bulk_create(
+                Title(
+                    name=' '.join(rnd.sample(words, 3)),
+                    description=' '.join(rnd.choices(words, k=12)),
+                    year=rnd.randint(1900, 2020),
+                )
+                for _ in range(min(batch_size, count - start))
+            )
+
+    def measure(self, make_queryset, queries):
+        timings = []
+        for query in queries:
+            started = time.perf_counter()
+            queryset = make_queryset(query)
+            queryset.count()
+            list(queryset[:10])
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), max(timings)
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['seed'])
+        words = make_vocabulary(rnd, options['vocabulary'])
+        backend = get_backend()
+        with transaction.atomic():
+            missing = options['titles'] - Title.objects.count()
+            if missing > 0:
+                self.stdout.write(f'Генерация произведений: {missing}')
+                self.generate_titles(
+                    missing, options['batch_size'], rnd, words
+                )
+            started = time.perf_counter()
+            backend.rebuild()
+            self.stdout.write(
+                f'Индекс построен за {time.perf_counter() - started:.1f} с'
+            )
+
+            queries = [rnd.choice(words) for _ in range(options['queries'])]
+            titles = Title.objects.order_by('name')
+            results = {
+                'icontains': self.measure(
+                    lambda q: FilterTitle({'name': q}, titles).qs, queries
+                ),
+                'search': self.measure(
+                    lambda q: FilterTitle({'search': q}, titles).qs, queries
+                ),
+            }
+            for name, (median, worst) in results.items():
+                self.stdout.write(
+                    f'{name:>10}: медиана {median:.1f} мс, '
+                    f'максимум {worst:.1f} мс'
+                )
+            if not options['keep']:
+                transaction.set_rollback(True)
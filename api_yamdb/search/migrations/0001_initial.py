@@ -0,0 +1,41 @@
+from django.db import migrations
+
+# Структура индекса на момент миграции; SqliteFTS5Backend.setup()
+# создаёт ту же таблицу.
+FTS_TABLE = 'search_title_fts'
+FTS_TOKENIZER = 'unicode61 remove_diacritics 2'
+
+
+def create_index(apps, schema_editor):
+    # FTS5 есть только в SQLite, для остальных СУБД поиск идёт через
+    # IcontainsSearchBackend без собственного индекса.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    title_table = apps.get_model('reviews', 'Title')._meta.db_table
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} '
+        f'USING fts5(name, description, tokenize="{FTS_TOKENIZER}")'
+    )
+    schema_editor.execute(
+        f'INSERT INTO {FTS_TABLE}(rowid, name, description) '
+        f'SELECT id, name, COALESCE(description, \'\') FROM {title_table}'
+    )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('reviews', '0004_cursor_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,16 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from reviews.models import Title
+
+from .backends import get_backend
+
+
+@receiver(post_save, sender=Title)
+def index_title(sender, instance, **kwargs):
+    get_backend().index_titles([instance])
+
+
+@receiver(post_delete, sender=Title)
+def unindex_title(sender, instance, **kwargs):
+    get_backend().remove_titles([instance.pk])
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import User
+from .models import OutboxEmail, User
 
 
 @admin.register(User)
@@ -16,3 +16,18 @@ class UserAdmin(admin.ModelAdmin):
     search_fields = ('username',)
     list_filter = ('role',)
     empty_value_display = '-пусто-'
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'subject',
+        'recipients',
+        'status',
+        'attempts',
+        'next_attempt_at',
+        'sent_at',
+    )
+    list_filter = ('status',)
+    readonly_fields = ('created_at', 'sent_at', 'last_error')
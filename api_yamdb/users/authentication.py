@@ -0,0 +1,17 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .tokens import user_from_claims
+
+
+class RoleClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Пользователь берётся из утверждений токена без запроса к БД.
+    Токены без утверждений (выданные раньше) и с отозванной версией
+    проверяются по БД, как в обычной JWTAuthentication.
+    """
+
+    def get_user(self, validated_token):
+        return (
+            user_from_claims(validated_token)
+            or super().get_user(validated_token)
+        )
@@ -0,0 +1,46 @@
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from users.outbox import drain
+
+
+class Command(BaseCommand):
+    """
+    Воркер очереди писем:
+    python manage.py send_emails            # отправить накопившееся и выйти
+    python manage.py send_emails --loop     # работать постоянно
+    Письма отправляются пачками через одно соединение с почтовым
+    сервером; при ошибке письмо повторяется с растущей паузой,
+    после EMAIL_OUTBOX_MAX_ATTEMPTS попыток помечается неотправленным.
+    """
+    help = 'Отправляет письма из очереди users.OutboxEmail.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не выходить, а проверять очередь каждые --interval секунд.'
+        )
+        parser.add_argument('--interval', type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        while True:
+            sent, batches = drain(
+                options['batch_size'], options['max_attempts']
+            )
+            if sent or batches:
+                self.stdout.write(
+                    f'Отправлено писем: {sent}, пачек: {batches}'
+                )
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS('Очередь писем обработана'))
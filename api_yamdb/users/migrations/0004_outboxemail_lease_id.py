@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-18 22:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_outboxemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxemail',
+            name='lease_id',
+            field=models.UUIDField(db_index=True, editable=False, null=True, verbose_name='Аренда'),
+        ),
+    ]
@@ -1,9 +1,14 @@
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import RegexValidator
 from django.db import models
+from django.db.models import F
+from django.utils import timezone
 
 
 class User(AbstractUser):
+    # Поля, от которых зависят утверждения JWT: их изменение
+    # отзывает ранее выданные токены.
+    TOKEN_CLAIM_FIELDS = ('username', 'role', 'is_superuser', 'is_active')
     ROLE = (
         ('user', 'Пользователь'),
         ('moderator', 'Модератор'),
@@ -60,6 +65,18 @@ class User(AbstractUser):
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_claims = instance.claim_values()
+        return instance
+
+    def claim_values(self):
+        # Через __dict__, чтобы не подгружать отложенные поля.
+        return tuple(
+            self.__dict__.get(field) for field in self.TOKEN_CLAIM_FIELDS
+        )
+
     @property
     def is_admin(self):
         return self.role == User.ROLE[2][0]
@@ -70,3 +87,96 @@ class User(AbstractUser):
 
     def __str__(self):
         return self.username
+
+
+class TokenVersion(models.Model):
+    """
+    Версия токенов пользователя. Растёт при смене роли, прав или
+    удалении пользователя; токены с меньшей версией не принимаются
+    на веру и пользователь читается из БД. Хранит id, а не ForeignKey,
+    чтобы запись пережила удаление пользователя.
+    """
+    user_id = models.BigIntegerField('id пользователя', unique=True)
+    version = models.PositiveIntegerField('Версия', default=0)
+
+    class Meta:
+        verbose_name = 'Версия токенов'
+        verbose_name_plural = 'Версии токенов'
+
+    def __str__(self):
+        return f'{self.user_id}: {self.version}'
+
+    @classmethod
+    def current(cls, user_id):
+        return cls.objects.filter(user_id=user_id).values_list(
+            'version', flat=True
+        ).first() or 0
+
+    @classmethod
+    def bump(cls, user_id):
+        updated = cls.objects.filter(user_id=user_id).update(
+            version=F('version') + 1
+        )
+        if not updated:
+            cls.objects.get_or_create(user_id=user_id, defaults={'version': 1})
+
+    @classmethod
+    def bump_many(cls, user_ids):
+        user_ids = set(user_ids)
+        existing = set(cls.objects.filter(user_id__in=user_ids).values_list(
+            'user_id', flat=True
+        ))
+        cls.objects.filter(user_id__in=existing).update(
+            version=F('version') + 1
+        )
+        cls.objects.bulk_create(
+            [cls(user_id=user_id, version=1)
+             for user_id in user_ids - existing],
+            ignore_conflicts=True
+        )
+
+
+class OutboxEmail(models.Model):
+    """
+    Письмо в очереди на отправку. Запрос только записывает строку,
+    отправляет их воркер manage.py send_emails пачками с повторами.
+    """
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS = (
+        (PENDING, 'Ожидает отправки'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Не отправлено'),
+    )
+    subject = models.CharField('Тема', max_length=255)
+    body = models.TextField('Текст')
+    from_email = models.CharField('Отправитель', max_length=254)
+    recipients = models.JSONField('Получатели')
+    status = models.CharField(
+        'Статус', max_length=16, choices=STATUS, default=PENDING
+    )
+    attempts = models.PositiveIntegerField('Попыток', default=0)
+    next_attempt_at = models.DateTimeField(
+        'Следующая попытка', default=timezone.now
+    )
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created_at = models.DateTimeField('Создано', auto_now_add=True)
+    sent_at = models.DateTimeField('Отправлено', null=True, blank=True)
+    lease_id = models.UUIDField(
+        'Аренда', null=True, editable=False, db_index=True
+    )
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = 'Письмо в очереди'
+        verbose_name_plural = 'Очередь писем'
+        indexes = [
+            models.Index(
+                fields=('status', 'next_attempt_at'),
+                name='outbox_status_next_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} -> {", ".join(self.recipients)}'
@@ -0,0 +1,127 @@
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxEmail
+from .signals import email_attempted
+
+
+def enqueue(subject, body, from_email, recipients):
+    """
+    Ставит письмо в очередь. Для быстрых локальных бэкендов из
+    EMAIL_OUTBOX_INLINE_BACKENDS (locmem) письмо отправляется сразу.
+    """
+    email = OutboxEmail.objects.create(
+        subject=subject, body=body, from_email=from_email,
+        recipients=list(recipients),
+    )
+    if settings.EMAIL_BACKEND in settings.EMAIL_OUTBOX_INLINE_BACKENDS:
+        deliver([email])
+    return email
+
+
+def backoff(attempts):
+    """Пауза перед повтором: удваивается с каждой попыткой, до часа."""
+    return timedelta(seconds=min(
+        settings.EMAIL_OUTBOX_BACKOFF * 2 ** (attempts - 1), 3600
+    ))
+
+
+def claim_batch(batch_size):
+    """
+    Забирает пачку писем, которым пора уйти, и откладывает их на время
+    аренды: параллельный воркер их не возьмёт, а если этот воркер упадёт,
+    письма вернутся в очередь после аренды. Аренду решает условный
+    UPDATE: письмо достаётся воркеру, чей UPDATE застал его ещё не
+    арендованным. SELECT FOR UPDATE (где он есть) только разводит
+    воркеров по разным письмам, на SQLite его нет.
+    """
+    now = timezone.now()
+    lease_id = uuid.uuid4()
+    lease = timedelta(seconds=settings.EMAIL_OUTBOX_LEASE)
+    due = OutboxEmail.objects.filter(
+        status=OutboxEmail.PENDING, next_attempt_at__lte=now
+    )
+    with transaction.atomic():
+        candidates = list(
+            due.select_for_update(skip_locked=True).values_list(
+                'pk', flat=True
+            )[:batch_size]
+        )
+        due.filter(pk__in=candidates).update(
+            next_attempt_at=now + lease, lease_id=lease_id
+        )
+    return list(OutboxEmail.objects.filter(lease_id=lease_id))
+
+
+def mark_failed(email, error, max_attempts):
+    email.attempts += 1
+    email.last_error = f'{type(error).__name__}: {error}'
+    if email.attempts >= max_attempts:
+        email.status = OutboxEmail.FAILED
+        email_attempted.send(sender=OutboxEmail, result='failed')
+    else:
+        email.next_attempt_at = timezone.now() + backoff(email.attempts)
+        email_attempted.send(sender=OutboxEmail, result='retry')
+
+
+def deliver(emails, connection=None, max_attempts=None):
+    """
+    Отправляет письма через одно соединение с почтовым сервером
+    и сохраняет результат. Возвращает число отправленных.
+    """
+    max_attempts = max_attempts or settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+    own_connection = connection is None
+    connection = connection or get_connection()
+    sent = 0
+    try:
+        for email in emails:
+            try:
+                # open() не переподключается, если соединение уже открыто.
+                connection.open()
+                EmailMessage(
+                    email.subject, email.body, email.from_email,
+                    email.recipients, connection=connection,
+                ).send()
+            except Exception as error:
+                # После ошибки сервера соединение могло порваться:
+                # следующее письмо откроет его заново.
+                connection.close()
+                mark_failed(email, error, max_attempts)
+                continue
+            email.status = OutboxEmail.SENT
+            email.sent_at = timezone.now()
+            email.attempts += 1
+            email_attempted.send(sender=OutboxEmail, result='sent')
+            sent += 1
+    finally:
+        if own_connection:
+            connection.close()
+        OutboxEmail.objects.bulk_update(
+            emails,
+            ['status', 'attempts', 'last_error', 'next_attempt_at', 'sent_at']
+        )
+    return sent
+
+
+def drain(batch_size, max_attempts=None):
+    """
+    Отправляет все письма, которым пора уйти, пачками по batch_size
+    через одно соединение. Возвращает (отправлено, пачек).
+    """
+    connection = get_connection()
+    sent = batches = 0
+    try:
+        while True:
+            emails = claim_batch(batch_size)
+            if not emails:
+                break
+            sent += deliver(emails, connection, max_attempts)
+            batches += 1
+    finally:
+        connection.close()
+    return sent, batches
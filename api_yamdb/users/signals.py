@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .models import TokenVersion, User
+from .tokens import token_versions
+
+# Попытка отправить письмо из очереди; result - sent, retry или failed.
+email_attempted = Signal()
+
+
+@receiver(post_save, sender=User)
+def revoke_tokens_on_claims_change(sender, instance, created, **kwargs):
+    """
+    Смена роли, прав или имени отзывает выданные токены: их
+    утверждения больше не принимаются без проверки по БД.
+    """
+    claims = instance.claim_values()
+    if not created and getattr(instance, '_loaded_claims', None) != claims:
+        TokenVersion.bump(instance.pk)
+        token_versions.invalidate()
+    instance._loaded_claims = claims
+
+
+@receiver(post_delete, sender=User)
+def revoke_tokens_on_delete(sender, instance, **kwargs):
+    TokenVersion.bump(instance.pk)
+    token_versions.invalidate()
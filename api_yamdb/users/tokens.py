@@ -0,0 +1,94 @@
+import threading
+from time import monotonic
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import TokenVersion, User
+
+ROLE_CLAIMS = ('username', 'role', 'is_superuser')
+VERSION_CLAIM = 'ver'
+
+
+class TokenVersionCache:
+    """
+    Версии токенов в памяти процесса. Таблица маленькая (только
+    пользователи, у которых менялись права), поэтому перечитывается
+    целиком раз в TOKEN_VERSION_CACHE_TTL секунд.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.versions = {}
+        self.expires = 0.0
+
+    def get(self, user_id):
+        if monotonic() >= self.expires:
+            self.reload()
+        return self.versions.get(user_id, 0)
+
+    def reload(self):
+        versions = dict(
+            TokenVersion.objects.values_list('user_id', 'version')
+        )
+        with self.lock:
+            self.versions = versions
+            self.expires = monotonic() + settings.TOKEN_VERSION_CACHE_TTL
+
+    def invalidate(self):
+        self.expires = 0.0
+
+
+token_versions = TokenVersionCache()
+
+
+def revoke_tokens(user_ids):
+    """
+    Отзывает утверждения токенов пользователей, изменённых в обход
+    сигналов (bulk_update, update()): post_save их не видит.
+    """
+    TokenVersion.bump_many(user_ids)
+    token_versions.invalidate()
+
+
+class RoleRefreshToken(RefreshToken):
+    """
+    Токен с ролью, правами суперпользователя и версией токенов
+    пользователя; access-токен получает те же утверждения.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in ROLE_CLAIMS:
+            token[claim] = getattr(user, claim)
+        token[VERSION_CLAIM] = TokenVersion.current(user.pk)
+        return token
+
+
+def user_from_claims(token):
+    """
+    Пользователь по утверждениям токена без запроса к БД: экземпляр
+    User, в котором загружены только поля из токена, остальные
+    отложены и читаются из БД при первом обращении. None, если
+    утверждений нет или версия токена отозвана.
+    """
+    if any(claim not in token for claim in ROLE_CLAIMS + (VERSION_CLAIM,)):
+        return None
+    user_id = token[api_settings.USER_ID_CLAIM]
+    if token[VERSION_CLAIM] < token_versions.get(user_id):
+        return None
+    loaded = {
+        'id': user_id,
+        **{claim: token[claim] for claim in ROLE_CLAIMS},
+        'is_active': True,
+    }
+    fields = [
+        field.attname for field in User._meta.concrete_fields
+        if field.attname in loaded
+    ]
+    return User.from_db(
+        DEFAULT_DB_ALIAS, fields, [loaded[name] for name in fields]
+    )
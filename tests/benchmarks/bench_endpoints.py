@@ -0,0 +1,310 @@
+"""
+Бенчмарк эндпоинтов API: задержка p50/p95/p99, число SQL-запросов
+и размер ответа. Не входит в обычный прогон тестов, запуск:
+
+    pytest tests/benchmarks/bench_endpoints.py -s
+
+Переменные окружения:
+    BENCH_SCALE - множитель объёма данных (по умолчанию 1);
+    BENCH_ITERATIONS - число запросов к каждому эндпоинту (по умолчанию 50);
+    BENCH_UPDATE_BASELINE=1 - записать результаты в baseline.json.
+
+Результаты сравниваются с baseline.json; рост числа запросов к БД
+относительно базовой линии считается регрессией и роняет тест.
+"""
+import json
+import os
+import statistics
+import time
+from http import HTTPStatus
+from pathlib import Path
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+from rest_framework.test import APIClient
+
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import User
+from users.tokens import RoleRefreshToken
+
+BASELINE_PATH = Path(__file__).with_name('baseline.json')
+SCALE = float(os.environ.get('BENCH_SCALE', 1))
+ITERATIONS = int(os.environ.get('BENCH_ITERATIONS', 50))
+DATA_SIZES = {
+    'users': 300, 'categories': 5, 'genres': 20, 'titles': 200,
+    'reviews': 5000, 'comments': 3000,
+}
+
+
+def token_client(user):
+    """Клиент с токеном, как его выдаёт /auth/token/ (с ролью в токене)."""
+    client = APIClient()
+    token = RoleRefreshToken.for_user(user).access_token
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(share * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def api_route_names():
+    """Имена всех маршрутов из api/urls.py."""
+    resolver = get_resolver().url_patterns
+    names = set()
+    for pattern in resolver:
+        if getattr(pattern, 'namespace', None) == 'api':
+            for version in pattern.url_patterns:
+                for route in getattr(version, 'url_patterns', [version]):
+                    names.add(route.name)
+    names.discard(None)
+    return names
+
+
+@pytest.fixture
+def bench_data():
+    call_command(
+        'generate_data', seed=1,
+        **{name: max(1, int(size * SCALE))
+           for name, size in DATA_SIZES.items()}
+    )
+    title = Title.objects.order_by('-review_count').first()
+    review = Review.objects.filter(title=title).first()
+    comment = Comment.objects.filter(review=review).first()
+    if comment is None:
+        comment = Comment.objects.create(
+            review=review, author=review.author, text='bench'
+        )
+    user = User.objects.filter(role='user').first()
+    user.confirmation_code = 'bench-code'
+    user.save()
+    return {
+        'title_id': title.id,
+        'review_id': review.id,
+        'comment_id': comment.id,
+        'username': user.username,
+        'category': Category.objects.first().slug,
+        'genres': list(Genre.objects.values_list('slug', flat=True)[:3]),
+    }
+
+
+def signup_body(number):
+    return {'username': f'bench{number}', 'email': f'bench{number}@yamdb.fake'}
+
+
+def build_endpoints(data):
+    """
+    Эндпоинт: (имя замера, имя маршрута, метод, url, тело запроса,
+    клиент). url и тело могут быть функциями: они вызываются перед
+    каждым запросом вне замера, например чтобы создать удаляемый объект.
+    """
+    title, review = data['title_id'], data['review_id']
+    nested = {'title_id': title, 'review_id': review}
+    counter = iter(range(10 ** 9))
+
+    def fresh_title():
+        return Title.objects.create(name=f'bench {next(counter)}', year=2000)
+
+    def fresh_review():
+        return Review.objects.create(
+            title=fresh_title(), author_id=User.objects.first().pk,
+            text='bench', score=5
+        )
+
+    def fresh_comment():
+        return Comment.objects.create(
+            review_id=review, author_id=User.objects.first().pk, text='bench'
+        )
+
+    def named():
+        number = next(counter)
+        return {'name': f'bench {number}', 'slug': f'bench-{number}'}
+
+    def url(route, **kwargs):
+        return reverse(f'api:{route}', kwargs=kwargs)
+
+    endpoints = [
+        ('api-root', 'api-root', 'get', url('api-root'), None, 'anon'),
+        ('titles-list', 'titles-list', 'get', url('titles-list'),
+         None, 'anon'),
+        ('titles-create', 'titles-list', 'post', url('titles-list'),
+         lambda: {'name': f'bench {next(counter)}', 'year': 2000,
+                  'category': data['category'], 'genre': data['genres']},
+         'admin'),
+        ('titles-detail', 'titles-detail', 'get',
+         url('titles-detail', pk=title), None, 'anon'),
+        ('titles-update', 'titles-detail', 'patch',
+         url('titles-detail', pk=title),
+         lambda: {'description': f'bench {next(counter)}'}, 'admin'),
+        ('titles-delete', 'titles-detail', 'delete',
+         lambda: url('titles-detail', pk=fresh_title().pk), None, 'admin'),
+        ('reviews-list', 'reviews-list', 'get',
+         url('reviews-list', title_id=title), None, 'anon'),
+        ('reviews-create', 'reviews-list', 'post',
+         lambda: url('reviews-list', title_id=fresh_title().pk),
+         {'text': 'bench', 'score': 7}, 'user'),
+        ('reviews-detail', 'reviews-detail', 'get',
+         url('reviews-detail', title_id=title, pk=review), None, 'anon'),
+        ('reviews-update', 'reviews-detail', 'patch',
+         url('reviews-detail', title_id=title, pk=review),
+         lambda: {'text': f'bench {next(counter)}'}, 'admin'),
+        ('reviews-delete', 'reviews-detail', 'delete',
+         lambda: url('reviews-detail', **{
+             'title_id': (obj := fresh_review()).title_id, 'pk': obj.pk
+         }), None, 'admin'),
+        ('comments-list', 'comments-list', 'get',
+         url('comments-list', **nested), None, 'anon'),
+        ('comments-create', 'comments-list', 'post',
+         url('comments-list', **nested), {'text': 'bench'}, 'user'),
+        ('comments-detail', 'comments-detail', 'get',
+         url('comments-detail', **nested, pk=data['comment_id']),
+         None, 'anon'),
+        ('comments-update', 'comments-detail', 'patch',
+         url('comments-detail', **nested, pk=data['comment_id']),
+         lambda: {'text': f'bench {next(counter)}'}, 'admin'),
+        ('comments-delete', 'comments-detail', 'delete',
+         lambda: url('comments-detail', **nested, pk=fresh_comment().pk),
+         None, 'admin'),
+        ('categories-list', 'categories-list', 'get',
+         url('categories-list'), None, 'anon'),
+        ('categories-create', 'categories-list', 'post',
+         url('categories-list'),
+         named,
+         'admin'),
+        ('categories-delete', 'categories-detail', 'delete',
+         lambda: url('categories-detail',
+                     slug=Category.objects.create(**named()).slug),
+         None, 'admin'),
+        ('genres-list', 'genres-list', 'get', url('genres-list'),
+         None, 'anon'),
+        ('genres-create', 'genres-list', 'post', url('genres-list'),
+         named,
+         'admin'),
+        ('genres-delete', 'genres-detail', 'delete',
+         lambda: url('genres-detail',
+                     slug=Genre.objects.create(**named()).slug),
+         None, 'admin'),
+        ('users-list', 'users-list', 'get', url('users-list'),
+         None, 'admin'),
+        ('users-create', 'users-list', 'post', url('users-list'),
+         lambda: signup_body(next(counter)), 'admin'),
+        ('users-detail', 'users-detail', 'get',
+         url('users-detail', username=data['username']), None, 'admin'),
+        ('users-update', 'users-detail', 'patch',
+         url('users-detail', username=data['username']),
+         lambda: {'bio': f'bench {next(counter)}'}, 'admin'),
+        ('users-me', 'users-me', 'get', url('users-me'), None, 'user'),
+        ('users-me-update', 'users-me', 'patch', url('users-me'),
+         lambda: {'bio': f'bench {next(counter)}'}, 'user'),
+        ('auth-signup', 'auth-signup', 'post', '/api/v1/auth/signup/',
+         lambda: signup_body(next(counter)), 'anon'),
+        ('auth-token', 'auth-token', 'post', '/api/v1/auth/token/',
+         lambda: {'username': data['username'],
+                  'confirmation_code': 'bench-code'}, 'anon'),
+        ('users-delete', 'users-detail', 'delete',
+         lambda: url('users-detail', username=User.objects.create(
+             **signup_body(next(counter))).username),
+         None, 'admin'),
+    ]
+    # Сначала чтения, удаление пользователя - последним: после него
+    # процессы перечитывают версии токенов, и следующий запрос делает
+    # лишний SQL-запрос, который не относится к самому эндпоинту.
+    return sorted(endpoints, key=lambda endpoint: endpoint[2] != 'get')
+
+
+def measure(client, method, url, body):
+    latencies, queries, sizes = [], [], []
+    options = {} if method == 'get' else {'format': 'json'}
+    for _ in range(ITERATIONS):
+        target = url() if callable(url) else url
+        payload = body() if callable(body) else body
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = getattr(client, method)(
+                target, data=payload, **options
+            )
+            latencies.append((time.perf_counter() - started) * 1000)
+        assert response.status_code < HTTPStatus.BAD_REQUEST, (
+            f'{method.upper()} {target}: {response.status_code}'
+        )
+        queries.append(len(captured))
+        sizes.append(len(response.content))
+    return {
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'queries': max(queries),
+        'bytes': round(statistics.mean(sizes)),
+    }
+
+
+def format_diff(results, baseline):
+    lines = [
+        f'{"endpoint":<20}{"p50":>9}{"p95":>9}{"p99":>9}'
+        f'{"queries":>9}{"bytes":>9}'
+    ]
+    for name, result in results.items():
+        old = baseline.get(name, {})
+        cells = []
+        for key in ('p50_ms', 'p95_ms', 'p99_ms', 'queries', 'bytes'):
+            cell = f'{result[key]:g}'
+            if key in old and old[key] != result[key]:
+                cell += f'({result[key] - old[key]:+g})'
+            cells.append(f'{cell:>9}')
+        lines.append(f'{name:<20}' + ''.join(cells))
+    return '\n'.join(lines)
+
+
+# Письма только ставятся в очередь, как в рабочем режиме с воркером;
+# ограничение частоты отключено, иначе замеры упрутся в лимиты. Версии
+# токенов не перечитываются по таймеру посреди замера: иначе лишний
+# запрос достаётся случайному эндпоинту.
+@override_settings(
+    EMAIL_OUTBOX_INLINE_BACKENDS=(),
+    TOKEN_VERSION_CACHE_TTL=3600,
+    REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}
+    },
+)
+@pytest.mark.django_db(transaction=True)
+def test_endpoint_benchmark(bench_data, admin, user):
+    clients = {
+        'anon': APIClient(),
+        'admin': token_client(admin),
+        'user': token_client(user),
+    }
+    endpoints = build_endpoints(bench_data)
+    covered = {route for _, route, *_ in endpoints}
+    missing = api_route_names() - covered
+    assert not missing, f'Нет бенчмарка для маршрутов: {sorted(missing)}'
+
+    results = {
+        name: measure(clients[client], method, url, body)
+        for name, _, method, url, body, client in endpoints
+    }
+    baseline = (
+        json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists()
+        else {}
+    )
+    print()
+    print(format_diff(results, baseline))
+    if os.environ.get('BENCH_UPDATE_BASELINE') == '1':
+        BASELINE_PATH.write_text(
+            json.dumps(results, indent=2, sort_keys=True) + '\n'
+        )
+        return
+    regressions = {
+        name: (baseline[name]['queries'], result['queries'])
+        for name, result in results.items()
+        if name in baseline and result['queries'] > baseline[name]['queries']
+    }
+    assert not regressions, (
+        f'Выросло число SQL-запросов (было, стало): {regressions}'
+    )
@@ -0,0 +1,90 @@
+"""
+Бенчмарк сериализации страницы: ModelSerializer на экземплярах моделей
+против сериализаторов .values() из api/read_serializers.py. Не входит
+в обычный прогон тестов, запуск:
+
+    pytest tests/benchmarks/bench_serializers.py -s
+
+Переменные окружения:
+    BENCH_PAGE - число строк на странице (по умолчанию 100);
+    BENCH_ITERATIONS - число замеров каждого варианта (по умолчанию 30).
+
+Время включает выборку из базы; оба варианта должны выдавать
+одинаковый JSON, иначе тест падает.
+"""
+import os
+import time
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+
+from api.loadtest import percentile
+from api.read_serializers import (
+    CommentValuesSerializer,
+    ReviewValuesSerializer,
+    TitleValuesSerializer,
+)
+from api.serializers import (
+    CommentSerializer,
+    ReviewSerializer,
+    TitleSerializer,
+)
+from reviews.models import Comment, Review, Title
+
+PAGE = int(os.environ.get('BENCH_PAGE', 100))
+ITERATIONS = int(os.environ.get('BENCH_ITERATIONS', 30))
+
+
+def measure(serialize):
+    latencies = []
+    for _ in range(ITERATIONS):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            content = JSONRenderer().render(serialize())
+            latencies.append((time.perf_counter() - started) * 1000)
+    return content, percentile(latencies, 0.5), len(captured)
+
+
+def cases():
+    """Случай: (имя, ModelSerializer, сериализатор .values(), выборка)."""
+    title = Title.objects.order_by('-review_count').first()
+    review = Review.objects.filter(title=title).first()
+    return [
+        ('titles', TitleSerializer, TitleValuesSerializer,
+         Title.objects.select_related('category').prefetch_related('genre')
+         .order_by('name')),
+        ('reviews', ReviewSerializer, ReviewValuesSerializer,
+         Review.objects.select_related('author').order_by('-pub_date')),
+        ('comments', CommentSerializer, CommentValuesSerializer,
+         Comment.objects.select_related('author').filter(review=review)),
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_serializer_benchmark():
+    call_command(
+        'generate_data', seed=1, users=100, categories=5, genres=20,
+        titles=PAGE * 2, reviews=PAGE * 5, comments=PAGE * 3,
+    )
+    print()
+    print(f'{"page":<10}{"model ms":>10}{"values ms":>11}{"x":>6}'
+          f'{"queries":>12}')
+    for name, model_serializer, values_serializer, queryset in cases():
+        page = queryset[:PAGE]
+        expected, model_ms, model_queries = measure(
+            lambda: model_serializer(page.all(), many=True).data
+        )
+        content, values_ms, values_queries = measure(
+            lambda: values_serializer(
+                values_serializer.values(page), many=True
+            ).data
+        )
+        assert content == expected, (
+            f'{values_serializer.__name__} выдаёт другой JSON.'
+        )
+        print(f'{name:<10}{model_ms:>10.2f}{values_ms:>11.2f}'
+              f'{model_ms / values_ms:>6.1f}'
+              f'{f"{model_queries}/{values_queries}":>12}')
@@ -0,0 +1,12 @@
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+
+
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    """
+    Очистка базы между тестами не проходит через сигналы моделей,
+    поэтому кэш ответов справочников сбрасывается перед каждым тестом.
+    """
+    caches[settings.RESPONSE_CACHE].clear()
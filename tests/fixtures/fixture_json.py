@@ -0,0 +1,28 @@
+import pytest
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import FastJSONRenderer
+
+
+@pytest.fixture(autouse=True)
+def compare_json_renderers(monkeypatch):
+    """
+    Во всех тестах каждый ответ FastJSONRenderer сверяется побайтно
+    с выводом стандартного JSONRenderer DRF.
+    """
+    fast_render = FastJSONRenderer.render
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rendered = fast_render(
+            self, data, accepted_media_type, renderer_context
+        )
+        expected = JSONRenderer.render(
+            self, data, accepted_media_type, renderer_context
+        )
+        assert rendered == expected, (
+            'Вывод FastJSONRenderer отличается от JSONRenderer: '
+            f'{rendered[:200]!r} != {expected[:200]!r}'
+        )
+        return rendered
+
+    monkeypatch.setattr(FastJSONRenderer, 'render', render)
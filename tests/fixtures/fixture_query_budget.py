@@ -0,0 +1,10 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def strict_query_budget(settings):
+    """
+    Во всех тестах превышение бюджета SQL-запросов view (N+1) роняет
+    запрос исключением, а не пишет предупреждение в лог.
+    """
+    settings.QUERY_BUDGET = 'raise'
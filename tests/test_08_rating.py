@@ -0,0 +1,179 @@
+import random
+import threading
+import time
+
+import pytest
+from django.db import OperationalError, close_old_connections, connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.management.commands.check_ratings import find_rating_mismatches
+from reviews.models import Category, Comment, Review, Title
+
+
+def retry_locked(func, attempts=500):
+    for _ in range(attempts):
+        try:
+            return func()
+        except OperationalError:
+            time.sleep(0.01)
+    return func()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleRating:
+
+    def make_titles(self, count=3):
+        category = Category.objects.create(name='Фильм', slug='films')
+        return [
+            Title.objects.create(name=f'title {idx}', category=category)
+            for idx in range(count)
+        ]
+
+    def make_users(self, django_user_model, count):
+        return [
+            django_user_model.objects.create_user(
+                username=f'rater{idx}', email=f'rater{idx}@yamdb.fake'
+            )
+            for idx in range(count)
+        ]
+
+    def test_01_rating_follows_review_changes(self, django_user_model):
+        title, = self.make_titles(1)
+        first, second = self.make_users(django_user_model, 2)
+        review = Review.objects.create(
+            title=title, author=first, text='a', score=4
+        )
+        Review.objects.create(title=title, author=second, text='b', score=8)
+        title.refresh_from_db()
+        assert (title.score_sum, title.review_count) == (12, 2), (
+            'Проверьте, что сумма оценок и число отзывов произведения '
+            'обновляются при создании отзыва.'
+        )
+        assert title.rating == 6
+
+        review = Review.objects.get(pk=review.pk)
+        review.score = 10
+        review.save()
+        title.refresh_from_db()
+        assert title.rating == 9, (
+            'Проверьте, что рейтинг обновляется при изменении оценки.'
+        )
+
+        second.delete()
+        title.refresh_from_db()
+        assert (title.score_sum, title.review_count, title.rating) == (
+            10, 1, 10
+        ), (
+            'Проверьте, что рейтинг обновляется при каскадном удалении '
+            'отзывов вместе с пользователем.'
+        )
+
+        Review.objects.all().delete()
+        title.refresh_from_db()
+        assert title.review_count == 0 and title.rating is None, (
+            'Если отзывов нет - рейтинг должен быть `None`.'
+        )
+        assert not find_rating_mismatches()
+
+    def test_02_title_save_keeps_rating(self, django_user_model):
+        title, = self.make_titles(1)
+        author, = self.make_users(django_user_model, 1)
+        stale_title = Title.objects.get(pk=title.pk)
+        Review.objects.create(title=title, author=author, text='a', score=7)
+        stale_title.name = 'renamed'
+        stale_title.save()
+        title.refresh_from_db()
+        assert title.name == 'renamed'
+        assert title.rating == 7, (
+            'Сохранение устаревшего экземпляра произведения не должно '
+            'затирать агрегаты рейтинга.'
+        )
+
+    def test_03_rating_consistent_under_concurrent_writes(
+        self, django_user_model
+    ):
+        titles = self.make_titles(3)
+        users = self.make_users(django_user_model, 24)
+        errors = []
+
+        def writer(chunk, seed):
+            rnd = random.Random(seed)
+            try:
+                for user in chunk:
+                    title = rnd.choice(titles)
+                    review = retry_locked(lambda: Review.objects.create(
+                        title=title, author=user, text='x',
+                        score=rnd.randint(1, 10)
+                    ))
+                    review = retry_locked(
+                        lambda: Review.objects.get(pk=review.pk)
+                    )
+                    if rnd.random() < 0.5:
+                        review.score = rnd.randint(1, 10)
+                        retry_locked(review.save)
+                    if rnd.random() < 0.3:
+                        retry_locked(review.delete)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                close_old_connections()
+
+        threads = [
+            threading.Thread(target=writer, args=(users[idx::4], idx))
+            for idx in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert not errors, errors
+        assert not find_rating_mismatches(), (
+            'Сохранённый рейтинг произведений должен совпадать с '
+            'рейтингом, посчитанным заново через Avg.'
+        )
+        title = titles[0]
+        title.delete()
+        assert not Review.objects.filter(title=title.pk).exists()
+        assert not Comment.objects.exists()
+
+    @staticmethod
+    def title_updates(captured):
+        return [
+            query['sql'] for query in captured
+            if query['sql'].startswith('UPDATE "reviews_title"')
+        ]
+
+    @pytest.mark.parametrize('count', [1, 10])
+    def test_04_cascades_update_ratings_once(self, django_user_model,
+                                             count):
+        titles = self.make_titles(count + 1)
+        users = self.make_users(django_user_model, count + 1)
+        author = users[0]
+        for title in titles[:count]:
+            Review.objects.create(title=title, author=author, text='a',
+                                  score=2)
+            Review.objects.create(title=title, author=users[1], text='b',
+                                  score=8)
+        doomed = titles[count]
+        for user in users:
+            Review.objects.create(title=doomed, author=user, text='c',
+                                  score=5)
+
+        with CaptureQueriesContext(connection) as captured:
+            doomed.delete()
+        assert not self.title_updates(captured), (
+            'Проверьте, что при удалении произведения его рейтинг не '
+            'пересчитывается для каждого удаляемого отзыва.'
+        )
+
+        with CaptureQueriesContext(connection) as captured:
+            author.delete()
+        assert len(self.title_updates(captured)) <= 2, (
+            'Проверьте, что при удалении пользователя рейтинг затронутых '
+            'произведений пересчитывается пачкой, а не по отзыву.'
+        )
+        assert not find_rating_mismatches()
+        assert set(
+            Title.objects.values_list('review_count', 'rating')
+        ) == {(1, 8)}
@@ -0,0 +1,99 @@
+import json
+from base64 import b64encode
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Category, Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09CursorPagination:
+
+    def walk(self, client, url):
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        pages = [response.json()]
+        while pages[-1]['next']:
+            response = client.get(pages[-1]['next'])
+            assert response.status_code == HTTPStatus.OK
+            pages.append(response.json())
+        return pages
+
+    def test_01_titles_cursor(self, client):
+        category = Category.objects.create(name='Фильм', slug='films')
+        # Одинаковые имена проверяют переход по второму полю ключа (id).
+        for idx in range(12):
+            Title.objects.create(name=f'title {idx % 4}', category=category)
+        expected = list(
+            Title.objects.order_by('name', 'id').values_list('id', flat=True)
+        )
+
+        pages = self.walk(client, '/api/v1/titles/?cursor=')
+        assert 'count' not in pages[0], (
+            'В курсорном режиме не должен выполняться COUNT(*).'
+        )
+        ids = [title['id'] for page in pages for title in page['results']]
+        assert ids == expected, (
+            'Проверьте, что курсорная пагинация `/api/v1/titles/?cursor=` '
+            'возвращает все произведения по порядку и без повторов.'
+        )
+        assert pages[0]['previous'] is None
+
+        response = client.get(pages[-1]['previous'])
+        previous = response.json()
+        assert [title['id'] for title in previous['results']] == (
+            [title['id'] for title in pages[-2]['results']]
+        ), 'Ссылка `previous` должна вести на предыдущую страницу.'
+
+        response = client.get('/api/v1/titles/?page=2')
+        assert response.json()['count'] == 12, (
+            'Постраничная пагинация должна работать как раньше.'
+        )
+
+    def test_02_invalid_cursor(self, client):
+        response = client.get('/api/v1/titles/?cursor=broken')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_03_reviews_cursor(self, client, django_user_model):
+        title = Title.objects.create(name='title')
+        for idx in range(7):
+            author = django_user_model.objects.create_user(
+                username=f'author{idx}', email=f'author{idx}@yamdb.fake'
+            )
+            Review.objects.create(
+                title=title, author=author, text=str(idx), score=5
+            )
+        expected = list(
+            Review.objects.order_by('-pub_date', '-id')
+            .values_list('id', flat=True)
+        )
+        pages = self.walk(
+            client, f'/api/v1/titles/{title.id}/reviews/?cursor='
+        )
+        ids = [review['id'] for page in pages for review in page['results']]
+        assert ids == expected
+
+    @pytest.mark.parametrize('resource, position', [
+        ('reviews', ['garbage', 1]),
+        ('reviews', [{'a': 1}, 1]),
+        ('reviews', ['2020-01-01T00:00:00', 'abc']),
+        ('titles', ['x', 'abc']),
+        ('titles', [None, None]),
+        ('titles', ['x', [1]]),
+        ('titles', ['x', True]),
+    ])
+    def test_04_invalid_cursor_values(self, client, resource, position):
+        title = Title.objects.create(name='title')
+        url = {
+            'titles': '/api/v1/titles/',
+            'reviews': f'/api/v1/titles/{title.id}/reviews/',
+        }[resource]
+        cursor = b64encode(
+            json.dumps({'p': position, 'r': 0}).encode()
+        ).decode()
+        response = client.get(url, {'cursor': cursor})
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что курсор с неверными значениями ключа '
+            'отклоняется ответом 404.'
+        )
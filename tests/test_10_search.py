@@ -0,0 +1,75 @@
+import importlib
+from http import HTTPStatus
+
+import pytest
+from django.apps import apps
+
+from reviews.models import Title
+from search.backends import IcontainsSearchBackend, get_backend
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10TitleSearch:
+
+    def search(self, client, query):
+        response = client.get('/api/v1/titles/', {'search': query})
+        assert response.status_code == HTTPStatus.OK
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_search_follows_title_changes(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        assert self.search(client, 'терминат') == ['Терминатор'], (
+            'Проверьте, что `/api/v1/titles/?search=` находит произведение '
+            'по началу слова в названии без учёта регистра.'
+        )
+        assert self.search(client, 'yippie') == ['Крепкий орешек'], (
+            'Поиск должен учитывать описание произведения.'
+        )
+
+        admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/', data={'name': 'Чужой'}
+        )
+        assert self.search(client, 'терминатор') == []
+        assert self.search(client, 'чужой') == ['Чужой']
+
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert self.search(client, 'чужой') == []
+
+    def test_02_search_ranks_name_above_description(self, client):
+        Title.objects.create(name='Дорога', description='')
+        Title.objects.create(name='Путь', description='дорога домой')
+        assert self.search(client, 'дорога') == ['Дорога', 'Путь']
+        assert self.search(client, '"*') == []
+
+    def test_03_rebuild(self, client):
+        Title.objects.bulk_create([Title(name='Солярис')])
+        assert self.search(client, 'солярис') == []
+        get_backend().rebuild()
+        assert self.search(client, 'солярис') == ['Солярис']
+
+    def test_04_backend_follows_settings(self, client, settings):
+        Title.objects.bulk_create([Title(name='Солярис')])
+        settings.SEARCH_BACKEND = 'search.backends.IcontainsSearchBackend'
+        assert isinstance(get_backend(), IcontainsSearchBackend), (
+            'Проверьте, что get_backend() читает SEARCH_BACKEND при каждом '
+            'вызове и учитывает override_settings.'
+        )
+        assert self.search(client, 'Солярис') == ['Солярис']
+
+    def test_05_migration_skips_other_databases(self):
+        migration = importlib.import_module('search.migrations.0001_initial')
+        executed = []
+
+        class SchemaEditor:
+            connection = type('Connection', (), {'vendor': 'postgresql'})
+
+            def execute(self, sql):
+                executed.append(sql)
+
+        migration.create_index(apps, SchemaEditor())
+        migration.drop_index(apps, SchemaEditor())
+        assert executed == [], (
+            'Проверьте, что миграция поиска не выполняет DDL FTS5 на '
+            'СУБД, отличных от SQLite.'
+        )
@@ -0,0 +1,239 @@
+import csv
+import random
+import shutil
+from http import HTTPStatus
+from pathlib import Path
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from reviews.management.commands.check_ratings import find_rating_mismatches
+from reviews.management.commands import csv_import
+from reviews.models import (Comment, ContentVersion, ImportedFile, Review,
+                            Title)
+from users.tokens import RoleRefreshToken
+
+DATA_DIR = Path(settings.BASE_DIR) / 'static' / 'data'
+
+
+def edit_csv(path, edit):
+    with open(path, newline='', encoding='utf-8') as csv_file:
+        reader = csv.DictReader(csv_file)
+        fieldnames, rows = reader.fieldnames, list(reader)
+    edit(rows)
+    with open(path, 'w', newline='', encoding='utf-8') as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11CsvImport:
+
+    def test_01_import_and_resume(self, tmp_path):
+        shutil.copytree(DATA_DIR, tmp_path, dirs_exist_ok=True)
+        comments = tmp_path / 'comments.csv'
+        source = comments.read_text(encoding='utf-8')
+        comments.write_text(
+            source.rstrip('\n') + '\n99,1,broken,not-a-number,2020-01-13T23:20:02.422Z\n',
+            encoding='utf-8'
+        )
+
+        with pytest.raises(ValueError):
+            call_command('csv_import', path=tmp_path, batch_size=10)
+        assert Comment.objects.count() == 0, (
+            'Таблица должна загружаться в одной транзакции.'
+        )
+        assert Review.objects.count() == 72
+        assert Title.genre.through.objects.count() == 42, (
+            'Проверьте, что csv_import загружает genre_title.csv.'
+        )
+
+        comments.write_text(source, encoding='utf-8')
+        call_command('csv_import', path=tmp_path, batch_size=10)
+        assert Comment.objects.count() == 3
+        assert Review.objects.count() == 72, (
+            'Повторный запуск должен продолжить с незагруженной таблицы.'
+        )
+        assert ImportedFile.objects.count() == 7
+        assert ContentVersion.objects.get(scope=ContentVersion.ALL).version, (
+            'Проверьте, что csv_import сбрасывает ETag: загрузка обходит '
+            'сигналы.'
+        )
+        assert not find_rating_mismatches()
+        assert str(Review.objects.get(pk=1).pub_date.date()) == '2019-09-24'
+
+    def test_02_upsert_applies_only_changes(self, tmp_path):
+        shutil.copytree(DATA_DIR, tmp_path, dirs_exist_ok=True)
+        call_command('csv_import', path=tmp_path)
+        call_command('csv_import', path=tmp_path, upsert=True)
+
+        titles = tmp_path / 'titles.csv'
+        lines = titles.read_text(encoding='utf-8').rstrip('\n').split('\n')
+        lines[1] = '1,Побег,1994,1'
+        del lines[2]
+        lines.append('999,Новое произведение,2000,1')
+        titles.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+        untouched = Review.objects.exclude(title_id=2).count()
+
+        call_command('csv_import', path=tmp_path, upsert=True)
+        assert Title.objects.get(pk=1).name == 'Побег'
+        assert Title.objects.filter(pk=999).exists()
+        assert not Title.objects.filter(pk=2).exists(), (
+            'Строки, пропавшие из файла, должны удаляться в режиме --upsert.'
+        )
+        assert Review.objects.count() == untouched
+        assert ImportedFile.objects.get(file_name='titles.csv').rows == (
+            len(lines) - 1
+        )
+        assert not find_rating_mismatches()
+
+    def test_03_generate_data(self, tmp_path):
+        sizes = {
+            'users': 30, 'categories': 3, 'genres': 5, 'titles': 20,
+            'reviews': 200, 'comments': 50, 'seed': 7,
+        }
+        call_command('generate_data', output=tmp_path, **sizes)
+        first_run = (tmp_path / 'review.csv').read_text(encoding='utf-8')
+        call_command('generate_data', output=tmp_path, **sizes)
+        assert (tmp_path / 'review.csv').read_text(
+            encoding='utf-8'
+        ) == first_run, 'Данные должны повторяться при одинаковом --seed.'
+
+        call_command('csv_import', path=tmp_path)
+        assert Review.objects.count() == 200
+        assert Comment.objects.count() == 50
+        assert not find_rating_mismatches()
+
+    def test_04_generate_data_into_db(self, django_user_model):
+        call_command(
+            'generate_data', users=50, categories=2, genres=4, titles=10,
+            reviews=400, comments=30
+        )
+        assert Review.objects.count() == 400
+        counts = sorted(
+            Title.objects.values_list('review_count', flat=True),
+            reverse=True
+        )
+        assert counts[0] > counts[-1], (
+            'Популярность произведений должна быть неравномерной.'
+        )
+        assert not find_rating_mismatches()
+        user = django_user_model.objects.create_user(
+            username='fresh', email='fresh@yamdb.fake'
+        )
+        assert user.pk > 50
+
+    def test_05_source_dates_without_touching_fields(self, tmp_path,
+                                                    monkeypatch, admin):
+        shutil.copytree(DATA_DIR, tmp_path, dirs_exist_ok=True)
+        field = Comment._meta.get_field('pub_date')
+        flags = []
+        insert = csv_import.insert_objects
+
+        def checked_insert(model, objs, batch_size):
+            flags.append(field.auto_now_add)
+            insert(model, objs, batch_size)
+
+        monkeypatch.setattr(csv_import, 'insert_objects', checked_insert)
+        call_command('csv_import', path=tmp_path)
+        assert flags and all(flags), (
+            'Проверьте, что csv_import не меняет auto_now_add у полей '
+            'модели во время загрузки.'
+        )
+        assert str(Comment.objects.get(pk=1).pub_date.date()) == '2020-01-13'
+        comment = Comment.objects.create(
+            review_id=1, author=admin, text='Сейчас'
+        )
+        assert comment.pub_date.date() == timezone.now().date()
+
+    def test_06_upsert_keeps_rows_created_via_api(self, tmp_path,
+                                                  admin_client, user_client,
+                                                  user, django_user_model):
+        shutil.copytree(DATA_DIR, tmp_path, dirs_exist_ok=True)
+        call_command('csv_import', path=tmp_path)
+        response = admin_client.post('/api/v1/users/', data={
+            'username': 'api_user', 'email': 'api_user@yamdb.fake',
+        })
+        assert response.status_code == 201
+        response = user_client.post(
+            '/api/v1/titles/1/reviews/', data={'text': 'Из API', 'score': 3}
+        )
+        assert response.status_code == 201
+        api_review = response.json()['id']
+
+        edit_csv(
+            tmp_path / 'users.csv', lambda rows: rows[0].update(bio='новое био')
+        )
+        edit_csv(tmp_path / 'review.csv', lambda rows: rows.pop(1))
+
+        call_command('csv_import', path=tmp_path, upsert=True)
+        assert django_user_model.objects.filter(
+            username__in=['api_user', user.username]
+        ).count() == 2, (
+            'Проверьте, что --upsert не удаляет пользователей, созданных '
+            'через API.'
+        )
+        assert Review.objects.filter(pk=api_review).exists(), (
+            'Проверьте, что --upsert не удаляет отзывы, созданные через API.'
+        )
+        assert not Review.objects.filter(pk=2).exists(), (
+            'Строки прошлой загрузки, пропавшие из файла, должны удаляться.'
+        )
+        assert not find_rating_mismatches()
+
+    def test_07_id_ranges(self):
+        rnd = random.Random(7)
+        for _ in range(50):
+            first = {rnd.randint(1, 200) for _ in range(rnd.randint(0, 150))}
+            second = {rnd.randint(1, 200) for _ in range(rnd.randint(0, 150))}
+            ranges = csv_import.IdRanges()
+            for start in range(0, len(first), 17):
+                ranges.update(sorted(first)[start:start + 17][::-1])
+            other = csv_import.IdRanges()
+            other.update(second)
+            assert len(ranges) == len(first)
+            assert len(ranges.ranges) <= len(first)
+            restored = csv_import.IdRanges.unpack(ranges.pack())
+            assert restored.ranges == ranges.ranges
+            stale = {
+                pk for start, end in ranges.difference(other)
+                for pk in range(start, end + 1)
+            }
+            assert stale == first - second, (
+                'Проверьте, что IdRanges.difference даёт разность множеств.'
+            )
+        ranges = csv_import.IdRanges()
+        ranges.update(range(1, 1_000_001))
+        assert ranges.ranges == [[1, 1_000_000]], (
+            'Проверьте, что id подряд хранятся одним диапазоном.'
+        )
+
+    def test_08_upsert_revokes_changed_roles(self, tmp_path,
+                                             django_user_model):
+        shutil.copytree(DATA_DIR, tmp_path, dirs_exist_ok=True)
+        call_command('csv_import', path=tmp_path)
+        admin = django_user_model.objects.get(username='capt_obvious')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Bearer {}'.format(
+            RoleRefreshToken.for_user(admin).access_token
+        ))
+
+        def demote(rows):
+            for row in rows:
+                if row['username'] == admin.username:
+                    row['role'] = 'user'
+
+        edit_csv(tmp_path / 'users.csv', demote)
+        call_command('csv_import', path=tmp_path, upsert=True)
+        response = client.post(
+            '/api/v1/categories/', {'name': 'Комикс', 'slug': 'comics'}
+        )
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что --upsert отзывает токены пользователей, чья '
+            'роль изменилась в файле.'
+        )
+
@@ -0,0 +1,44 @@
+import re
+
+import pytest
+from django.test import override_settings
+
+from reviews.models import Title
+
+
+def parse_server_timing(header):
+    return {
+        entry.split(';')[0].strip(): entry
+        for entry in header.split(',')
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12ServerTiming:
+
+    def test_01_phases_in_header(self, admin_client, settings):
+        settings.PERF_INSTRUMENTATION = True
+        for idx in range(3):
+            Title.objects.create(name=f'title {idx}')
+        response = admin_client.get('/api/v1/titles/')
+        assert 'Server-Timing' in response, (
+            'Проверьте, что ответ содержит заголовок `Server-Timing`.'
+        )
+        phases = parse_server_timing(response['Server-Timing'])
+        for name in ('sql', 'auth', 'serialize', 'render', 'total'):
+            assert name in phases, (
+                f'В заголовке `Server-Timing` нет фазы `{name}`.'
+            )
+        queries, rows = map(int, re.search(
+            r'queries=(\d+) rows=(\d+)', phases['sql']
+        ).groups())
+        assert queries >= 2 and rows >= 4
+
+    def test_02_disabled(self, client):
+        response = client.get('/api/v1/titles/')
+        assert 'Server-Timing' not in response, (
+            'Проверьте, что по умолчанию замеры выключены.'
+        )
+        with override_settings(PERF_INSTRUMENTATION=True):
+            response = client.get('/api/v1/titles/')
+        assert 'Server-Timing' in response
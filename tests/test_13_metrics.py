@@ -0,0 +1,122 @@
+import json
+import os
+import re
+from http import HTTPStatus
+
+import pytest
+from django.test import override_settings
+
+from api import metrics
+from api.metrics import ARCHIVE_NAME, Counter, Registry, render_text
+from reviews.models import Category, Title
+
+
+def sample(text, name, **labels):
+    for line in text.splitlines():
+        if not line.startswith(name + '{') and not line.startswith(name + ' '):
+            continue
+        if all(f'{key}="{value}"' in line for key, value in labels.items()):
+            return float(line.rsplit(' ', 1)[1])
+    return 0.0
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13Metrics:
+
+    def test_01_view_metrics(self, client, admin_client):
+        category = Category.objects.create(name='Фильм', slug='film')
+        Title.objects.create(name='Метрики', year=2000, category=category)
+        before = client.get('/metrics').content.decode()
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/')
+        admin_client.post('/api/v1/genres/', {'name': 'Жанр', 'slug': 'g'})
+        client.post('/api/v1/auth/signup/', {
+            'username': 'metrics', 'email': 'metrics@yamdb.fake'
+        })
+        response = client.get('/metrics')
+        assert response.status_code == HTTPStatus.OK
+        text = response.content.decode()
+        labels = {'view': 'TitleViewSet', 'action': 'list'}
+
+        def delta(name, **extra):
+            return (
+                sample(text, name, **labels, **extra)
+                - sample(before, name, **labels, **extra)
+            )
+
+        assert delta(
+            'yamdb_http_requests_total', method='GET', status='200'
+        ) == 2, (
+            'Проверьте, что /metrics считает запросы по view и action.'
+        )
+        assert delta('yamdb_http_request_duration_seconds_count') == 2
+        assert delta('yamdb_db_queries_total') >= 2
+        assert delta('yamdb_serializer_duration_seconds_count') == 2
+        assert sample(
+            text, 'yamdb_http_requests_total',
+            view='GenreViewSet', action='create', status='201'
+        ) >= 1
+        assert sample(
+            text, 'yamdb_emails_sent_total', result='sent'
+        ) >= 1
+        assert re.search(
+            r'^# TYPE yamdb_db_query_duration_seconds histogram$',
+            text, re.MULTILINE
+        )
+
+    def test_02_forbidden_for_remote_clients(self, client):
+        response = client.get('/metrics', REMOTE_ADDR='10.0.0.1')
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+
+def test_multiprocess_aggregation(tmp_path):
+    with override_settings(METRICS_DIR=str(tmp_path)):
+        workers = []
+        for _ in range(3):
+            registry = Registry()
+            counter = Counter(registry, 'jobs_total', 'Задачи.', ('kind',))
+            counter.inc(2, kind='a')
+            workers.append(registry)
+        workers[0].file_name = 'old-worker.json'
+        for registry in workers:
+            registry.flush(force=True)
+        collected = workers[1].collect()
+    assert len(list(tmp_path.glob('*.json'))) == 3
+    assert 'jobs_total{kind="a"} 6' in render_text(collected), (
+        'Метрики должны суммироваться по снимкам всех процессов.'
+    )
+    assert json.loads((tmp_path / 'old-worker.json').read_text())
+
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='нужен fork')
+def test_forked_workers_write_own_snapshots(tmp_path):
+    with override_settings(METRICS_DIR=str(tmp_path)):
+        metrics.EMAILS_SENT.inc(result='forked')
+        metrics.registry.flush(force=True)
+        pid = os.fork()
+        if pid == 0:
+            try:
+                metrics.EMAILS_SENT.inc(result='forked')
+                metrics.registry.flush(force=True)
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        assert len(list(tmp_path.glob('*.json'))) == 2, (
+            'Проверьте, что после fork процесс пишет снимок в свой файл.'
+        )
+        collected = [
+            render_text(metrics.registry.collect()) for _ in range(2)
+        ]
+    assert {path.name for path in tmp_path.glob('*.json')} == {
+        metrics.registry.file_name, ARCHIVE_NAME
+    }, (
+        'Снимок завершившегося процесса должен переноситься в archive.json.'
+    )
+    for text in collected:
+        assert sample(
+            text, 'yamdb_emails_sent_total', result='forked'
+        ) == 2, (
+            'Проверьте, что после fork процесс начинает без значений '
+            'родителя, а значения завершившихся процессов не теряются.'
+        )
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+
+from api.slow_queries import normalize_sql
+from reviews.models import Category, Title
+from users.models import User
+
+
+def test_normalize_sql():
+    assert normalize_sql(
+        "SELECT * FROM t WHERE a = 'x' AND b IN (%s, %s, %s)\n LIMIT 21"
+    ) == 'SELECT * FROM t WHERE a = ? AND b IN (...) LIMIT ?'
+    assert normalize_sql('SELECT 1 WHERE id IN (%s)') == normalize_sql(
+        'SELECT 2 WHERE id IN (%s, %s)'
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14SlowQueries:
+
+    def test_01_slow_queries_logged_with_plan(self, client, tmp_path,
+                                              capsys):
+        log = tmp_path / 'slow.log'
+        category = Category.objects.create(name='Фильм', slug='film')
+        Title.objects.create(name='Медленный', year=2000, category=category)
+        with override_settings(SLOW_QUERY_THRESHOLD=0, SLOW_QUERY_LOG=log):
+            client.get('/api/v1/titles/?genre=drama')
+            client.get('/api/v1/titles/?genre=comedy')
+        entries = [json.loads(line) for line in log.read_text().splitlines()]
+        selects = [
+            entry for entry in entries
+            if entry['view'] == 'TitleViewSet'
+            and entry['normalized'].startswith('SELECT')
+        ]
+        assert selects, (
+            'Проверьте, что запросы дольше порога попадают в журнал '
+            'вместе с view.'
+        )
+        genre_queries = [
+            entry for entry in selects if 'comedy' in entry['params']
+        ]
+        assert genre_queries and genre_queries[0]['plan'], (
+            'Проверьте, что для запроса сохраняются параметры и план.'
+        )
+        assert genre_queries[0]['action'] == 'list'
+
+        call_command('slow_queries', log=log, limit=3)
+        output = capsys.readouterr().out
+        assert 'TitleViewSet.list' in output
+        assert output.count('запр.') <= 3
+
+    def test_02_threshold(self, client, tmp_path):
+        log = tmp_path / 'slow.log'
+        with override_settings(SLOW_QUERY_THRESHOLD=60, SLOW_QUERY_LOG=log):
+            client.get('/api/v1/titles/')
+        assert not log.exists()
+
+    def test_03_sensitive_params_redacted(self, client, tmp_path):
+        log = tmp_path / 'slow.log'
+        with override_settings(SLOW_QUERY_THRESHOLD=0, SLOW_QUERY_LOG=log):
+            client.post('/api/v1/auth/signup/', {
+                'username': 'secret', 'email': 'secret@yamdb.fake'
+            })
+        code = User.objects.get(username='secret').confirmation_code
+        text = log.read_text()
+        assert code not in text and 'secret@yamdb.fake' not in text, (
+            'Проверьте, что журнал по умолчанию не содержит параметров '
+            'изменений и запросов к чувствительным столбцам.'
+        )
+        entries = [json.loads(line) for line in text.splitlines()]
+        assert any(entry['params'] is None for entry in entries)
+
+        log.unlink()
+        with override_settings(
+            SLOW_QUERY_THRESHOLD=0, SLOW_QUERY_LOG=log,
+            SLOW_QUERY_LOG_PARAMS=True
+        ):
+            client.post('/api/v1/auth/signup/', {
+                'username': 'secret', 'email': 'secret@yamdb.fake'
+            })
+        assert 'secret@yamdb.fake' in log.read_text(), (
+            'С SLOW_QUERY_LOG_PARAMS = True параметры пишутся полностью.'
+        )
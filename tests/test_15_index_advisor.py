@@ -0,0 +1,83 @@
+import json
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import User
+
+COMMENTS_BY_AUTHOR = (
+    'SELECT "reviews_comment"."id", "reviews_comment"."text" '
+    'FROM "reviews_comment" WHERE "reviews_comment"."author_id" = %s '
+    'ORDER BY "reviews_comment"."pub_date" DESC LIMIT 10'
+)
+
+
+@pytest.fixture
+def workload_data():
+    category = Category.objects.create(name='Фильм', slug='film')
+    genre = Genre.objects.create(name='Драма', slug='drama')
+    users = User.objects.bulk_create(
+        User(
+            id=1000 + idx, username=f'user{idx}',
+            email=f'user{idx}@yamdb.fake'
+        )
+        for idx in range(20)
+    )
+    titles = Title.objects.bulk_create(
+        Title(
+            id=idx + 1, name=f'title {idx}', year=1990 + idx % 30,
+            category=category
+        )
+        for idx in range(300)
+    )
+    Title.genre.through.objects.bulk_create(
+        Title.genre.through(title=title, genre=genre) for title in titles
+    )
+    reviews = Review.objects.bulk_create(
+        Review(id=idx + 1, title=titles[0], author=user, text='text', score=5)
+        for idx, user in enumerate(users)
+    )
+    Comment.objects.bulk_create(
+        Comment(review=reviews[idx % 20], author=users[idx % 20], text='c')
+        for idx in range(400)
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15IndexAdvisor:
+
+    def test_01_proposal_from_log(self, workload_data, tmp_path, capsys):
+        log = tmp_path / 'workload.log'
+        log.write_text(''.join(
+            json.dumps({'sql': COMMENTS_BY_AUTHOR, 'params': [author]}) + '\n'
+            for author in (1000, 1001, 1002)
+        ))
+        call_command(
+            'advise_indexes', log=log, benchmark=True, repeat=1,
+            emit_migration=True, output=tmp_path
+        )
+        output = capsys.readouterr().out
+        assert 'reviews_comment (author_id, pub_date)' in output, (
+            'Проверьте, что советник предлагает составной индекс по '
+            'столбцам условия и сортировки.'
+        )
+        assert 'x3 SELECT' in output
+        assert 'замер:' in output
+        migration = next(tmp_path.glob('*_advised_indexes.py')).read_text()
+        assert "fields=['author', 'pub_date']" in migration
+        compile(migration, 'migration', 'exec')
+
+    def test_02_replay_respects_existing_indexes(self, workload_data,
+                                                 capsys):
+        call_command('advise_indexes', replay=[
+            '/api/v1/titles/?year=2000',
+            '/api/v1/titles/?genre=drama',
+            '/api/v1/titles/1/reviews/',
+        ])
+        output = capsys.readouterr().out
+        assert 'reviews_genre.slug: LIKE' in output
+        assert 'reviews_title (' not in output, (
+            'Индексы, уже покрывающие запрос, предлагаться не должны.'
+        )
+        assert 'reviews_review (' not in output
@@ -0,0 +1,84 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from reviews.models import Category, Title
+
+
+def claims_client(user):
+    user.confirmation_code = 'code'
+    user.save()
+    response = APIClient().post('/api/v1/auth/token/', {
+        'username': user.username, 'confirmation_code': 'code'
+    })
+    assert response.status_code == HTTPStatus.OK
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {response.data["access"]}')
+    return client, AccessToken(response.data['access'])
+
+
+def user_queries(captured):
+    return [
+        query['sql'] for query in captured.captured_queries
+        if '"users_user"' in query['sql']
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16JwtClaims:
+
+    def test_01_claims_skip_user_lookup(self, admin):
+        client, token = claims_client(admin)
+        assert token['role'] == 'admin'
+        assert token['is_superuser'] is False
+        assert token['username'] == admin.username
+        with CaptureQueriesContext(connection) as captured:
+            response = client.post(
+                '/api/v1/genres/', {'name': 'Драма', 'slug': 'drama'}
+            )
+        assert response.status_code == HTTPStatus.CREATED
+        assert not user_queries(captured), (
+            'Проверьте, что права проверяются по утверждениям токена '
+            'без запроса пользователя к БД.'
+        )
+
+    def test_02_role_change_revokes_claims(self, admin):
+        client, _ = claims_client(admin)
+        admin.role = 'user'
+        admin.save()
+        response = client.post(
+            '/api/v1/genres/', {'name': 'Рок', 'slug': 'rock'}
+        )
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            'После смены роли старые утверждения токена не должны '
+            'давать прежних прав.'
+        )
+        admin.delete()
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+    def test_03_token_user_writes(self, user):
+        client, _ = claims_client(user)
+        category = Category.objects.create(name='Фильм', slug='film')
+        title = Title.objects.create(name='Фильм', year=2000,
+                                     category=category)
+        response = client.post(
+            f'/api/v1/titles/{title.id}/reviews/', {'text': 'Да', 'score': 7}
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.data['author'] == user.username
+        response = client.patch(
+            f'/api/v1/titles/{title.id}/reviews/{response.data["id"]}/',
+            {'text': 'Нет'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        response = client.get('/api/v1/users/me/')
+        assert response.data['email'] == user.email
+
+    def test_04_tokens_without_claims(self, user_client):
+        response = user_client.get('/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.OK
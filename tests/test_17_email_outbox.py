@@ -0,0 +1,150 @@
+import runpy
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.utils import timezone
+
+from api.metrics import EMAILS_SENT
+from users.models import OutboxEmail
+from users.outbox import claim_batch, drain, enqueue
+
+BACKEND = 'tests.test_17_email_outbox.CountingBackend'
+
+
+class CountingBackend(EmailBackend):
+    """locmem, который считает соединения и отказывает первые failures раз."""
+    opened = 0
+    failures = 0
+
+    def open(self):
+        if getattr(self, 'is_open', False):
+            return False
+        CountingBackend.opened += 1
+        self.is_open = True
+        return True
+
+    def close(self):
+        self.is_open = False
+
+    def send_messages(self, messages):
+        if CountingBackend.failures:
+            CountingBackend.failures -= 1
+            raise ConnectionError('SMTP недоступен')
+        return super().send_messages(messages)
+
+
+@pytest.fixture
+def counting_backend():
+    CountingBackend.opened = 0
+    CountingBackend.failures = 0
+    with override_settings(EMAIL_BACKEND=BACKEND):
+        yield CountingBackend
+
+
+@pytest.mark.django_db
+class Test17EmailOutbox:
+
+    def test_01_signup_only_queues(self, client, counting_backend):
+        outbox_before = len(mail.outbox)
+        response = client.post('/api/v1/auth/signup/', {
+            'username': 'queued', 'email': 'queued@yamdb.fake'
+        })
+        assert response.status_code == 200
+        assert len(mail.outbox) == outbox_before, (
+            'Регистрация не должна ждать почтовый сервер: письмо '
+            'отправляет воркер.'
+        )
+        email = OutboxEmail.objects.get()
+        assert email.status == OutboxEmail.PENDING
+        assert email.recipients == ['queued@yamdb.fake']
+
+        call_command('send_emails')
+        email.refresh_from_db()
+        assert email.status == OutboxEmail.SENT
+        assert mail.outbox[-1].to == ['queued@yamdb.fake']
+
+    def test_02_batches_share_connection(self, counting_backend):
+        for number in range(5):
+            enqueue('Тема', 'Текст', 'admin@yamdb.com', [f'{number}@y.fake'])
+        assert drain(batch_size=2) == (5, 3)
+        assert counting_backend.opened == 1, (
+            'Все пачки должны уходить через одно соединение.'
+        )
+
+    def test_03_retry_with_backoff(self, counting_backend):
+        email = enqueue('Тема', 'Текст', 'admin@yamdb.com', ['r@y.fake'])
+        counting_backend.failures = 1
+        assert drain(batch_size=10) == (0, 1)
+        email.refresh_from_db()
+        assert email.status == OutboxEmail.PENDING
+        assert email.attempts == 1
+        assert 'SMTP недоступен' in email.last_error
+        assert email.next_attempt_at > timezone.now(), (
+            'Повтор должен откладываться.'
+        )
+        assert drain(batch_size=10) == (0, 0)
+
+        OutboxEmail.objects.update(
+            next_attempt_at=timezone.now() - timedelta(seconds=1)
+        )
+        assert drain(batch_size=10) == (1, 1)
+        email.refresh_from_db()
+        assert email.status == OutboxEmail.SENT
+        assert email.attempts == 2
+
+    def test_04_gives_up_after_max_attempts(self, counting_backend):
+        before = dict(EMAILS_SENT.values)
+        email = enqueue('Тема', 'Текст', 'admin@yamdb.com', ['f@y.fake'])
+        counting_backend.failures = 3
+        for _ in range(3):
+            drain(batch_size=10, max_attempts=3)
+            OutboxEmail.objects.filter(status=OutboxEmail.PENDING).update(
+                next_attempt_at=timezone.now()
+            )
+        email.refresh_from_db()
+        assert email.status == OutboxEmail.FAILED
+        assert email.attempts == 3
+
+        for result, count in (('retry', 2), ('failed', 1)):
+            assert EMAILS_SENT.values.get((result,), 0) - before.get(
+                (result,), 0
+            ) == count, (
+                'Проверьте, что попытки отправки попадают в метрики через '
+                'сигнал email_attempted.'
+            )
+
+    def test_05_concurrent_claims_do_not_overlap(self):
+        with override_settings(EMAIL_BACKEND=BACKEND):
+            for number in range(4):
+                enqueue('Тема', 'Текст', 'admin@yamdb.com',
+                        [f'{number}@y.fake'])
+        claimed = {}
+
+        def other_worker(execute, sql, params, many, context):
+            # Второй воркер забирает письма между SELECT и UPDATE первого.
+            result = execute(sql, params, many, context)
+            if sql.startswith('SELECT') and 'other' not in claimed:
+                claimed['other'] = []
+                claimed['other'] = claim_batch(batch_size=10)
+            return result
+
+        with connection.execute_wrapper(other_worker):
+            claimed['first'] = claim_batch(batch_size=10)
+        assert len(claimed['other']) == 4
+        assert not claimed['first'], (
+            'Проверьте, что письмо, уже арендованное другим воркером, '
+            'не достаётся второму: иначе оно уйдёт дважды.'
+        )
+
+
+def test_default_email_backend_is_smtp(monkeypatch):
+    monkeypatch.delenv('EMAIL_BACKEND', raising=False)
+    project_settings = runpy.run_module('api_yamdb.settings')
+    assert project_settings['EMAIL_BACKEND'] == (
+        'django.core.mail.backends.smtp.EmailBackend'
+    ), 'По умолчанию письма должны отправляться через SMTP.'
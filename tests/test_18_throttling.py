@@ -0,0 +1,124 @@
+from http import HTTPStatus
+
+import pytest
+from django.conf import settings
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api.throttling import (CacheSlidingWindowStore, LocalSlidingWindowStore,
+                            get_store)
+
+
+def rates(**scopes):
+    return override_settings(REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {
+            **settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], **scopes
+        },
+    })
+
+
+@pytest.fixture
+def clean_store():
+    get_store().clear()
+    yield
+    get_store().clear()
+
+
+@pytest.mark.parametrize(
+    'store_class', (LocalSlidingWindowStore, CacheSlidingWindowStore)
+)
+def test_sliding_window(store_class):
+    store = store_class()
+    store.clear()
+    start = 6000.0
+    for _ in range(3):
+        assert store.hit('k', 3, 60, now=start)[0]
+    allowed, wait = store.hit('k', 3, 60, now=start + 10)
+    assert not allowed and wait == pytest.approx(50)
+    # Половина прошлого окна ещё учитывается: 3 * 0.5 + 1 <= 3.
+    assert store.hit('k', 3, 60, now=start + 90)[0]
+    assert not store.hit('k', 3, 60, now=start + 91)[0], (
+        'Скользящее окно должно учитывать запросы прошлого окна.'
+    )
+    assert store.hit('other', 3, 60, now=start + 91)[0]
+    assert store.hit('k', 3, 60, now=start + 200)[0]
+
+
+@pytest.mark.django_db
+class Test18Throttling:
+
+    def test_01_signup_budget(self, client, clean_store):
+        with rates(signup='2/minute'):
+            for number in range(2):
+                response = client.post('/api/v1/auth/signup/', {
+                    'username': f'bot{number}', 'email': f'bot{number}@y.fake'
+                })
+                assert response.status_code == HTTPStatus.OK
+            with CaptureQueriesContext(connection) as captured:
+                response = client.post('/api/v1/auth/signup/', {
+                    'username': 'bot3', 'email': 'bot3@y.fake'
+                })
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+        assert int(response['Retry-After']) > 0
+        assert len(captured) == 0, (
+            'Запрос сверх лимита должен отклоняться до обращений к БД.'
+        )
+        response = client.post(
+            '/api/v1/auth/signup/',
+            {'username': 'bot4', 'email': 'bot4@y.fake'},
+            REMOTE_ADDR='10.0.0.2'
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            'Лимит регистрации считается отдельно для каждого IP.'
+        )
+
+    def test_02_forwarded_for_not_trusted(self, client, clean_store):
+        with rates(signup='2/minute'):
+            statuses = [
+                client.post(
+                    '/api/v1/auth/signup/',
+                    {'username': f'bot{number}',
+                     'email': f'bot{number}@y.fake'},
+                    HTTP_X_FORWARDED_FOR=f'203.0.113.{number}'
+                ).status_code
+                for number in range(3)
+            ]
+        assert statuses[-1] == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что лимит на IP нельзя обойти подделкой '
+            'заголовка X-Forwarded-For.'
+        )
+
+    def test_03_forwarded_for_behind_proxy(self, client, clean_store):
+        with override_settings(REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK, 'NUM_PROXIES': 1,
+            'DEFAULT_THROTTLE_RATES': {
+                **settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'],
+                'signup': '1/minute',
+            },
+        }):
+            statuses = [
+                client.post(
+                    '/api/v1/auth/signup/',
+                    {'username': f'bot{number}',
+                     'email': f'bot{number}@y.fake'},
+                    HTTP_X_FORWARDED_FOR=f'spoofed, 203.0.113.{number}'
+                ).status_code
+                for number in range(2)
+            ]
+        assert statuses == [HTTPStatus.OK, HTTPStatus.OK], (
+            'За доверенным прокси IP клиента берётся из X-Forwarded-For.'
+        )
+
+    def test_04_user_budget(self, user_client, admin_client, clean_store):
+        with rates(user='2/minute'):
+            statuses = [
+                user_client.get('/api/v1/genres/').status_code
+                for _ in range(3)
+            ]
+            other = admin_client.get('/api/v1/genres/').status_code
+        assert statuses == [
+            HTTPStatus.OK, HTTPStatus.OK, HTTPStatus.TOO_MANY_REQUESTS
+        ]
+        assert other == HTTPStatus.OK
@@ -0,0 +1,122 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, override_settings
+from django.urls import resolve
+
+from reviews.models import Category, Comment, Review, Title
+
+ASGI_URLCONF = 'api_yamdb.asgi_urls'
+
+
+def create_data(user):
+    category = Category.objects.create(name='Фильм', slug='films')
+    titles = [
+        Title.objects.create(name=f'title {idx}', year=2000 + idx,
+                             category=category)
+        for idx in range(7)
+    ]
+    review = Review.objects.create(
+        title=titles[0], author=user, text='Отзыв', score=8
+    )
+    Comment.objects.create(review=review, author=user, text='Комментарий')
+    return titles[0], review
+
+
+def read_paths(title, review):
+    return [
+        '/api/v1/titles/',
+        '/api/v1/titles/?page=2',
+        '/api/v1/titles/?cursor=',
+        f'/api/v1/titles/{title.id}/',
+        f'/api/v1/titles/{title.id}/reviews/',
+        f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/',
+    ]
+
+
+@pytest.fixture
+def asgi_urls(settings):
+    # AsyncClient работает без обработчика из api_yamdb.asgi.
+    settings.ROOT_URLCONF = ASGI_URLCONF
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures('asgi_urls')
+class Test19Asgi:
+
+    def test_01_read_views_are_async(self, admin):
+        title, review = create_data(admin)
+        for path in read_paths(title, review):
+            view = resolve(path.split('?')[0]).func
+            assert asyncio.iscoroutinefunction(view), (
+                f'Проверьте, что под ASGI `{path}` обслуживает async view.'
+            )
+
+    def test_02_same_responses_as_wsgi(self, admin, client):
+        title, review = create_data(admin)
+        async_client = AsyncClient()
+        for path in read_paths(title, review):
+            with override_settings(ROOT_URLCONF='api_yamdb.urls'):
+                expected = client.get(path)
+            response = async_to_sync(async_client.get)(path)
+            assert response.status_code == expected.status_code
+            assert response.json() == expected.json(), (
+                f'Проверьте, что ответ ASGI на `{path}` совпадает с WSGI.'
+            )
+
+    def test_03_missing_title(self, admin):
+        response = async_to_sync(AsyncClient().get)('/api/v1/titles/999/')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_04_writes_still_work(self, admin):
+        title, review = create_data(admin)
+        async_client = AsyncClient()
+        path = f'/api/v1/titles/{title.id}/reviews/'
+        response = async_to_sync(async_client.post)(
+            path, {'text': 'Ещё отзыв', 'score': 5},
+            content_type='application/json'
+        )
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что под ASGI аноним не может оставить отзыв.'
+        )
+
+    def test_05_instrumentation_in_threads(self, admin, settings):
+        settings.PERF_INSTRUMENTATION = True
+        create_data(admin)
+        response = async_to_sync(AsyncClient().get)('/api/v1/titles/')
+        assert 'Server-Timing' in response, (
+            'Проверьте, что под ASGI ответ содержит заголовок '
+            '`Server-Timing`.'
+        )
+        assert 'queries=0 ' not in response['Server-Timing'], (
+            'Проверьте, что SQL-запросы из пула потоков попадают в замеры.'
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_19_asgi_application_uses_async_urls(admin):
+    from api_yamdb.asgi import application
+
+    create_data(admin)
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        messages.append(message)
+
+    async_to_sync(application.__call__)({
+        'type': 'http',
+        'method': 'GET',
+        'path': '/api/v1/titles/',
+        'query_string': b'',
+        'headers': [(b'host', b'testserver')],
+    }, receive, send)
+    assert messages[0]['status'] == HTTPStatus.OK
+    assert b'"count":7' in messages[1]['body'], (
+        'Проверьте, что `api_yamdb.asgi.application` отдаёт список '
+        'произведений.'
+    )
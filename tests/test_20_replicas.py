@@ -0,0 +1,95 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connections
+from rest_framework.test import APIClient
+
+from api.replicas import pin_cache, sync_replica
+from reviews.models import Category, Title
+
+REPLICA = 'replica_test'
+
+
+@pytest.fixture
+def replica(transactional_db, settings, tmp_path):
+    """Вторая база SQLite в файле; данные на неё копирует sync_replica."""
+    connections.settings[REPLICA] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': str(tmp_path / 'replica.sqlite3'),
+    }
+    settings.DATABASE_REPLICAS = [REPLICA]
+    pin_cache().clear()
+    sync_replica(REPLICA)
+    yield REPLICA
+    connections[REPLICA].close()
+    del connections[REPLICA]
+    del connections.settings[REPLICA]
+    pin_cache().clear()
+
+
+def titles_count(client):
+    response = client.get('/api/v1/titles/')
+    assert response.status_code == HTTPStatus.OK
+    return response.json()['count']
+
+
+class Test20Replicas:
+
+    def test_01_reads_go_to_replica(self, replica, client):
+        Title.objects.create(name='Только на основной базе')
+        assert titles_count(client) == 0, (
+            'Проверьте, что список произведений читается с реплики.'
+        )
+        sync_replica(replica)
+        assert titles_count(client) == 1
+
+    def test_02_writes_go_to_primary(self, replica, admin_client):
+        response = admin_client.post(
+            '/api/v1/categories/', {'name': 'Фильм', 'slug': 'films'}
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert Category.objects.using('default').filter(
+            slug='films'
+        ).exists()
+        assert not Category.objects.using(replica).filter(
+            slug='films'
+        ).exists(), 'Проверьте, что изменения пишутся в основную базу.'
+
+    def test_03_read_your_writes(self, replica, user_client, client):
+        title = Title.objects.create(name='Произведение')
+        sync_replica(replica)
+        path = f'/api/v1/titles/{title.id}/reviews/'
+        response = user_client.post(path, {'text': 'Отзыв', 'score': 7})
+        assert response.status_code == HTTPStatus.CREATED
+        assert user_client.get(path).json()['count'] == 1, (
+            'Проверьте, что автор сразу после изменения читает с основной '
+            'базы.'
+        )
+        assert client.get(path).json()['count'] == 0, (
+            'Проверьте, что остальные читают с реплики.'
+        )
+        pin_cache().clear()
+        assert user_client.get(path).json()['count'] == 0, (
+            'Проверьте, что закрепление за основной базой временное.'
+        )
+
+    def test_04_other_views_use_primary(self, replica, admin_client):
+        response = admin_client.get('/api/v1/users/')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['count'] >= 1, (
+            'Проверьте, что пользователи читаются с основной базы.'
+        )
+
+    def test_05_response_cache_misses_read_primary(self, replica,
+                                                   admin_client, client):
+        response = admin_client.post(
+            '/api/v1/categories/', {'name': 'Фильм', 'slug': 'films'}
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        for _ in range(2):
+            response = client.get('/api/v1/categories/')
+            assert response.json()['count'] == 1, (
+                'Проверьте, что при промахе кэша ответов список читается '
+                'с основной базы: иначе отстающая реплика попадёт в кэш '
+                'под новой версией.'
+            )
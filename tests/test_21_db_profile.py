@@ -0,0 +1,94 @@
+import pytest
+from django.db import connections, transaction
+
+from api_yamdb.databases import database_settings, sqlite_database
+
+ALIAS = 'profile_test'
+
+
+@pytest.fixture
+def production_db(tmp_path, django_db_blocker):
+    """Отдельное соединение SQLite с профилем production."""
+    connections.settings[ALIAS] = sqlite_database(
+        str(tmp_path / 'production.sqlite3'), 'production'
+    )
+    with django_db_blocker.unblock():
+        yield connections[ALIAS]
+        connections[ALIAS].close()
+    del connections[ALIAS]
+    del connections.settings[ALIAS]
+
+
+def pragma(connection, name):
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+
+class Test21DbProfile:
+
+    def test_01_development_is_default(self):
+        database = database_settings({}, 'db.sqlite3')
+        assert database['NAME'] == 'db.sqlite3'
+        assert 'CONN_MAX_AGE' not in database
+        assert 'OPTIONS' not in database
+
+    def test_02_production_pragmas(self, production_db):
+        assert pragma(production_db, 'journal_mode') == 'wal', (
+            'Проверьте, что в профиле production включён режим WAL.'
+        )
+        assert pragma(production_db, 'synchronous') == 1
+        assert pragma(production_db, 'busy_timeout') == 20000
+        assert pragma(production_db, 'mmap_size') > 0
+        assert pragma(production_db, 'cache_size') < 0
+        assert production_db.settings_dict['CONN_MAX_AGE'] > 0, (
+            'Проверьте, что в профиле production соединения постоянные.'
+        )
+
+    def test_03_immediate_transactions(self, production_db):
+        statements = []
+
+        def capture(execute, sql, params, many, context):
+            statements.append(sql)
+            return execute(sql, params, many, context)
+
+        production_db.ensure_connection()
+        with production_db.execute_wrapper(capture):
+            with transaction.atomic(using=ALIAS):
+                pragma(production_db, 'user_version')
+        assert statements[0] == 'BEGIN IMMEDIATE', (
+            'Проверьте, что транзакции SQLite в профиле production '
+            'начинаются с BEGIN IMMEDIATE.'
+        )
+
+    def test_04_health_checks(self, production_db, monkeypatch):
+        production_db.ensure_connection()
+        raw_connection = production_db.connection
+        production_db.close_if_unusable_or_obsolete()
+        monkeypatch.setattr(production_db, 'is_usable', lambda: False)
+        production_db.ensure_connection()
+        assert production_db.connection is not raw_connection, (
+            'Проверьте, что оборванное постоянное соединение '
+            'открывается заново.'
+        )
+        reconnected = production_db.connection
+        production_db.ensure_connection()
+        assert production_db.connection is reconnected, (
+            'Проверьте, что соединение проверяется один раз за запрос.'
+        )
+
+    def test_05_postgresql_pooled(self):
+        database = database_settings({
+            'DB_PROFILE': 'production',
+            'DB_ENGINE': 'postgresql',
+            'DB_HOST': 'pgbouncer',
+            'DB_PORT': '6432',
+        }, 'db.sqlite3')
+        assert database['HOST'] == 'pgbouncer'
+        assert database['CONN_MAX_AGE'] > 0
+        assert database['CONN_HEALTH_CHECKS'] is True
+        assert database['DISABLE_SERVER_SIDE_CURSORS'] is True
+
+    def test_06_unknown_profile(self):
+        with pytest.raises(ValueError):
+            database_settings({'DB_PROFILE': 'staging'}, 'db.sqlite3')
@@ -0,0 +1,99 @@
+import datetime
+import io
+import uuid
+from decimal import Decimal
+
+import pytest
+from django.http import QueryDict
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+from api import parsers, renderers
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+
+DATA = {
+    'name': 'Фильм «Ёж»\u2028строка\u2029абзац',
+    'rating': 7.25,
+    'year': 2000,
+    'ids': (1, 2, 3),
+    'nested': [{'slug': 'films', 'empty': None, 'ok': True}],
+    1: 'числовой ключ',
+    'created': datetime.datetime(
+        2022, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc
+    ),
+    'day': datetime.date(2022, 5, 1),
+    'price': Decimal('9.90'),
+    'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'lazy': gettext_lazy('Not found.'),
+    'set': {'один'},
+}
+
+
+def render_both(data, media_type=None, context=None):
+    return (
+        FastJSONRenderer().render(data, media_type, context),
+        JSONRenderer().render(data, media_type, context),
+    )
+
+
+class Test22Json:
+
+    def test_01_default_classes(self):
+        assert api_settings.DEFAULT_RENDERER_CLASSES[0] is FastJSONRenderer
+        assert api_settings.DEFAULT_PARSER_CLASSES[0] is FastJSONParser
+
+    def test_02_same_output(self):
+        fast, expected = render_both(DATA)
+        assert fast == expected, (
+            'Проверьте, что FastJSONRenderer выдаёт те же байты, что '
+            'JSONRenderer.'
+        )
+        assert b'\\u2028' in fast and b'\\u2029' in fast
+
+    def test_03_indent_and_empty(self):
+        fast, expected = render_both(DATA, 'application/json; indent=4')
+        assert fast == expected
+        assert render_both(None) == (b'', b'')
+
+    def test_04_query_dict(self):
+        data = QueryDict('username=first&username=last&email=a@b.c')
+        fast, expected = render_both(data)
+        assert fast == expected == b'{"username":"last","email":"a@b.c"}'
+
+    def test_05_fallback_for_big_int(self):
+        fast, expected = render_both({'big': 2 ** 70})
+        assert fast == expected
+
+    def test_06_fallback_without_orjson(self, monkeypatch):
+        monkeypatch.setattr(renderers, 'orjson', None)
+        monkeypatch.setattr(parsers, 'orjson', None)
+        fast, expected = render_both(DATA)
+        assert fast == expected
+        assert FastJSONParser().parse(io.BytesIO(b'{"a": 1}')) == {'a': 1}
+
+    def test_07_parser(self):
+        body = '{"text": "Отзыв", "score": 7, "tags": [1.5, null]}'.encode()
+        assert FastJSONParser().parse(io.BytesIO(body)) == (
+            JSONParser().parse(io.BytesIO(body))
+        )
+        assert FastJSONParser().parse(
+            io.BytesIO(b'{"big": 1180591620717411303424}')
+        ) == {'big': 2 ** 70}
+
+    @pytest.mark.parametrize(
+        'body', [b'{"a": ', b'{"a": NaN}', b''],
+        ids=['broken', 'nan', 'empty']
+    )
+    def test_08_parse_errors(self, body):
+        with pytest.raises(ParseError) as fast_error:
+            FastJSONParser().parse(io.BytesIO(body))
+        with pytest.raises(ParseError) as expected_error:
+            JSONParser().parse(io.BytesIO(body))
+        assert str(fast_error.value) == str(expected_error.value), (
+            'Проверьте, что сообщения об ошибках разбора прежние.'
+        )
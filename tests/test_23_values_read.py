@@ -0,0 +1,121 @@
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+
+from api.read_serializers import (
+    CommentValuesSerializer,
+    ReviewValuesSerializer,
+    TitleValuesSerializer,
+)
+from api.serializers import (
+    CommentSerializer,
+    ReviewSerializer,
+    TitleSerializer,
+)
+from reviews.models import Category, Comment, Genre, Review, Title
+
+
+def as_json(data):
+    return JSONRenderer().render(data)
+
+
+@pytest.fixture
+def catalog(user, admin):
+    category = Category.objects.create(name='Фильм', slug='films')
+    genres = [
+        Genre.objects.create(name=name, slug=slug)
+        for name, slug in (('Рок', 'rock'), ('Драма', 'drama'),
+                           ('Сказка', 'tale'))
+    ]
+    titles = []
+    for idx in range(8):
+        title = Title.objects.create(
+            name=f'Произведение {idx}',
+            year=1990 + idx if idx % 3 else None,
+            description=f'Описание {idx}' if idx % 2 else None,
+            category=category if idx % 4 else None,
+        )
+        title.genre.set(genres[idx % 3:])
+        titles.append(title)
+    for author, score in ((user, 7), (admin, 4)):
+        review = Review.objects.create(
+            title=titles[0], author=author, text=f'Отзыв {score}',
+            score=score
+        )
+        for idx in range(3):
+            Comment.objects.create(
+                review=review, author=author, text=f'Комментарий {idx}'
+            )
+    return titles[0], review
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23ValuesRead:
+
+    def compare(self, model_serializer, values_serializer, queryset):
+        expected = model_serializer(queryset, many=True).data
+        values = values_serializer(
+            values_serializer.values(queryset), many=True
+        ).data
+        assert as_json(values) == as_json(expected), (
+            f'Проверьте, что {values_serializer.__name__} выдаёт тот же '
+            f'JSON, что {model_serializer.__name__}.'
+        )
+        single = queryset.all()[:1]
+        assert as_json(
+            values_serializer(values_serializer.values(single)[0]).data
+        ) == as_json(model_serializer(single[0]).data)
+
+    def test_01_same_json(self, catalog):
+        title, review = catalog
+        self.compare(
+            TitleSerializer, TitleValuesSerializer,
+            Title.objects.order_by('name')
+        )
+        self.compare(
+            ReviewSerializer, ReviewValuesSerializer,
+            Review.objects.filter(title=title)
+        )
+        self.compare(
+            CommentSerializer, CommentValuesSerializer,
+            Comment.objects.filter(review=review)
+        )
+
+    def test_02_constant_queries(self, client, catalog):
+        with CaptureQueriesContext(connection) as captured:
+            response = client.get('/api/v1/titles/?page_size=5')
+        assert response.status_code == 200
+        assert len(captured) <= 4, (
+            'Проверьте, что список произведений читается фиксированным '
+            'числом запросов: версии для ETag, страница, число записей '
+            'и жанры.'
+        )
+
+    def test_03_api_responses(self, client, catalog):
+        title, review = catalog
+        response = client.get('/api/v1/titles/')
+        first = response.json()['results'][0]
+        assert list(first) == [
+            'id', 'name', 'year', 'description', 'rating', 'category',
+            'genre',
+        ]
+        detail = client.get(f'/api/v1/titles/{title.id}/').json()
+        title.refresh_from_db()
+        assert detail == json.loads(as_json(TitleSerializer(title).data))
+        path = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        page = client.get(path + '?cursor=').json()
+        assert len(page['results']) == 3 and page['next'] is None
+
+    def test_04_cursor_with_values(self, client, catalog):
+        response = client.get('/api/v1/titles/?cursor=')
+        page = response.json()
+        assert page['next'], (
+            'Проверьте, что курсорная пагинация работает со строками '
+            '.values().'
+        )
+        second = client.get(page['next']).json()
+        names = [item['name'] for item in page['results'] + second['results']]
+        assert names == sorted(names) and len(names) == 8
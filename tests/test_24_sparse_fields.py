@@ -0,0 +1,110 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Comment, Genre, Review, Title
+
+
+@pytest.fixture
+def title(user):
+    category = Category.objects.create(name='Фильм', slug='films')
+    genre = Genre.objects.create(name='Драма', slug='drama')
+    title = Title.objects.create(name='Чапаев', year=1934, category=category)
+    title.genre.set([genre])
+    review = Review.objects.create(
+        title=title, author=user, text='Отзыв', score=8
+    )
+    Comment.objects.create(review=review, author=user, text='Коммент')
+    return title
+
+
+def select_sql(captured, table):
+    return [
+        query['sql'] for query in captured
+        if query['sql'].startswith('SELECT') and f'FROM "{table}"' in
+        query['sql']
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24SparseFields:
+
+    def test_01_titles_fields(self, client, title):
+        with CaptureQueriesContext(connection) as captured:
+            response = client.get('/api/v1/titles/?fields=id,name,rating')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['results'] == [
+            {'id': title.id, 'name': 'Чапаев', 'rating': 8.0}
+        ], 'Проверьте, что ?fields= оставляет в ответе только эти поля.'
+        sql = ' '.join(query['sql'] for query in captured)
+        assert 'reviews_category' not in sql, (
+            'Проверьте, что без поля category категория не присоединяется.'
+        )
+        assert 'reviews_genretitle' not in sql, (
+            'Проверьте, что без поля genre жанры не запрашиваются.'
+        )
+        page = select_sql(captured, 'reviews_title')[-1]
+        assert '"description"' not in page
+
+    def test_02_omit(self, client, title):
+        response = client.get(f'/api/v1/titles/{title.id}/?omit=genre,year')
+        assert response.json() == {
+            'id': title.id, 'name': 'Чапаев', 'description': None,
+            'rating': 8.0, 'category': {'name': 'Фильм', 'slug': 'films'},
+        }
+        response = client.get(
+            '/api/v1/titles/?cursor=&fields=rating&genre=drama'
+        )
+        assert response.json()['results'] == [{'rating': 8.0}]
+
+    def test_03_reviews_and_comments(self, client, title):
+        review = title.reviews.get()
+        path = f'/api/v1/titles/{title.id}/reviews/'
+        with CaptureQueriesContext(connection) as captured:
+            response = client.get(path + '?fields=score,text')
+        assert response.json()['results'] == [{'text': 'Отзыв', 'score': 8}]
+        assert 'users_user' not in select_sql(
+            captured, 'reviews_review'
+        )[-1]
+        response = client.get(
+            f'{path}{review.id}/comments/?omit=id,pub_date'
+        )
+        assert response.json()['results'] == [
+            {'text': 'Коммент', 'author': review.author.username}
+        ]
+
+    def test_04_users_only(self, admin_client, user):
+        with CaptureQueriesContext(connection) as captured:
+            response = admin_client.get(
+                f'/api/v1/users/{user.username}/?fields=username,role'
+            )
+        assert response.json() == {'username': user.username, 'role': 'user'}
+        sql = select_sql(captured, 'users_user')[-1]
+        assert '"email"' not in sql and '"bio"' not in sql, (
+            'Проверьте, что для ?fields= пользователи читаются через .only().'
+        )
+        response = admin_client.get('/api/v1/users/?omit=bio,email')
+        assert 'email' not in response.json()['results'][0]
+
+    def test_05_unknown_field(self, client, admin_client, title):
+        response = client.get('/api/v1/titles/?fields=id,secret')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что неизвестное поле в ?fields= даёт ответ 400.'
+        )
+        assert 'secret' in response.json()['fields'][0]
+        response = admin_client.get('/api/v1/users/?omit=password')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_06_writes_ignore_fields(self, user_client, title):
+        response = user_client.patch(
+            '/api/v1/users/me/?fields=username',
+            data={'bio': 'Новое'}, format='json'
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['bio'] == 'Новое', (
+            'Проверьте, что ?fields= не влияет на запись.'
+        )
+        response = user_client.get('/api/v1/users/me/?fields=bio')
+        assert response.json() == {'bio': 'Новое'}
@@ -0,0 +1,180 @@
+import inspect
+import logging
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.views import APIView
+
+from api import views
+from api.query_budget import QueryBudgetExceeded
+from reviews.models import Category, Comment, Genre, Review, Title
+
+
+def add_rows(count, user, title=None):
+    """count категорий, жанров, произведений, отзывов и комментариев."""
+    start = Title.objects.count()
+    genres = []
+    for idx in range(start, start + count):
+        category = Category.objects.create(name=f'К{idx}', slug=f'c{idx}')
+        genres.append(Genre.objects.create(name=f'Ж{idx}', slug=f'g{idx}'))
+        item = Title.objects.create(
+            name=f'П{idx}', year=2000, category=category
+        )
+        item.genre.set(genres[-2:])
+    title = title or Title.objects.first()
+    review = Review.objects.filter(title=title).first()
+    for idx in range(count):
+        author = user.__class__.objects.create(
+            username=f'reader{start + idx}',
+            email=f'reader{start + idx}@yamdb.fake',
+        )
+        if review is None:
+            review = Review.objects.create(
+                title=title, author=author, text='Отзыв', score=5
+            )
+        else:
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=5
+            )
+        Comment.objects.create(review=review, author=author, text='Текст')
+    return title, review
+
+
+def add_children(count, user_model, prefix):
+    """
+    Произведение с count отзывами и комментариями и автор count отзывов
+    и комментариев: у каждого удаляемого объекта count потомков.
+    """
+    owner = user_model.objects.create(
+        username=f'{prefix}owner', email=f'{prefix}owner@yamdb.fake'
+    )
+    title = Title.objects.create(name=f'{prefix}П', year=2000)
+    reviews = []
+    for idx in range(count):
+        author = user_model.objects.create(
+            username=f'{prefix}reader{idx}',
+            email=f'{prefix}reader{idx}@yamdb.fake',
+        )
+        other = Title.objects.create(name=f'{prefix}П{idx}', year=2000)
+        Review.objects.create(title=other, author=owner, text='О', score=3)
+        reviews.append(Review.objects.create(
+            title=title, author=author, text='Отзыв', score=5
+        ))
+        Comment.objects.create(review=reviews[idx], author=owner, text='К')
+        Comment.objects.create(review=reviews[0], author=author, text='К')
+    review = reviews[0]
+    comment = review.comments.last()
+    return [
+        f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        f'{comment.id}/',
+        f'/api/v1/users/{owner.username}/',
+        f'/api/v1/titles/{title.id}/reviews/{review.id}/',
+        f'/api/v1/titles/{title.id}/',
+    ]
+
+
+def delete_count(client, url):
+    with CaptureQueriesContext(connection) as captured:
+        response = client.delete(url)
+    assert response.status_code == 204, url
+    return len(captured)
+
+
+def query_count(client, url):
+    with CaptureQueriesContext(connection) as captured:
+        response = client.get(url)
+    assert response.status_code == 200, url
+    return len(captured)
+
+
+def assert_constant_queries(client, urls, grow):
+    """
+    Число запросов к каждому url не растёт вместе с числом строк
+    на странице: признак N+1 в списке.
+    """
+    before = {url: query_count(client, url) for url in urls(grow(1))}
+    after = {url: query_count(client, url) for url in urls(grow(9))}
+    assert before == after, (
+        'Проверьте, что число SQL-запросов не растёт с размером страницы '
+        f'(до, после): {before} {after}'
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25QueryBudget:
+
+    def test_01_every_view_has_budget(self):
+        view_classes = [
+            cls for _, cls in inspect.getmembers(views, inspect.isclass)
+            if issubclass(cls, APIView) and cls.__module__ == views.__name__
+        ]
+        assert view_classes
+        for cls in view_classes:
+            assert getattr(cls, 'query_budgets', None), (
+                f'Проверьте, что у {cls.__name__} задан бюджет запросов '
+                '(@query_budget).'
+            )
+
+    def test_02_lists_without_n_plus_one(self, admin_client, admin):
+        def urls(data):
+            title, review = data
+            return [
+                '/api/v1/categories/', '/api/v1/genres/', '/api/v1/titles/',
+                '/api/v1/titles/?cursor=', '/api/v1/users/',
+                f'/api/v1/titles/{title.id}/reviews/',
+                f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/',
+            ]
+        assert_constant_queries(
+            admin_client, urls, lambda count: add_rows(count, admin)
+        )
+
+    def test_03_title_genres_in_one_query(self, admin_client, admin):
+        add_rows(5, admin)
+        slugs = list(Genre.objects.values_list('slug', flat=True))
+        with CaptureQueriesContext(connection) as captured:
+            response = admin_client.post('/api/v1/titles/', data={
+                'name': 'Новое', 'year': 2001, 'category': 'c0',
+                'genre': slugs,
+            }, format='json')
+        assert response.status_code == 201
+        genre_lookups = [
+            query for query in captured
+            if 'FROM "reviews_genre" WHERE' in query['sql']
+        ]
+        assert len(genre_lookups) == 1, (
+            'Проверьте, что слаги жанров проверяются одним запросом.'
+        )
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Новое', 'year': 2001, 'category': 'c0',
+            'genre': ['g0', 'missing'],
+        }, format='json')
+        assert response.status_code == 400
+        assert 'missing' in response.json()['genre'][0]
+
+    def test_04_budget_exceeded(self, client, monkeypatch, settings,
+                                caplog):
+        monkeypatch.setitem(views.TitleViewSet.query_budgets, 'list', 0)
+        with pytest.raises(QueryBudgetExceeded):
+            client.get('/api/v1/titles/')
+        settings.QUERY_BUDGET = 'log'
+        with caplog.at_level(logging.WARNING, logger='api.performance'):
+            response = client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        assert 'TitleViewSet.list' in caplog.text
+
+    def test_05_destroy_without_n_plus_one(self, admin_client,
+                                           django_user_model):
+        counts = [
+            [
+                delete_count(admin_client, url)
+                for url in add_children(count, django_user_model, prefix)
+            ]
+            for count, prefix in ((2, 'w'), (2, 'a'), (20, 'b'))
+        ]
+        # Первое удаление создаёт строки версий, которых ещё нет.
+        assert counts[1] == counts[2], (
+            'Проверьте, что число SQL-запросов при удалении (комментарий, '
+            'пользователь, отзыв, произведение) не растёт с числом '
+            f'каскадно удаляемых объектов: {counts}'
+        )
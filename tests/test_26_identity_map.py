@@ -0,0 +1,74 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Comment, Review, Title
+
+
+@pytest.fixture
+def reviews(admin):
+    first = Title.objects.create(name='Первое', year=2000)
+    second = Title.objects.create(name='Второе', year=2001)
+    review = Review.objects.create(
+        title=first, author=admin, text='Отзыв', score=5
+    )
+    Comment.objects.create(review=review, author=admin, text='Коммент')
+    return first, second, review
+
+
+def lookups(captured, table):
+    return [
+        query['sql'] for query in captured
+        if query['sql'].startswith(f'SELECT "{table}"."id"')
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26IdentityMap:
+
+    def test_01_review_create_loads_title_once(self, user_client, reviews):
+        title = reviews[0]
+        with CaptureQueriesContext(connection) as captured:
+            response = user_client.post(
+                f'/api/v1/titles/{title.id}/reviews/',
+                data={'text': 'Новый', 'score': 7}, format='json'
+            )
+        assert response.status_code == HTTPStatus.CREATED
+        assert len(lookups(captured, 'reviews_title')) == 1, (
+            'Проверьте, что произведение загружается один раз за запрос '
+            'для view и сериализатора.'
+        )
+
+    def test_02_comment_parents_in_one_query(self, user_client, reviews):
+        title, _, review = reviews
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        with CaptureQueriesContext(connection) as captured:
+            response = user_client.post(
+                url, data={'text': 'Ответ'}, format='json'
+            )
+        assert response.status_code == HTTPStatus.CREATED
+        parents = lookups(captured, 'reviews_review')
+        assert len(parents) == 1 and 'reviews_title' in parents[0], (
+            'Проверьте, что отзыв и произведение загружаются одним '
+            'запросом.'
+        )
+        assert not lookups(captured, 'reviews_title')
+
+    @pytest.mark.parametrize('method', ['get', 'post'])
+    def test_03_review_of_other_title(self, user_client, reviews, method):
+        _, other, review = reviews
+        response = getattr(user_client, method)(
+            f'/api/v1/titles/{other.id}/reviews/{review.id}/comments/',
+            data={'text': 'Ответ'}, format='json'
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что комментарии отзыва под чужим произведением '
+            'недоступны: ответ 404.'
+        )
+        assert not Comment.objects.filter(text='Ответ').exists()
+        response = user_client.get(
+            f'/api/v1/titles/{other.id}/reviews/{review.id}/'
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,125 @@
+import sqlite3
+import threading
+from http import HTTPStatus
+
+import pytest
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.serializers import ReviewSerializer
+from api_yamdb.databases import sqlite_database
+from reviews.models import Review, Title
+
+DUPLICATE = {
+    'non_field_errors': [
+        'Только один отзыв на произведение от одного юзера!'
+    ]
+}
+
+
+@pytest.fixture
+def title():
+    return Title.objects.create(name='Солярис', year=1972)
+
+
+@pytest.fixture
+def file_database(tmp_path, user, title):
+    """
+    Копия тестовой базы в файле с профилем production: потоки пишут
+    в неё параллельно, как процессы сервера (общая база в памяти
+    отвечает на параллельную запись ошибкой блокировки).
+    """
+    memory = connections['default']
+    memory_settings = connections.settings['default']
+    path = str(tmp_path / 'reviews.sqlite3')
+    memory.ensure_connection()
+    target = sqlite3.connect(path)
+    memory.connection.backup(target)
+    target.close()
+    connections.settings['default'] = sqlite_database(path, 'production')
+    del connections['default']
+    yield
+    connections['default'].close()
+    connections.settings['default'] = memory_settings
+    connections['default'] = memory
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27ReviewConstraint:
+
+    def test_01_create_without_exists_query(self, user_client, title):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        with CaptureQueriesContext(connection) as captured:
+            response = user_client.post(
+                url, data={'text': 'Отзыв', 'score': 9}, format='json'
+            )
+        assert response.status_code == HTTPStatus.CREATED
+        assert not [
+            query for query in captured
+            if query['sql'].startswith('SELECT (1) AS "a" FROM '
+                                       '"reviews_review"')
+        ], (
+            'Проверьте, что перед созданием отзыва нет проверочного '
+            'запроса exists(): уникальность проверяет ограничение БД.'
+        )
+        response = user_client.post(
+            url, data={'text': 'Ещё', 'score': 1}, format='json'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.json() == DUPLICATE
+        title.refresh_from_db()
+        assert (title.review_count, title.rating) == (1, 9), (
+            'Проверьте, что отклонённый отзыв не меняет рейтинг.'
+        )
+
+    def test_02_interleaved_validation(self, user, title):
+        first, second = (
+            ReviewSerializer(data={'text': text, 'score': 5})
+            for text in ('Первый', 'Второй')
+        )
+        assert first.is_valid() and second.is_valid()
+        first.save(author=user, title=title)
+        with pytest.raises(ValidationError) as error:
+            second.save(author=user, title=title)
+        assert error.value.detail == DUPLICATE
+        assert Review.objects.filter(title=title).count() == 1
+
+    def test_03_concurrent_duplicates(self, user, title, file_database):
+        threads_count = 6
+        barrier = threading.Barrier(threads_count)
+        token = str(AccessToken.for_user(user))
+        statuses = []
+
+        def submit():
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+            try:
+                barrier.wait()
+                response = client.post(
+                    f'/api/v1/titles/{title.id}/reviews/',
+                    data={'text': 'Одновременно', 'score': 7}, format='json'
+                )
+                statuses.append(response.status_code)
+            finally:
+                connections['default'].close()
+
+        threads = [
+            threading.Thread(target=submit) for _ in range(threads_count)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(statuses) == (
+            [HTTPStatus.CREATED] + [HTTPStatus.BAD_REQUEST]
+            * (threads_count - 1)
+        ), (
+            'Проверьте, что из одновременных одинаковых отзывов создаётся '
+            f'один, остальные получают 400: {statuses}'
+        )
+        title.refresh_from_db()
+        assert title.review_count == 1
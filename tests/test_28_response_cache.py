@@ -0,0 +1,113 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.versions import scope
+from reviews.models import Category, ContentVersion, Genre
+
+
+def get(client, url):
+    with CaptureQueriesContext(connection) as captured:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    return response.json(), len(captured)
+
+
+@pytest.fixture
+def file_cache(settings, tmp_path):
+    settings.CACHES = {
+        **settings.CACHES,
+        'responses': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path / 'responses'),
+        },
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28ResponseCache:
+
+    @pytest.mark.parametrize('backend', ['locmem', 'file'])
+    @pytest.mark.parametrize('model, url', [
+        (Category, '/api/v1/categories/'),
+        (Genre, '/api/v1/genres/'),
+    ], ids=['categories', 'genres'])
+    def test_01_cached_until_changed(self, request, client, admin_client,
+                                     model, url, backend):
+        if backend == 'file':
+            request.getfixturevalue('file_cache')
+        model.objects.create(name='Рок', slug='rock')
+        first, queries = get(client, url)
+        assert queries > 0
+        cached, queries = get(client, url)
+        assert cached == first and queries == 1, (
+            'Проверьте, что повторный запрос списка отдаётся из кэша '
+            'после одного запроса версии.'
+        )
+        response = admin_client.post(
+            url, data={'name': 'Джаз', 'slug': 'jazz'}, format='json'
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        data, _ = get(client, url)
+        assert data['count'] == 2, (
+            'Проверьте, что создание объекта сразу сбрасывает кэш списка.'
+        )
+        response = admin_client.delete(f'{url}rock/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        data, _ = get(client, url)
+        assert [item['slug'] for item in data['results']] == ['jazz'], (
+            'Проверьте, что удаление объекта сразу сбрасывает кэш списка.'
+        )
+
+    def test_02_key_includes_params(self, client):
+        for idx in range(12):
+            Category.objects.create(name=f'Категория {idx}', slug=f'c{idx}')
+        pages = [
+            get(client, url)[0] for url in (
+                '/api/v1/categories/', '/api/v1/categories/?page=2',
+                '/api/v1/categories/?search=11',
+            )
+        ]
+        assert pages[0] != pages[1]
+        assert [item['slug'] for item in pages[2]['results']] == ['c11']
+        assert get(client, '/api/v1/categories/?page=2')[0] == pages[1]
+
+    def test_03_other_models_and_eviction(self, client):
+        Category.objects.create(name='Фильм', slug='films')
+        get(client, '/api/v1/categories/')
+        Genre.objects.create(name='Драма', slug='drama')
+        _, queries = get(client, '/api/v1/categories/')
+        assert queries == 1, (
+            'Проверьте, что изменение жанров не сбрасывает кэш категорий.'
+        )
+        ContentVersion.bump_all()
+        _, queries = get(client, '/api/v1/categories/')
+        assert queries > 1, (
+            'Проверьте, что запись в обход сигналов (csv_import) '
+            'сбрасывает кэш ответов.'
+        )
+
+    def test_04_key_includes_host(self, client):
+        for idx in range(12):
+            Category.objects.create(name=f'Категория {idx}', slug=f'c{idx}')
+        response = client.get('/api/v1/categories/', HTTP_HOST='evil.example')
+        assert response.json()['next'].startswith('http://evil.example/')
+        data, _ = get(client, '/api/v1/categories/')
+        assert data['next'].startswith('http://testserver/'), (
+            'Проверьте, что ответ, закэшированный для одного Host, не '
+            'отдаётся запросам с другим Host.'
+        )
+
+    def test_05_version_shared_by_processes(self, client):
+        Category.objects.create(name='Фильм', slug='films')
+        get(client, '/api/v1/categories/')
+        # Другой процесс: своя память, общая база.
+        Category.objects.bulk_create([Category(name='Книга', slug='books')])
+        ContentVersion.bump([scope(Category)])
+        data, _ = get(client, '/api/v1/categories/')
+        assert data['count'] == 2, (
+            'Проверьте, что версия кэша ответов хранится в БД и общая '
+            'для всех процессов.'
+        )
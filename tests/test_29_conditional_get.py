@@ -0,0 +1,260 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import caches
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Comment, ContentVersion, Genre, Review, Title
+
+
+@pytest.fixture
+def title_tree(admin):
+    genre = Genre.objects.create(name='Рок', slug='rock')
+    title = Title.objects.create(name='Альбом', year=2000)
+    title.genre.set([genre])
+    review = Review.objects.create(
+        title=title, author=admin, text='Отзыв', score=5
+    )
+    comment = Comment.objects.create(
+        review=review, author=admin, text='Коммент'
+    )
+    return title, review, comment
+
+
+def urls(title, review, comment):
+    reviews = f'/api/v1/titles/{title.id}/reviews/'
+    comments = f'{reviews}{review.id}/comments/'
+    return {
+        'titles': '/api/v1/titles/',
+        'title': f'/api/v1/titles/{title.id}/',
+        'reviews': reviews,
+        'review': f'{reviews}{review.id}/',
+        'comments': comments,
+        'comment': f'{comments}{comment.id}/',
+    }
+
+
+def settle():
+    """Сдвигает изменения в прошлое: свежим Last-Modified не выдаётся."""
+    ContentVersion.objects.update(modified=F('modified') - timedelta(minutes=1))
+
+
+def revalidate(client, url, response):
+    with CaptureQueriesContext(connection) as captured:
+        repeated = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+    return repeated, len(captured)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test29ConditionalGet:
+
+    @pytest.mark.parametrize('name', [
+        'titles', 'title', 'reviews', 'review', 'comments', 'comment',
+    ])
+    def test_01_not_modified_in_one_query(self, client, title_tree, name):
+        url = urls(*title_tree)[name]
+        settle()
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert response.has_header('ETag'), (
+            'Проверьте, что ответ содержит заголовок ETag.'
+        )
+        assert response.has_header('Last-Modified'), (
+            'Проверьте, что ответ содержит заголовок Last-Modified.'
+        )
+        repeated, queries = revalidate(client, url, response)
+        assert repeated.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что при совпадении If-None-Match ответ - 304.'
+        )
+        assert queries == 1, (
+            'Проверьте, что для ответа 304 читаются только версии, '
+            'одним запросом.'
+        )
+        assert repeated['ETag'] == response['ETag']
+        repeated = client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        assert repeated.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что при If-Modified-Since не раньше Last-Modified '
+            'ответ - 304.'
+        )
+
+    def test_02_etag_depends_on_query(self, client, title_tree):
+        first = client.get('/api/v1/titles/')
+        other = client.get('/api/v1/titles/?fields=id,name')
+        assert first['ETag'] != other['ETag'], (
+            'Проверьте, что ETag зависит от параметров запроса.'
+        )
+        repeated = client.get(
+            '/api/v1/titles/?fields=id,name',
+            HTTP_IF_NONE_MATCH=first['ETag'],
+        )
+        assert repeated.status_code == HTTPStatus.OK
+
+    def test_03_review_changes_title_and_reviews(self, client, user_client,
+                                                 title_tree):
+        title, review, comment = title_tree
+        paths = urls(*title_tree)
+        before = {name: client.get(paths[name]) for name in paths}
+        response = user_client.post(
+            paths['reviews'], data={'text': 'Новый', 'score': 1},
+            format='json'
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        for name in ('titles', 'title', 'reviews'):
+            repeated, _ = revalidate(client, paths[name], before[name])
+            assert repeated.status_code == HTTPStatus.OK, (
+                f'Проверьте, что после нового отзыва ответ {name} '
+                'отдаётся заново с новым ETag.'
+            )
+            assert repeated['ETag'] != before[name]['ETag']
+        for name in ('review', 'comments', 'comment'):
+            repeated, _ = revalidate(client, paths[name], before[name])
+            assert repeated.status_code == HTTPStatus.NOT_MODIFIED, (
+                'Проверьте, что новый отзыв не сбрасывает ETag чужих '
+                'отзывов и комментариев.'
+            )
+
+    def test_04_comment_changes_comments(self, client, user_client,
+                                         title_tree):
+        paths = urls(*title_tree)
+        before = {name: client.get(paths[name]) for name in paths}
+        response = user_client.post(
+            paths['comments'], data={'text': 'Ответ'}, format='json'
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        for name in ('comments', 'comment'):
+            repeated, _ = revalidate(client, paths[name], before[name])
+            assert repeated.status_code == HTTPStatus.OK, (
+                'Проверьте, что новый комментарий сбрасывает ETag '
+                'комментариев отзыва.'
+            )
+        repeated, _ = revalidate(client, paths['title'], before['title'])
+        assert repeated.status_code == HTTPStatus.NOT_MODIFIED
+
+    def test_05_title_genre_and_author_changes(self, client, admin_client,
+                                               title_tree):
+        title, review, _ = title_tree
+        paths = urls(*title_tree)
+        before = client.get(paths['title'])
+        response = admin_client.patch(
+            paths['title'], data={'genre': []}, format='json'
+        )
+        assert response.status_code == HTTPStatus.OK
+        repeated, _ = revalidate(client, paths['title'], before)
+        assert repeated.status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение жанров произведения сбрасывает ETag.'
+        )
+        assert repeated.json()['genre'] == []
+
+        before = client.get(paths['titles'])
+        Genre.objects.get(slug='rock').title_set.add(title)
+        repeated, _ = revalidate(client, paths['titles'], before)
+        assert repeated.status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение связи со стороны жанра сбрасывает '
+            'ETag списка произведений.'
+        )
+
+        before = client.get(paths['review'])
+        author = review.author
+        author.username = 'renamed'
+        author.save()
+        repeated, _ = revalidate(client, paths['review'], before)
+        assert repeated.status_code == HTTPStatus.OK, (
+            'Проверьте, что смена имени автора сбрасывает ETag отзывов.'
+        )
+        assert repeated.json()['author'] == 'renamed'
+
+    def test_06_versions_shared_between_workers(self, client, title_tree):
+        title, _, _ = title_tree
+        url = urls(*title_tree)['title']
+        before = client.get(url)
+        for cache in caches.all():
+            # Другой процесс: его локальный кэш пуст.
+            cache.clear()
+        repeated, _ = revalidate(client, url, before)
+        assert repeated.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что версии для ETag хранятся не в кэше процесса.'
+        )
+        Title.objects.filter(pk=title.pk).update(name='Без сигналов')
+        ContentVersion.bump_all()
+        repeated, _ = revalidate(client, url, before)
+        assert repeated.status_code == HTTPStatus.OK, (
+            'Проверьте, что ContentVersion.bump_all() сбрасывает все ETag '
+            'после записи в обход сигналов.'
+        )
+        assert repeated.json()['name'] == 'Без сигналов'
+
+    def test_07_no_last_modified_within_second(self, client, admin_client,
+                                               title_tree):
+        url = urls(*title_tree)['title']
+        settle()
+        before = client.get(url)
+        assert before.has_header('Last-Modified')
+        response = admin_client.patch(
+            url, data={'name': 'Новое'}, format='json'
+        )
+        assert response.status_code == HTTPStatus.OK
+        repeated = client.get(
+            url, HTTP_IF_MODIFIED_SINCE=before['Last-Modified']
+        )
+        assert repeated.status_code == HTTPStatus.OK
+        assert not repeated.has_header('Last-Modified'), (
+            'Проверьте, что в секунду изменения Last-Modified не выдаётся: '
+            'следующее изменение в ту же секунду его не сдвинет.'
+        )
+
+    @pytest.mark.parametrize('count', [1, 10])
+    def test_08_cascades_bump_once(self, client, admin, django_user_model,
+                                   count):
+        title = Title.objects.create(name='Каскад', year=2000)
+        other = Title.objects.create(name='Соседнее', year=2000)
+        for number in range(count):
+            author = django_user_model.objects.create_user(
+                username=f'author{number}', email=f'a{number}@yamdb.fake'
+            )
+            for target in (title, other):
+                review = Review.objects.create(
+                    title=target, author=author, text='Отзыв', score=5
+                )
+                review.text = 'Изменён'
+                review.save()
+                Comment.objects.create(
+                    review=review, author=admin, text='Коммент'
+                )
+        paths = {
+            'titles': '/api/v1/titles/',
+            'comments': (
+                f'/api/v1/titles/{other.id}/reviews/{review.id}/comments/'
+            ),
+        }
+        before = {name: client.get(url) for name, url in paths.items()}
+
+        with CaptureQueriesContext(connection) as captured:
+            title.delete()
+            admin.delete()
+        version_queries = [
+            query for query in captured
+            if 'reviews_contentversion' in query['sql']
+        ]
+        assert len(version_queries) <= 6, (
+            'Проверьте, что каскадное удаление поднимает версии один раз, '
+            'а не по запросу на каждый удалённый объект.'
+        )
+        assert not ContentVersion.objects.filter(
+            scope__startswith=f'reviews.title:{title.id}'
+        ).exists()
+        assert ContentVersion.objects.filter(
+            scope__startswith='reviews.review:'
+        ).count() == count, (
+            'Проверьте, что строки версий удалённых объектов удаляются.'
+        )
+        for name, url in paths.items():
+            repeated, _ = revalidate(client, url, before[name])
+            assert repeated.status_code == HTTPStatus.OK, (
+                f'Проверьте, что каскадное удаление сбрасывает ETag {name}.'
+            )
+